@@ -0,0 +1,209 @@
+# account_state.py
+import time
+import threading
+from datetime import datetime
+from account_stream import get_account_balances, get_account_positions
+
+BALANCE_MESSAGE = "AccountBalance"
+POSITION_MESSAGE = "CurrentPosition"
+
+
+def _version(data, message=None):
+    """
+    Epoch time an update describes: the record's updated-at if it has one, else the streamer
+    message timestamp (milliseconds). None if neither is present.
+    """
+    value = data.get("updated-at")
+    if value:
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            pass
+    if message is not None and message.get("timestamp"):
+        return message["timestamp"] / 1000.0
+    return None
+
+
+def _position_key(position):
+    return (position.get("symbol"), position.get("instrument-type"))
+
+
+def _is_closed(position):
+    try:
+        return float(position.get("quantity") or 0) == 0
+    except (TypeError, ValueError):
+        return False
+
+
+class _Entry:
+    """One balance or position record with the version and local sequence it was written at."""
+    __slots__ = ("data", "version", "seq")
+
+    def __init__(self, data, version, seq):
+        self.data = data
+        self.version = version
+        self.seq = seq
+
+
+class AccountState:
+    def __init__(self, account_number):
+        self.account_number = account_number
+        self.balances = None
+        self.positions = {}
+        self.seeded_at = None
+        self.updated_at = None
+        self.updates = 0
+        self.stale = 0
+
+
+class AccountStateStore:
+    """
+    In-memory mirror of each account's balances and positions.
+
+    seed() loads an account once over REST; handle_message() (a stream handler for
+    stream_account_data) then applies AccountBalance/CurrentPosition updates as they arrive.
+
+    Two checks keep the mirror consistent:
+    - every applied stream update gets a local sequence number. A REST seed remembers the
+      sequence when its request went out and never overwrites a record the stream has
+      touched since, so a slow seed can't roll back newer streamed data.
+    - an update whose updated-at (or message timestamp) is older than the record we hold is
+      counted as stale and dropped, so out-of-order messages are harmless.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._accounts = {}
+        self._sequence = 0
+
+    def _account(self, account_number):
+        state = self._accounts.get(account_number)
+        if state is None:
+            state = self._accounts[account_number] = AccountState(account_number)
+        return state
+
+    def accounts(self):
+        return list(self._accounts)
+
+    def sequence(self):
+        """Current local sequence number; pass it to apply_seed() for a snapshot requested now."""
+        with self._lock:
+            return self._sequence
+
+    def is_seeded(self, account_number):
+        state = self._accounts.get(account_number)
+        return state is not None and state.seeded_at is not None
+
+    # --- REST seed -----------------------------------------------------------
+
+    def seed(self, session_token, account_number):
+        """Load balances and positions over REST and merge them in. Raises if either request fails."""
+        started_seq = self.sequence()
+        balances = get_account_balances(session_token, account_number)
+        positions = get_account_positions(session_token, account_number)
+        self.apply_seed(account_number, balances, positions, started_seq)
+
+    def apply_seed(self, account_number, balances, positions, started_seq):
+        """
+        Merge a REST snapshot taken after local sequence started_seq. Records the stream has
+        updated since then are kept as they are.
+        """
+        now = time.time()
+        with self._lock:
+            state = self._account(account_number)
+            if state.balances is None or state.balances.seq <= started_seq:
+                state.balances = _Entry(balances, _version(balances), 0)
+            else:
+                # Streamed fields win; the snapshot fills in the ones the stream didn't send
+                merged = dict(balances)
+                merged.update(state.balances.data)
+                state.balances.data = merged
+
+            merged = {key: entry for key, entry in state.positions.items() if entry.seq > started_seq}
+            for position in positions:
+                key = _position_key(position)
+                if key not in merged:
+                    merged[key] = _Entry(position, _version(position), 0)
+            # Positions closed since the seed started arrive as zero quantity; drop them now
+            state.positions = {key: entry for key, entry in merged.items() if not _is_closed(entry.data)}
+            state.seeded_at = now
+            state.updated_at = now
+
+    # --- stream updates --------------------------------------------------------
+
+    def handle_message(self, message, received_at=None):
+        """Stream handler: apply AccountBalance and CurrentPosition messages, ignore the rest."""
+        msg_type = message.get("type")
+        if msg_type not in (BALANCE_MESSAGE, POSITION_MESSAGE):
+            return
+        data = message.get("data") or {}
+        account_number = data.get("account-number")
+        if account_number is None:
+            return
+        version = _version(data, message)
+
+        with self._lock:
+            state = self._account(account_number)
+            if msg_type == BALANCE_MESSAGE:
+                current = state.balances
+            else:
+                key = _position_key(data)
+                current = state.positions.get(key)
+            if current is not None and version is not None and current.version is not None \
+                    and version < current.version:
+                state.stale += 1
+                return
+
+            self._sequence += 1
+            if msg_type == BALANCE_MESSAGE:
+                # Stream balance messages may carry a subset of fields; keep the rest from the seed
+                merged = dict(current.data) if current is not None else {}
+                merged.update(data)
+                state.balances = _Entry(merged, version, self._sequence)
+            else:
+                # Closed positions (zero quantity) stay as tombstones so an in-flight seed
+                # can't resurrect them; reads skip them
+                state.positions[key] = _Entry(data, version, self._sequence)
+            state.updates += 1
+            state.updated_at = received_at or time.time()
+
+    # Alias so the store can be passed anywhere a handler is expected
+    __call__ = handle_message
+
+    # --- reads -----------------------------------------------------------------
+
+    def balances(self, account_number):
+        """Copy of the account's balances, or None if it hasn't been loaded."""
+        with self._lock:
+            state = self._accounts.get(account_number)
+            if state is None or state.balances is None:
+                return None
+            return dict(state.balances.data)
+
+    def positions(self, account_number):
+        """Copies of the account's open positions, sorted by symbol."""
+        with self._lock:
+            state = self._accounts.get(account_number)
+            if state is None:
+                return []
+            items = [dict(entry.data) for entry in state.positions.values() if not _is_closed(entry.data)]
+        return sorted(items, key=lambda position: position.get("symbol") or "")
+
+    def stats(self, account_number):
+        state = self._accounts.get(account_number)
+        if state is None:
+            return None
+        return {
+            "seeded_at": state.seeded_at,
+            "updated_at": state.updated_at,
+            "updates": state.updates,
+            "stale": state.stale
+        }
+
+    def clear(self):
+        with self._lock:
+            self._accounts.clear()
+
+
+# Shared store fed by the account stream (see main.menu())
+account_store = AccountStateStore()
@@ -1,16 +1,71 @@
 # account_stream.py
 import json
+import time
 import asyncio
 import websockets
-import keyboard
-import requests
-from config import BASE_URL
+import codec
+from codec import message_type
+from http_client import client
+from config import ACCOUNT_STREAMER_URL
+from quote_cache import quote_cache
+from event_bus import DROP_OLDEST, HandlerConsumer
 
 is_account_stream_connected = False
 
-async def stream_account_data(session_token, account_numbers):
+async def stream_account_data(session_token, account_numbers, echo=True, ws_url=ACCOUNT_STREAMER_URL,
+                              handlers=None, raw_handlers=None, bus=None, connected=None):
+    """
+    Connect to the account streamer and print balance/order/position updates.
+
+    :param echo: Print every received message. Turn off when the stream runs in the background (see runtime.py).
+    :param ws_url: Account streamer URL, defaults to ACCOUNT_STREAMER_URL from config.py.
+    :param handlers: (Optional) Callables handler(data, received_at) called with every decoded message. With a
+        bus each runs as its own block-policy bus consumer instead of inside the receive loop.
+    :param raw_handlers: (Optional) Callables handler(raw, msg_type, received_at) called with every frame
+        before it is decoded; messages are only decoded if echo is on or there are decoded handlers.
+    :param bus: (Optional) EventBus to publish messages to as (type, account number, message). With a
+        bus, echoed messages are printed by a drop-oldest bus consumer instead of the receive loop.
+    :param connected: (Optional) threading.Event set once the streamer has accepted the connect
+        message, i.e. from when updates for account_numbers are delivered. If the streamer rejects
+        it, the stream ends without setting the event.
+    """
+    handlers = list(handlers or [])
+    raw_handlers = list(raw_handlers or [])
+    consumers = []
+    if bus is not None:
+        # Typed account messages are published under their account number (market data never is)
+        consumers = [HandlerConsumer(bus, [handler], symbols=account_numbers,
+                                     name=getattr(handler, "__qualname__", "account-handler")).start()
+                     for handler in handlers]
+        handlers = []
+    echo_subscription = echo_task = None
+    if echo and bus is not None:
+        echo_subscription = bus.subscribe(symbols=account_numbers, policy=DROP_OLDEST, name="account-echo")
+        echo_task = asyncio.create_task(_print_messages(echo_subscription))
+    try:
+        await _stream_account_data(session_token, account_numbers, echo, ws_url, handlers, raw_handlers, bus,
+                                   connected)
+    finally:
+        if echo_task is not None:
+            echo_task.cancel()
+            bus.unsubscribe(echo_subscription)
+        for consumer in consumers:
+            await consumer.stop()
+
+def _print_message(data):
+    if data.get("type") == "AccountBalance":
+        print("\nAccount Balance Update:")
+        print(json.dumps(data["data"], indent=2))
+    else:
+        print("Account Data Received:", json.dumps(data, indent=2))
+
+async def _print_messages(subscription):
+    async for data in subscription:
+        _print_message(data)
+
+async def _stream_account_data(session_token, account_numbers, echo, ws_url, handlers, raw_handlers, bus,
+                               connected):
     global is_account_stream_connected
-    ws_url = "wss://streamer.cert.tastyworks.com"
     async with websockets.connect(ws_url) as websocket:
         print("Connected to Account Streamer WebSocket")
         is_account_stream_connected = True
@@ -22,38 +77,59 @@ async def stream_account_data(session_token, account_numbers):
                 "auth-token": session_token,
                 "request-id": 1
             }
-            await websocket.send(json.dumps(auth_message))
+            await websocket.send(codec.dumps(auth_message))
             print("Sent authentication message:", auth_message)
 
             auth_response = await websocket.recv()
             print("Authentication response received:", auth_response)
+            try:
+                accepted = codec.loads(auth_response).get("status") == "ok"
+            except (ValueError, AttributeError):
+                accepted = False
+            if not accepted:
+                print("Account streamer rejected the connect message; stopping the account stream.")
+                return
+            if connected is not None:
+                connected.set()
+
+            # The heartbeat never changes for this connection, so serialize it once
+            heartbeat_frame = codec.dumps({
+                "action": "heartbeat",
+                "auth-token": session_token,
+                "request-id": 2
+            })
 
             async def send_heartbeat():
                 while is_account_stream_connected:
-                    heartbeat_message = {
-                        "action": "heartbeat",
-                        "auth-token": session_token,
-                        "request-id": 2
-                    }
-                    await websocket.send(json.dumps(heartbeat_message))
-                    print("Sent heartbeat message")
+                    await websocket.send(heartbeat_frame)
+                    if echo:
+                        print("Sent heartbeat message")
                     await asyncio.sleep(3)
 
             heartbeat_task = asyncio.create_task(send_heartbeat())
 
             try:
                 while is_account_stream_connected:
-                    if keyboard.is_pressed("esc"):
-                        print("\nEsc key pressed. Disconnecting from account stream...")
-                        break
                     try:
                         message = await websocket.recv()
-                        data = json.loads(message)
-                        if data.get("type") == "AccountBalance":
-                            print("\nAccount Balance Update:")
-                            print(json.dumps(data["data"], indent=2))
-                        else:
-                            print("Account Data Received:", json.dumps(data, indent=2))
+                        received_at = time.time()
+                        if raw_handlers:
+                            msg_type = message_type(message)
+                            for handler in raw_handlers:
+                                handler(message, msg_type, received_at)
+                        publish = bus is not None and bus.has_subscribers()
+                        if not echo and not handlers and not publish:
+                            # Nobody would look at it; skip the parse
+                            continue
+                        data = codec.loads(message)
+                        for handler in handlers:
+                            handler(data, received_at)
+                        if publish:
+                            if data.get("type"):
+                                account_number = (data.get("data") or {}).get("account-number")
+                                await bus.publish([(data["type"], account_number, data)], received_at)
+                        elif echo and bus is None:
+                            _print_message(data)
                     except websockets.exceptions.ConnectionClosed:
                         print("WebSocket connection closed")
                         break
@@ -71,43 +147,64 @@ async def stream_account_data(session_token, account_numbers):
             is_account_stream_connected = False
             print("Disconnected from Account Streamer WebSocket.")
 
+def get_account_balances(session_token, account_number):
+    """GET the balances of one account. Returns the balance dict, or raises on failure."""
+    response = client.get(f"/accounts/{account_number}/balances", session_token=session_token)
+    if response.status_code != 200:
+        raise Exception(f"Failed to fetch account balances: {response.status_code} {response.text}")
+    return codec.loads_response(response).get("data", {})
+
+def get_account_positions(session_token, account_number):
+    """GET the positions of one account. Returns a list of position dicts, or raises on failure."""
+    response = client.get(f"/accounts/{account_number}/positions", session_token=session_token)
+    if response.status_code != 200:
+        raise Exception(f"Failed to fetch account positions: {response.status_code} {response.text}")
+    return codec.loads_response(response).get("data", {}).get("items", [])
+
+def print_account_balances(data):
+    print("\n--- Account Balance ---")
+    print(f"Account Number: {data.get('account-number')}")
+    print(f"Net Liquidating Value: {data.get('net-liquidating-value')}")
+    print(f"Cash Balance: {data.get('cash-balance')}")
+    print(f"Long Equity Value: {data.get('long-equity-value')}")
+    print(f"Short Equity Value: {data.get('short-equity-value')}")
+    print(f"Equity Buying Power: {data.get('equity-buying-power')}")
+    print(f"Derivative Buying Power: {data.get('derivative-buying-power')}")
+    print(f"Cash Available to Withdraw: {data.get('cash-available-to-withdraw')}")
+
+def print_account_positions(items):
+    if not items:
+        print("\n--- No Positions Found ---")
+        return
+
+    print("\n--- Account Positions ---")
+    for position in items:
+        print(f"\nSymbol: {position.get('symbol')}")
+        print(f"Instrument Type: {position.get('instrument-type')}")
+        print(f"Quantity: {position.get('quantity')} ({position.get('quantity-direction')})")
+        print(f"Close Price: {position.get('close-price')}")
+        mark = quote_cache.get_mark(position.get('symbol'))
+        if mark is not None:
+            print(f"Live Mark (streamed): {mark}")
+        print(f"Average Open Price: {position.get('average-open-price')}")
+        print(f"Unrealized Day Gain: {position.get('realized-day-gain')}")
+        print(f"Realized Today: {position.get('realized-today')}")
+        print(f"Updated At: {position.get('updated-at')}")
+
 def fetch_account_balances(session_token, account_number):
-    url = f"{BASE_URL}/accounts/{account_number}/balances"
-    headers = {"Authorization": session_token}
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        data = response.json().get("data", {})
-        print("\n--- Account Balance ---")
-        print(f"Account Number: {data.get('account-number')}")
-        print(f"Net Liquidating Value: {data.get('net-liquidating-value')}")
-        print(f"Cash Balance: {data.get('cash-balance')}")
-        print(f"Long Equity Value: {data.get('long-equity-value')}")
-        print(f"Short Equity Value: {data.get('short-equity-value')}")
-        print(f"Equity Buying Power: {data.get('equity-buying-power')}")
-        print(f"Derivative Buying Power: {data.get('derivative-buying-power')}")
-        print(f"Cash Available to Withdraw: {data.get('cash-available-to-withdraw')}")
-    else:
-        print(f"Failed to fetch account balances: {response.status_code} {response.text}")
+    try:
+        data = get_account_balances(session_token, account_number)
+    except Exception as e:
+        print(e)
+        return None
+    print_account_balances(data)
+    return data
 
 def fetch_account_positions(session_token, account_number):
-    url = f"{BASE_URL}/accounts/{account_number}/positions"
-    headers = {"Authorization": session_token}
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        items = response.json().get("data", {}).get("items", [])
-        if not items:
-            print("\n--- No Positions Found ---")
-            return
-
-        print("\n--- Account Positions ---")
-        for position in items:
-            print(f"\nSymbol: {position.get('symbol')}")
-            print(f"Instrument Type: {position.get('instrument-type')}")
-            print(f"Quantity: {position.get('quantity')} ({position.get('quantity-direction')})")
-            print(f"Close Price: {position.get('close-price')}")
-            print(f"Average Open Price: {position.get('average-open-price')}")
-            print(f"Unrealized Day Gain: {position.get('realized-day-gain')}")
-            print(f"Realized Today: {position.get('realized-today')}")
-            print(f"Updated At: {position.get('updated-at')}")
-    else:
-        print(f"Failed to fetch account positions: {response.status_code} {response.text}")
+    try:
+        items = get_account_positions(session_token, account_number)
+    except Exception as e:
+        print(e)
+        return None
+    print_account_positions(items)
+    return items
@@ -0,0 +1,277 @@
+# bars.py
+import time
+import threading
+from config import BAR_TIMEFRAMES, BAR_HISTORY
+
+BAR_FIELDS = ("time", "open", "high", "low", "close", "volume", "vwap", "trades")
+FIELD_INDEX = {name: index for index, name in enumerate(BAR_FIELDS)}
+
+_NAN = float("nan")
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return _NAN
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise Exception("Building bars requires numpy (pip install numpy).")
+    return numpy
+
+
+def timeframe_label(seconds):
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600}h"
+    if seconds % 60 == 0:
+        return f"{seconds // 60}m"
+    return f"{seconds}s"
+
+
+class BarRing:
+    """
+    The last capacity closed bars of one symbol and timeframe, column-wise in a single
+    preallocated float64 array of shape (len(BAR_FIELDS), 2 * capacity).
+
+    Every bar is written twice, at slot i and i + capacity, so the most recent n bars are
+    always one contiguous slice in time order. view() and column() therefore return NumPy
+    views, never copies, and appending stays O(1). Once the ring is full each append
+    overwrites the oldest bar, so copy a view you want to keep.
+    """
+
+    def __init__(self, capacity, np):
+        self.capacity = capacity
+        self.count = 0
+        self._data = np.full((len(BAR_FIELDS), 2 * capacity), np.nan)
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, bar):
+        slot = self.count % self.capacity
+        self._data[:, slot] = bar
+        self._data[:, slot + self.capacity] = bar
+        self.count += 1
+
+    def view(self, n=None):
+        """(len(BAR_FIELDS), n) view of the last n bars, oldest first; rows follow BAR_FIELDS."""
+        size = len(self)
+        n = size if n is None else max(0, min(n, size))
+        if n == 0:
+            return self._data[:, :0]
+        end = (self.count - 1) % self.capacity + 1 + self.capacity
+        return self._data[:, end - n:end]
+
+    def column(self, name, n=None):
+        """Contiguous 1-D view of one field (e.g. "close") over the last n bars."""
+        return self.view(n)[FIELD_INDEX[name]]
+
+
+class _SymbolBars:
+    __slots__ = ("day_volume", "open_bars", "rings")
+
+    def __init__(self, timeframes, history, np):
+        self.day_volume = _NAN
+        # Open bar per timeframe: [start, open, high, low, close, volume, price * volume, trades]
+        self.open_bars = [None] * len(timeframes)
+        self.rings = [BarRing(history, np) for _ in timeframes]
+
+
+class BarBuilder:
+    """
+    Builds OHLCV + VWAP bars per symbol at several timeframes from streamed Trade events.
+
+    on_events(events, received_at) has the same signature as a market stream handler. Each
+    trade updates the open bar of every timeframe in place (a few float operations, no
+    allocation), so the cost per tick is constant. Bars are aligned to multiples of their
+    timeframe in receive time, since Trade events carry no timestamp of their own. A bar is
+    closed into its BarRing when a trade for a later period arrives, or by close_expired();
+    periods without trades produce no bar.
+
+    Volume is the increase in dayVolume between consecutive trades when both are known, which
+    also counts trades the feed coalesced away, and the event's size otherwise.
+
+        builder = BarBuilder()
+        stream.add_handler(builder.on_events)
+        bars = builder.bars("SPY", 60)
+        sma(bars["close"], 20)
+    """
+
+    def __init__(self, timeframes=BAR_TIMEFRAMES, history=BAR_HISTORY):
+        self.np = _numpy()
+        self.timeframes = tuple(sorted(timeframes))
+        self.history = history
+        self.trades = 0
+        self.bars_closed = 0
+        self._lock = threading.Lock()
+        self._symbols = {}
+
+    def on_events(self, events, received_at=None):
+        if received_at is None:
+            received_at = time.time()
+        with self._lock:
+            for event in events:
+                if event.eventType == "Trade":
+                    self._add_trade(event.eventSymbol, event.price, event.size, event.dayVolume, received_at)
+
+    # Alias so a builder can be passed anywhere a handler is expected
+    __call__ = on_events
+
+    def add_trade(self, symbol, price, size, day_volume=None, at=None):
+        """Feed one trade directly, e.g. when replaying recorded ticks."""
+        with self._lock:
+            self._add_trade(symbol, price, size, day_volume, time.time() if at is None else at)
+
+    def _add_trade(self, symbol, price, size, day_volume, at):
+        price = _float(price)
+        if not price > 0:
+            return
+        state = self._symbols.get(symbol)
+        if state is None:
+            state = self._symbols[symbol] = _SymbolBars(self.timeframes, self.history, self.np)
+
+        day_volume = _float(day_volume)
+        if day_volume >= state.day_volume:
+            volume = day_volume - state.day_volume
+        else:
+            # First trade, a new session or no dayVolume in the event
+            volume = _float(size)
+            if volume != volume:
+                volume = 0.0
+        if day_volume == day_volume:
+            state.day_volume = day_volume
+        self.trades += 1
+
+        open_bars = state.open_bars
+        for index, timeframe in enumerate(self.timeframes):
+            start = at - at % timeframe
+            bar = open_bars[index]
+            if bar is None or start > bar[0]:
+                if bar is not None:
+                    self._close(state, index, bar)
+                open_bars[index] = [start, price, price, price, price, volume, price * volume, 1]
+                continue
+            if price > bar[2]:
+                bar[2] = price
+            elif price < bar[3]:
+                bar[3] = price
+            bar[4] = price
+            bar[5] += volume
+            bar[6] += price * volume
+            bar[7] += 1
+
+    def _close(self, state, index, bar):
+        start, open_, high, low, close, volume, price_volume, trades = bar
+        vwap = price_volume / volume if volume > 0 else close
+        state.rings[index].append((start, open_, high, low, close, volume, vwap, trades))
+        state.open_bars[index] = None
+        self.bars_closed += 1
+
+    def close_expired(self, now=None, symbols=None):
+        """Close open bars whose period has ended, for symbols that have gone quiet."""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            for symbol in self._symbols if symbols is None else symbols:
+                state = self._symbols.get(symbol)
+                if state is None:
+                    continue
+                for index, timeframe in enumerate(self.timeframes):
+                    bar = state.open_bars[index]
+                    if bar is not None and bar[0] + timeframe <= now:
+                        self._close(state, index, bar)
+
+    # --- reading ---------------------------------------------------------------
+
+    def _ring(self, symbol, timeframe):
+        state = self._symbols.get(symbol)
+        if state is None or timeframe not in self.timeframes:
+            return None
+        return state.rings[self.timeframes.index(timeframe)]
+
+    def symbols(self):
+        return list(self._symbols)
+
+    def bars(self, symbol, timeframe, n=None):
+        """
+        Closed bars of symbol at timeframe (seconds) as {field: 1-D view}, oldest first, or
+        None for a symbol or timeframe that isn't tracked. Closes the current bar first if its
+        period is over. The arrays share memory with the ring buffer.
+        """
+        self.close_expired(symbols=[symbol])
+        with self._lock:
+            ring = self._ring(symbol, timeframe)
+            if ring is None:
+                return None
+            view = ring.view(n)
+        return dict(zip(BAR_FIELDS, view))
+
+    def current(self, symbol, timeframe):
+        """The bar still being built for symbol at timeframe, as a dict, or None."""
+        with self._lock:
+            state = self._symbols.get(symbol)
+            if state is None or timeframe not in self.timeframes:
+                return None
+            bar = state.open_bars[self.timeframes.index(timeframe)]
+            if bar is None:
+                return None
+            start, open_, high, low, close, volume, price_volume, trades = bar
+            return {"time": start, "open": open_, "high": high, "low": low, "close": close, "volume": volume,
+                    "vwap": price_volume / volume if volume > 0 else close, "trades": trades}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "symbols": len(self._symbols),
+                "timeframes": [timeframe_label(timeframe) for timeframe in self.timeframes],
+                "trades": self.trades,
+                "bars_closed": self.bars_closed,
+                "memory_bytes": sum(ring._data.nbytes for state in self._symbols.values() for ring in state.rings)
+            }
+
+    def print_bars(self, symbol, timeframe, n=10):
+        bars = self.bars(symbol, timeframe, n)
+        label = timeframe_label(timeframe)
+        if bars is None:
+            print(f"No {label} bars for {symbol}.")
+            return
+        print(f"\n--- {symbol} {label} bars ---")
+        print(f"{'Time':<10}{'Open':>12}{'High':>12}{'Low':>12}{'Close':>12}{'Volume':>14}{'VWAP':>12}{'Trades':>8}")
+        rows = [tuple(bars[name][i] for name in BAR_FIELDS) for i in range(len(bars["time"]))]
+        current = self.current(symbol, timeframe)
+        if current is not None:
+            rows.append(tuple(current[name] for name in BAR_FIELDS))
+        for index, (start, open_, high, low, close, volume, vwap, trades) in enumerate(rows):
+            marker = "*" if current is not None and index == len(rows) - 1 else " "
+            print(f"{time.strftime('%H:%M:%S', time.localtime(start))}{marker} {open_:>12.2f}{high:>12.2f}"
+                  f"{low:>12.2f}{close:>12.2f}{volume:>14,.0f}{vwap:>12.2f}{int(trades):>8}")
+        if current is not None:
+            print("(* still open)")
+
+
+#-----------------------------------------------------------------------------
+
+
+def sma(values, window):
+    """Simple moving average over a bar column; NaN until window values are available."""
+    np = _numpy()
+    values = np.asarray(values, dtype=float)
+    result = np.full(len(values), np.nan)
+    if window <= 0 or len(values) < window:
+        return result
+    sums = np.cumsum(values)
+    result[window - 1] = sums[window - 1]
+    result[window:] = sums[window:] - sums[:-window]
+    return result / window
+
+
+def vwap(bars):
+    """Volume-weighted average price over a set of bars (as returned by BarBuilder.bars())."""
+    np = _numpy()
+    volume = bars["volume"]
+    total = volume.sum()
+    return float(np.dot(bars["vwap"], volume) / total) if total > 0 else _NAN
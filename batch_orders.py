@@ -0,0 +1,252 @@
+# batch_orders.py
+"""
+Submit a basket of orders from a file.
+
+CSV: one row per leg. Rows with the same "group" value form one (multi-leg) order; rows
+without a group are single-leg orders. Columns (either "-" or "_" works in names):
+
+    group, order-type, time-in-force, gtc-date, price, price-effect,
+    instrument-type, symbol, action, quantity
+
+Order-level columns are read from the first row of a group.
+
+JSONL: one order per line, either in API form ({"order-type": ..., "legs": [...]}) or flat
+with the leg fields at the top level.
+"""
+import os
+import csv
+import json
+import time
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from config import BATCH_SUBMIT_MAX_WORKERS, BATCH_SUBMIT_RATE
+from orders import build_order, post_order
+from instruments import instrument_cache
+
+ORDER_FIELDS = ("order-type", "time-in-force", "gtc-date", "price", "price-effect")
+LEG_FIELDS = ("instrument-type", "symbol", "action", "quantity")
+RESULT_COLUMNS = ("line", "ok", "order_id", "status", "latency_ms", "error", "symbols")
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _normalize(row):
+    return {key.strip().lower().replace("_", "-"): value.strip() if isinstance(value, str) else value
+            for key, value in row.items() if key}
+
+
+def _spec(line, fields, legs):
+    """Order definition as build_order() keywords plus the source line for reporting."""
+    spec = {"line": line, "legs": legs}
+    for name in ORDER_FIELDS:
+        value = fields.get(name)
+        spec[name] = None if value == "" else value
+    return spec
+
+
+def read_csv_orders(path):
+    specs = []
+    groups = {}
+    with open(path, "r", newline="") as f:
+        # Line 1 is the header
+        for line, row in enumerate(csv.DictReader(f), 2):
+            row = _normalize(row)
+            if not any(row.values()):
+                continue
+            leg = {name: row.get(name) for name in LEG_FIELDS}
+            group = row.get("group")
+            if group and group in groups:
+                groups[group]["legs"].append(leg)
+                continue
+            spec = _spec(line, row, [leg])
+            if group:
+                groups[group] = spec
+            specs.append(spec)
+    return specs
+
+
+def read_jsonl_orders(path):
+    specs = []
+    with open(path, "r") as f:
+        for line, text in enumerate(f, 1):
+            if not text.strip():
+                continue
+            try:
+                order = _normalize(json.loads(text))
+            except ValueError as e:
+                specs.append({"line": line, "error": f"Invalid JSON: {e}"})
+                continue
+            legs = order.get("legs")
+            if legs is None:
+                legs = [{name: order.get(name) for name in LEG_FIELDS}]
+            else:
+                legs = [_normalize(leg) for leg in legs]
+            specs.append(_spec(line, order, legs))
+    return specs
+
+
+def read_order_file(path):
+    """Order definitions from a .csv or .jsonl/.json file."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return read_csv_orders(path)
+    if extension in (".jsonl", ".json", ".ndjson"):
+        return read_jsonl_orders(path)
+    raise Exception(f"Unsupported order file type {extension!r}; use .csv or .jsonl")
+
+
+def validate_orders(specs, session_token=None):
+    """
+    Run every definition through orders.build_order() and, given a session token, through the
+    instrument cache (symbol lookup, quantity precision, tick-size snapping).
+
+    :return: (orders, errors, notes) - (line, payload) for the valid orders, (line, message)
+        for the invalid ones and (line, message) for adjustments such as snapped prices.
+    """
+    valid, errors, notes = [], [], []
+    if session_token is not None:
+        instrument_cache.prefetch(session_token, [
+            (leg.get("instrument-type"), (leg.get("symbol") or "").strip().upper())
+            for spec in specs for leg in spec.get("legs", [])
+        ])
+    for spec in specs:
+        if "error" in spec:
+            errors.append((spec["line"], spec["error"]))
+            continue
+        try:
+            payload = build_order(
+                spec["order-type"], spec["time-in-force"], spec["legs"],
+                price=spec["price"], price_effect=spec["price-effect"] or "None", gtc_date=spec["gtc-date"]
+            )
+            if session_token is not None:
+                payload, adjustments = instrument_cache.validate_order(session_token, payload)
+                notes += [(spec["line"], note) for note in adjustments]
+            valid.append((spec["line"], payload))
+        except ValueError as e:
+            errors.append((spec["line"], str(e)))
+    return valid, errors, notes
+
+
+def _submit_one(session_token, account_number, line, payload, limiter):
+    limiter.wait()
+    start = time.perf_counter()
+    result = {"line": line, "ok": False, "order_id": None, "status": None, "error": None,
+              "symbols": " ".join(leg["symbol"] for leg in payload["legs"])}
+    try:
+        order = post_order(session_token, account_number, payload).get("order", {})
+        result.update(ok=True, order_id=order.get("id"), status=order.get("status"))
+    except requests.exceptions.RequestException as e:
+        error = str(e)
+        if getattr(e, 'response', None) is not None:
+            error = f"{error} - {e.response.text}"
+        result["error"] = error
+    except Exception as e:
+        # e.g. an unreadable response to a POST that may have gone through; keep the batch going
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+def submit_orders_concurrently(session_token, account_number, orders,
+                               max_workers=BATCH_SUBMIT_MAX_WORKERS, rate=BATCH_SUBMIT_RATE):
+    """
+    POST validated orders in parallel. Submissions are not retried: a timed-out POST may still
+    have been accepted, and a retry could place the order twice.
+
+    :param orders: List of (line, payload) from validate_orders().
+    :param max_workers: Maximum number of POSTs in flight at once.
+    :param rate: Maximum submissions started per second (None or 0 for no limit).
+    :return: (results, elapsed) - one result dict per order, in input order, and the wall-clock time in seconds.
+    """
+    start = time.perf_counter()
+    if not orders:
+        return [], 0.0
+    limiter = RateLimiter(rate)
+    workers = max(1, min(max_workers, len(orders)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(
+            lambda order: _submit_one(session_token, account_number, order[0], order[1], limiter),
+            orders
+        ))
+    return results, time.perf_counter() - start
+
+
+def write_results(path, results):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+        writer.writeheader()
+        for result in results:
+            writer.writerow({column: result.get(column) for column in RESULT_COLUMNS})
+
+
+def results_path(order_file):
+    stem, _ = os.path.splitext(order_file)
+    return f"{stem}_results_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+
+
+def submit_order_file(session_token, account_number, path=None):
+    """Menu flow: read, validate, confirm, submit and write the result file."""
+    if path is None:
+        path = input("\nEnter the path of the order file (.csv or .jsonl): ").strip()
+    if not path:
+        return
+    try:
+        specs = read_order_file(path)
+    except Exception as e:
+        print(f"Failed to read order file: {e}")
+        return
+
+    orders, errors, notes = validate_orders(specs, session_token)
+    for line, note in notes:
+        print(f"Line {line}: {note}")
+    if errors:
+        print(f"\n=== {len(errors)} invalid order(s); nothing was submitted ===")
+        for line, message in errors:
+            print(f"Line {line}: {message}")
+        return
+    if not orders:
+        print("No orders found in file.")
+        return
+
+    print(f"\n=== {len(orders)} order(s) validated ===")
+    for line, payload in orders:
+        legs = ", ".join(f"{leg['action']} {leg['quantity']} {leg['symbol']}" for leg in payload["legs"])
+        price = f" @ {payload['price']}" if "price" in payload else ""
+        print(f"Line {line}: {payload['order-type']} {payload['time-in-force']}{price} - {legs}")
+
+    confirm = input(f"\nSubmit all {len(orders)} order(s)? (y/n): ").lower()
+    if confirm != 'y':
+        print("Batch submission cancelled.")
+        return
+
+    results, elapsed = submit_orders_concurrently(session_token, account_number, orders)
+    output = results_path(path)
+    write_results(output, results)
+
+    submitted = sum(1 for result in results if result["ok"])
+    print("\n=== Batch Summary ===")
+    print(f"Submitted: {submitted}")
+    print(f"Failed: {len(results) - submitted}")
+    for result in results:
+        if not result["ok"]:
+            print(f"Line {result['line']}: {result['error']}")
+    print(f"Total time: {elapsed:.2f} s")
+    print(f"Results written to {output}")
@@ -0,0 +1,376 @@
+# benchmark.py
+"""
+Benchmarks for the stream decode/dispatch paths and the REST calls, run entirely against the
+local stand-ins in mock_server.py.
+
+    python benchmark.py --duration 5 --rate 2000 --batch 10 --output results.json
+    python benchmark.py --output new.json --compare results.json
+
+Stream latency is measured from the moment a message is read off the socket to the moment a
+registered handler sees it (decode + dispatch). The market_bus and account_bus benchmarks run the
+streams the way runtime.py does: handlers as event bus consumers on a worker thread next to the
+conflated quote-cache consumer. They add each subscriber's publish-to-pickup lag and its drop,
+conflation and backpressure counters. Results are written as JSON so runs can be compared with
+--compare.
+"""
+import io
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import contextlib
+import requests
+import codec
+from http_client import client
+from feed_decoder import CompactDecoder, FEED_EVENT_FIELDS
+from quote_cache import QuoteCache
+from market_stream import MarketDataStream, stream_market_data
+from event_bus import EventBus
+from account_stream import stream_account_data, fetch_account_balances, fetch_account_positions
+from orders import fetch_live_orders, cancel_orders_concurrently
+from mock_server import MockServer, MockRestServer, SyntheticFeed
+
+
+def summarize(samples):
+    """Latency summary in microseconds."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1e6
+    return {
+        "count": len(ordered),
+        "mean_us": sum(ordered) / len(ordered) * 1e6,
+        "p50_us": pick(0.50),
+        "p99_us": pick(0.99),
+        "max_us": ordered[-1] * 1e6
+    }
+
+
+def bench_decode(messages, batch, symbols):
+    """codec.loads + COMPACT decode + quote cache update on pre-built FEED_DATA messages."""
+    feed = SyntheticFeed(seed=1)
+    raw = []
+    for i in range(min(messages, 1000)):
+        values = []
+        for j in range(batch):
+            values += feed.values("Quote", symbols[(i * batch + j) % len(symbols)], FEED_EVENT_FIELDS["Quote"])
+        raw.append(json.dumps({"type": "FEED_DATA", "channel": 3, "data": ["Quote", values]}))
+
+    decoder = CompactDecoder()
+    cache = QuoteCache()
+    start = time.perf_counter()
+    for i in range(messages):
+        data = codec.loads(raw[i % len(raw)])
+        received_at = time.time()
+        for event in decoder.decode(data["data"]):
+            cache.update(event, received_at)
+    elapsed = time.perf_counter() - start
+    return {
+        "messages": messages,
+        "seconds": elapsed,
+        "messages_per_second": messages / elapsed,
+        "events_per_second": messages * batch / elapsed
+    }
+
+
+async def bench_market_stream(duration, rate, batch, symbols, channels):
+    server = await MockServer(dxlink_port=0, account_port=0, rate=rate, batch=batch, account_rate=0).start()
+    latencies = []
+    events = [0]
+
+    def handler(batch_events, received_at):
+        latencies.append(time.time() - received_at)
+        events[0] += len(batch_events)
+
+    stream = MarketDataStream(server.dxlink_url, "benchmark", symbols, echo=False, channels=channels)
+    stream.add_handler(handler)
+    task = asyncio.create_task(stream.run())
+    try:
+        # Let the handshake finish before measuring
+        while not stream.connected:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.2)
+        latencies.clear()
+        events[0] = 0
+        sent_before = server.messages_sent
+        start = time.perf_counter()
+        await asyncio.sleep(duration)
+        elapsed = time.perf_counter() - start
+        received = len(latencies)
+        sent = server.messages_sent - sent_before
+    finally:
+        stream.stop()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await server.stop()
+
+    return {
+        "target_messages_per_second": rate * channels,
+        "messages_sent": sent,
+        "messages_received": received,
+        "messages_per_second": received / elapsed,
+        "events_per_second": events[0] / elapsed,
+        "latency": summarize(latencies)
+    }
+
+
+_COUNTERS = ("published", "delivered", "dropped", "conflated", "blocked")
+
+
+def _subscriber_counts(bus):
+    return {sub["name"]: dict(sub, lag_total=sub["mean_lag"] * sub["delivered"]) for sub in bus.stats()}
+
+
+def _subscriber_deltas(before, bus):
+    """Queue counters per bus subscriber since before (a _subscriber_counts() snapshot); lags in microseconds."""
+    results = {}
+    for name, sub in _subscriber_counts(bus).items():
+        start = before.get(name, {})
+        result = {"policy": sub["policy"], "maxsize": sub["maxsize"], "max_depth": sub["max_depth"]}
+        for counter in _COUNTERS:
+            result[counter] = sub[counter] - start.get(counter, 0)
+        lag_total = sub["lag_total"] - start.get("lag_total", 0.0)
+        result["mean_lag_us"] = lag_total / result["delivered"] * 1e6 if result["delivered"] else 0.0
+        result["max_lag_us"] = sub["max_lag"] * 1e6
+        results[name] = result
+    return results
+
+
+async def _measure_bus(stream_task, bus, server, latencies, events, duration, sent_counter):
+    """Warm up until a handler has run, then measure for duration seconds. Stops the stream task."""
+    try:
+        while not latencies:
+            if stream_task.done():
+                await stream_task
+                raise Exception("Stream ended before any message reached the handlers.")
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.2)
+        before = _subscriber_counts(bus)
+        latencies.clear()
+        events[0] = 0
+        sent_before = sent_counter()
+        start = time.perf_counter()
+        await asyncio.sleep(duration)
+        elapsed = time.perf_counter() - start
+        received = len(latencies)
+        sent = sent_counter() - sent_before
+        subscribers = _subscriber_deltas(before, bus)
+    finally:
+        stream_task.cancel()
+        await asyncio.gather(stream_task, return_exceptions=True)
+        await server.stop()
+    return elapsed, received, sent, subscribers
+
+
+async def bench_market_bus(duration, rate, batch, symbols, channels):
+    """Market stream through the event bus, with the consumer set runtime.start_market_stream uses."""
+    server = await MockServer(dxlink_port=0, account_port=0, rate=rate, batch=batch, account_rate=0).start()
+    bus = EventBus()
+    latencies = []
+    events = [0]
+
+    def handler(batch_events, received_at):
+        latencies.append(time.time() - received_at)
+        events[0] += len(batch_events)
+
+    task = asyncio.create_task(stream_market_data(server.dxlink_url, "benchmark", symbols, echo=False,
+                                                  channels_per_connection=channels, handlers=[handler], bus=bus))
+    elapsed, received, sent, subscribers = await _measure_bus(
+        task, bus, server, latencies, events, duration, lambda: server.messages_sent)
+    return {
+        "target_messages_per_second": rate * channels,
+        "messages_sent": sent,
+        "handler_batches": received,
+        "messages_per_second": received / elapsed,
+        "events_per_second": events[0] / elapsed,
+        "latency": summarize(latencies),
+        "subscribers": subscribers
+    }
+
+
+async def bench_account_bus(duration, rate):
+    """Account stream through the event bus, with its handler as a block-policy bus consumer."""
+    server = await MockServer(dxlink_port=0, account_port=0, rate=0, account_rate=rate).start()
+    bus = EventBus()
+    latencies = []
+    events = [0]
+
+    def handler(data, received_at):
+        latencies.append(time.time() - received_at)
+        events[0] += 1
+
+    task = asyncio.create_task(stream_account_data("benchmark", ["BENCH1"], echo=False, ws_url=server.account_url,
+                                                    handlers=[handler], bus=bus))
+    with contextlib.redirect_stdout(io.StringIO()):
+        elapsed, received, _, subscribers = await _measure_bus(
+            task, bus, server, latencies, events, duration, lambda: 0)
+    return {
+        "target_messages_per_second": rate,
+        "messages_received": received,
+        "messages_per_second": received / elapsed,
+        "latency": summarize(latencies),
+        "subscribers": subscribers
+    }
+
+
+async def bench_account_stream(duration, rate):
+    server = await MockServer(dxlink_port=0, account_port=0, rate=0, account_rate=rate).start()
+    latencies = []
+
+    def handler(data, received_at):
+        latencies.append(time.time() - received_at)
+
+    task = asyncio.create_task(
+        stream_account_data("benchmark", ["BENCH1"], echo=False, ws_url=server.account_url, handlers=[handler])
+    )
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await asyncio.sleep(0.3)
+            latencies.clear()
+            start = time.perf_counter()
+            await asyncio.sleep(duration)
+            elapsed = time.perf_counter() - start
+            received = len(latencies)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    finally:
+        await server.stop()
+
+    return {
+        "target_messages_per_second": rate,
+        "messages_received": received,
+        "messages_per_second": received / elapsed,
+        "latency": summarize(latencies)
+    }
+
+
+def _time_calls(func, iterations):
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def bench_rest(iterations, orders, delay):
+    server = MockRestServer(delay=delay, orders=orders).start()
+    original_base_url = client.base_url
+    client.base_url = server.url
+    account = "BENCH1"
+    try:
+        results = {
+            "balances": _time_calls(lambda: fetch_account_balances("benchmark", account), iterations),
+            "positions": _time_calls(lambda: fetch_account_positions("benchmark", account), iterations),
+            "live_orders": _time_calls(lambda: fetch_live_orders("benchmark", account), iterations),
+            # Same GET without the shared pool, for the cost of a fresh connection per request
+            "balances_unpooled": _time_calls(
+                lambda: requests.get(f"{server.url}/accounts/{account}/balances",
+                                     headers={"Authorization": "benchmark"}), iterations)
+        }
+        order_ids = list(range(1000, 1000 + orders))
+        cancel_results, elapsed = cancel_orders_concurrently("benchmark", account, order_ids)
+        results["cancel_all"] = {
+            "orders": orders,
+            "cancelled": sum(1 for result in cancel_results if result["ok"]),
+            "seconds": elapsed,
+            "orders_per_second": orders / elapsed if elapsed else None
+        }
+    finally:
+        client.base_url = original_base_url
+        server.stop()
+    return results
+
+
+def _flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(current, previous):
+    old = _flatten(previous.get("results", {}))
+    new = _flatten(current.get("results", {}))
+    print("\n=== Comparison with previous run ===")
+    for key in sorted(new):
+        if key in old and old[key]:
+            change = (new[key] - old[key]) / old[key] * 100
+            print(f"{key}: {old[key]:.2f} -> {new[key]:.2f} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark stream decode/dispatch and REST paths against local mocks.")
+    parser.add_argument("--duration", type=float, default=5, help="seconds per stream benchmark")
+    parser.add_argument("--rate", type=float, default=2000, help="FEED_DATA messages per second per channel")
+    parser.add_argument("--batch", type=int, default=10, help="events per FEED_DATA message")
+    parser.add_argument("--symbols", type=int, default=100, help="number of subscribed symbols")
+    parser.add_argument("--channels", type=int, default=1, help="FEED channels on the market connection")
+    parser.add_argument("--account-rate", type=float, default=500, help="account messages per second")
+    parser.add_argument("--decode-messages", type=int, default=50000)
+    parser.add_argument("--rest-iterations", type=int, default=200)
+    parser.add_argument("--rest-orders", type=int, default=100, help="orders for the cancel-all benchmark")
+    parser.add_argument("--rest-delay", type=float, default=0.0, help="simulated server latency in seconds")
+    parser.add_argument("--skip", default="",
+                        help="comma separated benchmarks to skip: decode,market,market_bus,account,account_bus,rest")
+    parser.add_argument("--output", default=None, help="write results to this JSON file")
+    parser.add_argument("--compare", default=None, help="previous results JSON to compare against")
+    args = parser.parse_args()
+
+    skip = set(filter(None, args.skip.split(",")))
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    results = {}
+
+    if "decode" not in skip:
+        print("Running decode benchmark...")
+        results["decode"] = bench_decode(args.decode_messages, args.batch, symbols)
+    if "market" not in skip:
+        print("Running market stream benchmark...")
+        results["market_stream"] = asyncio.run(
+            bench_market_stream(args.duration, args.rate, args.batch, symbols, args.channels))
+    if "market_bus" not in skip:
+        print("Running market stream benchmark through the event bus...")
+        results["market_stream_bus"] = asyncio.run(
+            bench_market_bus(args.duration, args.rate, args.batch, symbols, args.channels))
+    if "account" not in skip:
+        print("Running account stream benchmark...")
+        results["account_stream"] = asyncio.run(bench_account_stream(args.duration, args.account_rate))
+    if "account_bus" not in skip:
+        print("Running account stream benchmark through the event bus...")
+        results["account_stream_bus"] = asyncio.run(bench_account_bus(args.duration, args.account_rate))
+    if "rest" not in skip:
+        print("Running REST benchmark...")
+        results["rest"] = bench_rest(args.rest_iterations, args.rest_orders, args.rest_delay)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": sys.version.split()[0],
+            "json_backend": codec.BACKEND,
+            "platform": platform.platform(),
+            "params": vars(args)
+        },
+        "results": results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"Results written to {args.output}")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
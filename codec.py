@@ -0,0 +1,87 @@
+# codec.py
+"""
+JSON encoding/decoding for the stream and REST hot paths.
+
+Uses orjson if it is installed, then ujson, then the standard library. dumps() always returns
+str so results can be sent as websocket text frames. message_type() reads the top-level
+"type" of a raw message without decoding it, so receivers can drop message types nobody
+is interested in before paying for a full parse.
+"""
+import json
+
+try:
+    import orjson
+
+    BACKEND = "orjson"
+
+    def loads(data):
+        return orjson.loads(data)
+
+    def dumps(obj):
+        return orjson.dumps(obj).decode()
+
+except ImportError:
+    try:
+        import ujson
+
+        BACKEND = "ujson"
+
+        def loads(data):
+            return ujson.loads(data)
+
+        def dumps(obj):
+            return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+
+    except ImportError:
+        BACKEND = "json"
+
+        _decoder = json.JSONDecoder()
+        _encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+        def loads(data):
+            if isinstance(data, (bytes, bytearray)):
+                data = data.decode()
+            return _decoder.decode(data)
+
+        def dumps(obj):
+            return _encoder.encode(obj)
+
+
+def loads_response(response):
+    """
+    Decode the body of a requests Response. A body that isn't valid JSON raises
+    requests.exceptions.JSONDecodeError, as response.json() does, so callers handling
+    RequestException keep handling it whichever backend is in use.
+    """
+    try:
+        return loads(response.content)
+    except Exception as e:
+        import requests
+        raise requests.exceptions.JSONDecodeError(getattr(e, "msg", str(e)), response.text, getattr(e, "pos", 0),
+                                                  response=response)
+
+
+def message_type(raw):
+    """
+    Value of the first "type" key in a raw JSON message (str or bytes), without decoding it.
+    For DXLink and account-streamer messages that is the top-level type. Returns None if
+    there is no "type" key.
+    """
+    if isinstance(raw, str):
+        key, quote, colon, space = '"type"', '"', ":", " "
+    else:
+        key, quote, colon, space = b'"type"', b'"', b":", b" "
+    start = raw.find(key)
+    if start < 0:
+        return None
+    i = start + len(key)
+    length = len(raw)
+    while i < length and raw[i:i + 1] in (colon, space):
+        i += 1
+    if raw[i:i + 1] != quote:
+        return None
+    end = raw.find(quote, i + 1)
+    if end < 0:
+        return None
+    value = raw[i + 1:end]
+    return value if isinstance(value, str) else value.decode()
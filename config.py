@@ -6,8 +6,90 @@ BASE_URL = "https://api.cert.tastyworks.com"
 SESSION_URL = f"{BASE_URL}/sessions"
 API_QUOTE_TOKEN_URL = f"{BASE_URL}/api-quote-tokens"
 
+# Shared HTTP client (http_client.py)
+HTTP_TIMEOUT = (3.05, 10)  # (connect, read) timeout in seconds for every REST call
+HTTP_POOL_SIZE = 20  # keep-alive connections held open to the API
+
+# Bulk cancellation (orders.cancel_all_orders)
+CANCEL_MAX_WORKERS = 10  # concurrent DELETE requests; keep <= HTTP_POOL_SIZE
+CANCEL_MAX_RETRIES = 3  # retries per order for connection errors, 429 and 5xx
+CANCEL_RETRY_BACKOFF = 0.25  # base backoff in seconds, doubled on each retry
+
+# Order chasing (orders.chase_order): re-price a working order against the live quote until it fills
+CHASE_INTERVAL = 1.0  # seconds between re-pricing checks
+CHASE_MAX_REPLACES = 20  # give up after this many replacements
+CHASE_TARGET = "mid"  # "join" (bid for buys, ask for sells), "mid" or "cross" (ask for buys, bid for sells)
+CHASE_QUOTE_WAIT = 5  # intervals without a usable quote before the chase gives up
+
+# Batch order submission from a file (batch_orders.py)
+BATCH_SUBMIT_MAX_WORKERS = 5  # concurrent order POSTs
+BATCH_SUBMIT_RATE = 10  # orders started per second; None for no limit
+
+# Instrument metadata cache (instruments.py): symbol existence, tick sizes, crypto precision
+INSTRUMENT_CACHE_FILE = ".tt_instruments.json"  # set to None to keep it in memory only
+INSTRUMENT_CACHE_TTL = 24 * 60 * 60  # seconds before an instrument is fetched again
+INSTRUMENT_NEGATIVE_TTL = 10 * 60  # how long an unknown symbol is remembered
+
+# Session cache: tokens are reused across menu actions and, if the file is set, across runs
+SESSION_CACHE_FILE = ".tt_session.json"  # set to None to keep tokens in memory only
+SESSION_REFRESH_MARGIN = 300  # seconds before expiry to refresh tokens in the background
+SESSION_DEFAULT_TTL = 24 * 60 * 60  # used when the API doesn't report a session expiration
+QUOTE_TOKEN_TTL = 24 * 60 * 60  # API quote tokens are valid for 24 hours
+
+# Streaming endpoints. Point these at mock_server.py (ws://127.0.0.1:8765 / ws://127.0.0.1:8766)
+# to run the streams offline.
+DXLINK_URL = None  # None uses the dxlink-url returned with the API quote token
+ACCOUNT_STREAMER_URL = "wss://streamer.cert.tastyworks.com"
+
 ACCOUNT_NUMBER = "5WW84942"
 ACCOUNT_NUMBERS = [ACCOUNT_NUMBER]
+ACCOUNT_FETCH_MAX_WORKERS = 12  # concurrent REST calls for the all-accounts overview (3 per account)
+
+# Market stream reconnects (market_stream.py): jittered exponential backoff
+RECONNECT_BACKOFF_BASE = 0.5  # seconds before the first retry (upper bound of the jitter)
+RECONNECT_BACKOFF_MAX = 30  # cap on the backoff between attempts
+RECONNECT_MAX_ATTEMPTS = None  # consecutive failed attempts before giving up; None retries forever
+
+# Largest number of (symbol, event type) entries sent in one FEED_SUBSCRIPTION message
+FEED_SUBSCRIPTION_BATCH_SIZE = 500
+
+# Sharding large symbol universes (market_stream.ShardedMarketStream)
+SHARD_CONNECTIONS = 1  # DXLink websocket connections; > 1 enables sharding
+SHARD_CHANNELS_PER_CONNECTION = 1  # FEED channels opened on each connection
+
+# Tick recorder (tick_recorder.py): append decoded Trade/Quote events to daily binary files
+TICK_RECORDING = False
+TICK_RECORD_DIR = "ticks"
+
+# Bar building (bars.py): OHLCV + VWAP bars per symbol from streamed Trade events; needs numpy
+BAR_BUILDING = False  # off by default: every symbol that trades costs ~192 KB with the settings below
+BAR_TIMEFRAMES = (1, 60, 300)  # bar lengths in seconds
+# Closed bars kept per symbol and timeframe. Each ring holds 2 x BAR_HISTORY rows of 8 float64
+# fields, so a symbol costs len(BAR_TIMEFRAMES) x 8 x 2 x BAR_HISTORY x 8 bytes (~1 GB for 5k symbols)
+BAR_HISTORY = 500
+
+# Event bus between stream receivers and consumers (event_bus.py)
+EVENT_QUEUE_SIZE = 10000  # default bound of each subscriber's queue
+EVENT_QUEUE_POLICY = "drop_oldest"  # default overflow policy: block, drop_oldest or conflate
+
+# Per-symbol conflation (conflation.py): consumers get the latest Quote/Trade per symbol per interval
+CONFLATION_INTERVAL = 0.25  # seconds between snapshots
+CONFLATION_MAX_KEYS = 100000  # (event type, symbol) pairs held at once
+ECHO_CONFLATE = True  # echo market data as conflated snapshots instead of one line per event
+
+# Live dashboard (dashboard.py) shown after connecting with menu options 1 and 2
+DASHBOARD_ON_CONNECT = "ask"  # True opens it, False never does, "ask" asks each time
+DASHBOARD_FPS = 4  # maximum redraws per second
+
+# Seconds to wait for the account stream to connect before seeding balances/positions over REST
+ACCOUNT_CONNECT_TIMEOUT = 10
+
+# Daemon mode (daemon.py / ttctl.py)
+DAEMON_SOCKET = ".tt_daemon.sock"  # Unix socket the daemon listens on
+DAEMON_QUOTE_WAIT = 2.0  # seconds "quote" waits for the first quote of a newly subscribed symbol
+
+# Print every stream message while streams run in the background (runtime.py)
+STREAM_ECHO = False
 
 # NEW: Default market symbols
 MARKET_DATA_SYMBOLS = [
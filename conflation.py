@@ -0,0 +1,71 @@
+# conflation.py
+import time
+import asyncio
+from config import CONFLATION_INTERVAL, CONFLATION_MAX_KEYS
+from event_bus import CONFLATE
+
+CONFLATED_EVENT_TYPES = ("Quote", "Trade")
+
+
+class Conflator:
+    """
+    Keeps only the latest event per (event type, symbol) and hands consumers a coalesced
+    snapshot every interval seconds.
+
+    Built on a conflate-policy bus subscription: an update to a key that is already pending
+    overwrites it in place and is only counted, so memory is bounded by the number of symbols
+    and the cost per update is one dict write, whatever the incoming rate.
+
+        conflator = Conflator(event_bus, interval=0.25)
+        async for snapshot, skipped in conflator:
+            ...  # snapshot: {(event_type, symbol): event}; skipped: updates coalesced away
+    """
+
+    def __init__(self, bus, event_types=CONFLATED_EVENT_TYPES, symbols=None, interval=CONFLATION_INTERVAL,
+                 name="conflator"):
+        self.bus = bus
+        self.interval = interval
+        self.subscription = bus.subscribe(event_types=event_types, symbols=symbols, maxsize=CONFLATION_MAX_KEYS,
+                                          policy=CONFLATE, name=name)
+        self.snapshots = 0
+        self._conflated_seen = 0
+
+    def take(self):
+        """
+        Pending events right now as ({(event_type, symbol): event}, skipped), where skipped is the
+        number of intermediate updates coalesced since the last take().
+        """
+        subscription = self.subscription
+        snapshot = {}
+        for event in subscription.drain():
+            snapshot[(event.eventType, event.eventSymbol)] = event
+        skipped = subscription.conflated - self._conflated_seen
+        self._conflated_seen = subscription.conflated
+        self.snapshots += 1
+        return snapshot, skipped
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        next_at = time.monotonic()
+        while True:
+            next_at += self.interval
+            await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+            snapshot, skipped = self.take()
+            if snapshot:
+                yield snapshot, skipped
+
+    def close(self):
+        self.bus.unsubscribe(self.subscription)
+
+    def stats(self):
+        subscription = self.subscription
+        return {
+            "interval": self.interval,
+            "snapshots": self.snapshots,
+            "pending_symbols": len(subscription),
+            "delivered": subscription.delivered,
+            "conflated": subscription.conflated,
+            "coalesce_ratio": subscription.published / subscription.delivered if subscription.delivered else None
+        }
@@ -0,0 +1,323 @@
+# daemon.py
+"""
+Headless process that keeps the session, market/account streams, quote cache and account
+state warm, and answers requests from ttctl.py over a Unix socket.
+
+    python daemon.py            # log in, connect the streams, serve until Ctrl+C
+    python ttctl.py quote SPY   # from another shell
+
+Protocol: one JSON object per line each way. Requests are {"cmd": "...", "args": [...]};
+replies are {"ok": true, "result": ...} or {"ok": false, "error": "..."}.
+Unix-only (asyncio Unix sockets).
+"""
+import os
+import time
+import socket
+import asyncio
+import threading
+import codec
+from config import (
+    USERNAME,
+    PASSWORD,
+    ACCOUNT_NUMBER,
+    ACCOUNT_NUMBERS,
+    MARKET_DATA_SYMBOLS,
+    DXLINK_URL,
+    ACCOUNT_STREAMER_URL,
+    DAEMON_SOCKET,
+    DAEMON_QUOTE_WAIT,
+    ACCOUNT_CONNECT_TIMEOUT,
+    BAR_BUILDING
+)
+from session import SessionManager
+from http_client import client
+from runtime import runtime, MARKET_STREAM, ACCOUNT_STREAM
+from quote_cache import quote_cache
+from account_state import account_store
+from rest_stats import rest_stats
+from event_bus import event_bus
+from orders import get_live_orders, cancel_orders_concurrently, replace_order
+from order_tracker import order_tracker
+from bars import BarBuilder, BAR_FIELDS, timeframe_label
+import market_stream
+
+
+class TradingDaemon:
+    """
+    Owns one SessionManager and the shared runtime's streams for its whole lifetime and
+    serves commands on socket_path. Handlers run on the runtime loop; anything that makes a
+    REST call is moved to a worker thread so the streams keep flowing.
+    """
+
+    def __init__(self, socket_path=DAEMON_SOCKET, symbols=None, account_numbers=None, session_manager=None,
+                 dxlink_url=DXLINK_URL, account_streamer_url=ACCOUNT_STREAMER_URL):
+        self.socket_path = socket_path
+        self.symbols = list(MARKET_DATA_SYMBOLS if symbols is None else symbols)
+        self.account_numbers = list(ACCOUNT_NUMBERS if account_numbers is None else account_numbers)
+        self.session_manager = session_manager
+        self.dxlink_url = dxlink_url
+        self.account_streamer_url = account_streamer_url
+        self.started_at = None
+        self.requests = 0
+        self.bar_builder = None
+        self._server = None
+        self._stopped = threading.Event()
+        self.commands = {
+            "ping": self.cmd_ping,
+            "status": self.cmd_status,
+            "quote": self.cmd_quote,
+            "balances": self.cmd_balances,
+            "positions": self.cmd_positions,
+            "orders": self.cmd_orders,
+            "cancel-all": self.cmd_cancel_all,
+            "replace": self.cmd_replace,
+            "subscribe": self.cmd_subscribe,
+            "unsubscribe": self.cmd_unsubscribe,
+            "rest-stats": self.cmd_rest_stats,
+            "order-stats": self.cmd_order_stats,
+            "bars": self.cmd_bars,
+            "shutdown": self.cmd_shutdown
+        }
+
+    # --- lifecycle -------------------------------------------------------------
+
+    def start(self, streams=True):
+        # Before logging in, so a second daemon gives up without touching the first one's session
+        self._claim_socket()
+        if self.session_manager is None:
+            self.session_manager = SessionManager(USERNAME, PASSWORD)
+            self.session_manager.start_background_refresh()
+            client.set_unauthorized_handler(self.session_manager.handle_unauthorized)
+        runtime.start()
+        if streams:
+            self._start_streams()
+        runtime.run(self._start_server())
+        self.started_at = time.time()
+        print(f"Daemon listening on {self.socket_path}")
+
+    def _fresh_quote_token(self):
+        api_quote_token, dxlink_url = self.session_manager.get_quote_token(force_refresh=True)
+        return api_quote_token, self.dxlink_url or dxlink_url
+
+    def _start_streams(self):
+        if BAR_BUILDING:
+            try:
+                self.bar_builder = BarBuilder()
+            except Exception as e:
+                print(f"Bar building disabled: {e}")
+        api_quote_token, dxlink_url = self.session_manager.get_quote_token()
+        runtime.start_market_stream(self.dxlink_url or dxlink_url, api_quote_token, self.symbols, echo=False,
+                                    token_provider=self._fresh_quote_token,
+                                    handlers=[self.bar_builder.on_events] if self.bar_builder is not None else None)
+        session_token = self.session_manager.get_session_token()
+        connected = threading.Event()
+        runtime.start_account_stream(session_token, self.account_numbers, echo=False,
+                                     handlers=[account_store.handle_message, order_tracker.handle_message],
+                                     ws_url=self.account_streamer_url, connected=connected)
+        # Seed only once the subscription is live (see main.py)
+        if not runtime.wait_until(ACCOUNT_STREAM, connected, ACCOUNT_CONNECT_TIMEOUT):
+            if runtime.is_running(ACCOUNT_STREAM):
+                print("Account stream hasn't connected yet; balances may miss updates until it does.")
+            else:
+                print("Account stream failed to connect; balances and positions come from REST only.")
+        for account_number in self.account_numbers:
+            try:
+                account_store.seed(session_token, account_number)
+            except Exception as e:
+                print(e)
+
+    def _claim_socket(self):
+        """Remove a socket file left behind by a daemon that didn't exit cleanly; refuse if one still answers."""
+        if not os.path.exists(self.socket_path):
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(self.socket_path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.remove(self.socket_path)
+                return
+        raise Exception(f"A daemon is already listening on {self.socket_path}; stop it first (ttctl.py shutdown).")
+
+    async def _start_server(self):
+        # Anyone who can connect can trade on this session, so the socket must never be
+        # reachable by other users, not even between bind() and a chmod
+        old_umask = os.umask(0o177)
+        try:
+            self._server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path)
+        finally:
+            os.umask(old_umask)
+
+    def serve_forever(self):
+        try:
+            while not self._stopped.wait(1):
+                pass
+        except KeyboardInterrupt:
+            print("\nStopping daemon.")
+        finally:
+            self.stop()
+
+    def stop(self):
+        if self._server is not None:
+            server, self._server = self._server, None
+
+            async def close():
+                server.close()
+                await server.wait_closed()
+            runtime.run(close())
+        runtime.shutdown()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        if self.session_manager is not None and hasattr(self.session_manager, "stop_background_refresh"):
+            self.session_manager.stop_background_refresh()
+        self._stopped.set()
+
+    # --- protocol --------------------------------------------------------------
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = await self.dispatch(line)
+                writer.write(codec.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, line):
+        self.requests += 1
+        try:
+            request = codec.loads(line)
+            handler = self.commands.get(request.get("cmd"))
+            if handler is None:
+                raise Exception(f"Unknown command {request.get('cmd')!r}; try: {', '.join(self.commands)}")
+            return {"ok": True, "result": await handler(*request.get("args", []))}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    # --- commands ----------------------------------------------------------------
+
+    def _account(self, account_number):
+        return account_number or ACCOUNT_NUMBER
+
+    async def cmd_ping(self):
+        return "pong"
+
+    async def cmd_status(self):
+        stream = market_stream.active_stream
+        status = runtime.status()
+        return {
+            "uptime": time.time() - self.started_at if self.started_at else 0.0,
+            "requests": self.requests,
+            "market": status.get(MARKET_STREAM, "not started"),
+            "account": status.get(ACCOUNT_STREAM, "not started"),
+            "symbols": sorted(stream.subscriptions) if stream is not None else [],
+            "bus": event_bus.stats()
+        }
+
+    async def cmd_quote(self, *symbols):
+        if not symbols:
+            raise Exception("Usage: quote SYMBOL [SYMBOL ...]")
+        stream = market_stream.active_stream
+        missing = [symbol for symbol in symbols if quote_cache.resolve(symbol) is None]
+        if missing and stream is not None and runtime.is_running(MARKET_STREAM):
+            # Subscribe on demand and give the first quote a moment to arrive
+            await stream.subscribe(missing)
+            deadline = time.monotonic() + DAEMON_QUOTE_WAIT
+            while time.monotonic() < deadline and any(quote_cache.resolve(s) is None for s in missing):
+                await asyncio.sleep(0.02)
+        return {symbol: quote_cache.get(symbol) for symbol in symbols}
+
+    async def _ensure_account(self, account_number):
+        if not (account_store.is_seeded(account_number) and runtime.is_running(ACCOUNT_STREAM)):
+            await asyncio.to_thread(
+                lambda: account_store.seed(self.session_manager.get_session_token(), account_number))
+
+    async def cmd_balances(self, account_number=None):
+        account_number = self._account(account_number)
+        await self._ensure_account(account_number)
+        return account_store.balances(account_number)
+
+    async def cmd_positions(self, account_number=None):
+        account_number = self._account(account_number)
+        await self._ensure_account(account_number)
+        positions = account_store.positions(account_number)
+        for position in positions:
+            position["mark"] = quote_cache.get_mark(position.get("symbol"))
+        return positions
+
+    async def cmd_orders(self, account_number=None):
+        account_number = self._account(account_number)
+        return await asyncio.to_thread(
+            lambda: get_live_orders(self.session_manager.get_session_token(), account_number))
+
+    async def cmd_cancel_all(self, account_number=None):
+        account_number = self._account(account_number)
+
+        def cancel_all():
+            session_token = self.session_manager.get_session_token()
+            order_ids = [order.get("id") for order in get_live_orders(session_token, account_number)]
+            return cancel_orders_concurrently(session_token, account_number, order_ids)
+
+        results, elapsed = await asyncio.to_thread(cancel_all)
+        return {"results": results, "elapsed": elapsed}
+
+    async def cmd_replace(self, order_id=None, price=None, quantity=None, account_number=None):
+        if order_id is None or (price is None and quantity is None):
+            raise Exception("Usage: replace ORDER_ID PRICE [QUANTITY [ACCOUNT]]")
+        account_number = self._account(account_number)
+        replacement, notes = await asyncio.to_thread(
+            lambda: replace_order(self.session_manager.get_session_token(), account_number, order_id,
+                                  price=price if price not in (None, "-") else None, quantity=quantity))
+        return {"order": replacement, "notes": notes}
+
+    async def cmd_subscribe(self, *symbols):
+        stream = market_stream.active_stream
+        if stream is None or not runtime.is_running(MARKET_STREAM):
+            raise Exception("Market data stream is not running.")
+        return await stream.subscribe(list(symbols))
+
+    async def cmd_unsubscribe(self, *symbols):
+        stream = market_stream.active_stream
+        if stream is None or not runtime.is_running(MARKET_STREAM):
+            raise Exception("Market data stream is not running.")
+        return await stream.unsubscribe(list(symbols))
+
+    async def cmd_rest_stats(self):
+        return rest_stats.snapshot()
+
+    async def cmd_order_stats(self):
+        return {"latency": order_tracker.stats(), "orders": [order.as_dict() for order in order_tracker.orders()]}
+
+    async def cmd_bars(self, symbol=None, timeframe="1m", count=20):
+        if symbol is None:
+            raise Exception("Usage: bars SYMBOL [TIMEFRAME [COUNT]]")
+        if self.bar_builder is None:
+            raise Exception("Bar building is not running.")
+        timeframes = {timeframe_label(seconds): seconds for seconds in self.bar_builder.timeframes}
+        if timeframe not in timeframes:
+            raise Exception(f"Unknown timeframe {timeframe!r}; try: {', '.join(timeframes)}")
+        bars = self.bar_builder.bars(symbol, timeframes[timeframe], int(count))
+        if bars is None:
+            raise Exception(f"No bars for {symbol}.")
+        rows = [dict(zip(BAR_FIELDS, values)) for values in zip(*(bars[name].tolist() for name in BAR_FIELDS))]
+        current = self.bar_builder.current(symbol, timeframes[timeframe])
+        return {"symbol": symbol, "timeframe": timeframe, "bars": rows, "current": current}
+
+    async def cmd_shutdown(self):
+        # Reply first; stop from another thread since stop() waits on this loop
+        threading.Timer(0.1, self.stop).start()
+        return "stopping"
+
+
+def main():
+    daemon = TradingDaemon()
+    daemon.start()
+    daemon.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
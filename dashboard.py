@@ -0,0 +1,220 @@
+# dashboard.py
+import os
+import sys
+import time
+from config import DASHBOARD_FPS, ACCOUNT_NUMBERS
+from quote_cache import quote_cache
+from account_state import account_store
+from conflation import Conflator
+from event_bus import event_bus
+import market_stream
+
+SYMBOL_COLUMNS = (("Symbol", 22), ("Bid", 12), ("Ask", 12), ("Last", 12), ("Volume", 14), ("Age", 8))
+BALANCE_COLUMNS = (("Account", 12), ("Net Liq", 16), ("Cash", 16), ("Equity BP", 16), ("Updates", 9), ("Age", 8))
+
+
+def _fmt(value, digits=2):
+    if value is None or value != value:
+        return "-"
+    return f"{value:,.{digits}f}"
+
+
+def _age(timestamp, now):
+    if not timestamp:
+        return "-"
+    age = now - timestamp
+    return f"{age:.1f}s" if age < 60 else f"{age / 60:.0f}m"
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _wait_for_enter(timeout):
+    """
+    Wait up to timeout seconds for the user to press Enter; returns True if they did. Polls
+    instead of blocking in input(), so nothing is left reading stdin once the dashboard closes.
+    """
+    if os.name == "nt":
+        import msvcrt
+        deadline = time.monotonic() + timeout
+        while True:
+            while msvcrt.kbhit():
+                if msvcrt.getwch() in ("\r", "\n"):
+                    return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(0.05, remaining))
+    import select
+    readable, _, _ = select.select([sys.stdin], [], [], timeout)
+    if readable:
+        sys.stdin.readline()
+        return True
+    return False
+
+
+def _stream_totals(stats):
+    channels = []
+    for shard in stats.get("shards", [{"channels": stats.get("channels", [])}]):
+        channels += shard["channels"]
+    return sum(c["messages"] for c in channels), sum(c["events"] for c in channels)
+
+
+class Dashboard:
+    """
+    Full-screen live table of the streamed symbols and account balances, redrawn at most fps
+    times per second no matter how fast data arrives.
+
+    Each frame is laid out as (row, column) -> text cells and compared with the previous
+    frame; only cells whose text changed are rewritten, with ANSI cursor moves, in a single
+    write. The header shows message/event rates and the lag between a message being received
+    and the dashboard picking it up. Needs a terminal that understands ANSI escapes.
+    """
+
+    def __init__(self, runtime, fps=DASHBOARD_FPS, account_numbers=ACCOUNT_NUMBERS, out=None):
+        self.runtime = runtime
+        self.interval = 1.0 / max(1, fps)
+        self.account_numbers = list(account_numbers)
+        self.out = out or sys.stdout
+        self._cells = {}
+        self._layout = None
+        self._rate_mark = None
+        self._updates_mark = None
+        self._conflator = None
+        self.frames = 0
+
+    # --- frame building --------------------------------------------------------
+
+    def _rates(self, now):
+        """(messages/s, events/s, account updates/s) since the previous frame."""
+        stream = market_stream.active_stream
+        messages, events = _stream_totals(stream.stats()) if stream is not None else (0, 0)
+        updates = sum((account_store.stats(a) or {}).get("updates", 0) for a in self.account_numbers)
+        rates = (0.0, 0.0, 0.0)
+        if self._rate_mark is not None:
+            then, old_messages, old_events, old_updates = self._rate_mark
+            elapsed = max(now - then, 1e-9)
+            rates = ((messages - old_messages) / elapsed, (events - old_events) / elapsed,
+                     (updates - old_updates) / elapsed)
+        self._rate_mark = (now, messages, events, updates)
+        return rates
+
+    def _build(self, changed, skipped):
+        now = time.time()
+        status = self.runtime.status()
+        msg_rate, event_rate, account_rate = self._rates(time.monotonic())
+        lag = self._conflator.subscription.last_lag * 1000 if self._conflator is not None else 0.0
+
+        rows = [
+            f"TastyTrade Live  {time.strftime('%H:%M:%S')}",
+            f"Market: {status.get('market', 'not started'):<10} {msg_rate:8.1f} msg/s {event_rate:9.1f} ev/s"
+            f"  lag {lag:6.1f} ms  conflated {skipped:6d}/frame",
+            f"Account: {status.get('account', 'not started'):<9} {account_rate:8.1f} upd/s",
+            ""
+        ]
+        cells = {}
+        for row, text in enumerate(rows):
+            cells[(row, 0)] = text
+
+        row = len(rows)
+        column = 0
+        for title, width in SYMBOL_COLUMNS:
+            cells[(row, column)] = f"{title:<{width}}"
+            column += width
+        stream = market_stream.active_stream
+        symbols = sorted(stream.subscriptions) if stream is not None else quote_cache.symbols()
+        for symbol in symbols:
+            row += 1
+            snapshot = quote_cache.get(symbol) or {}
+            updated = max(snapshot.get("quoteTime") or 0, snapshot.get("tradeTime") or 0)
+            marker = "*" if symbol in changed else " "
+            values = (f"{marker}{symbol}", _fmt(snapshot.get("bidPrice")), _fmt(snapshot.get("askPrice")),
+                      _fmt(snapshot.get("price")), _fmt(snapshot.get("dayVolume"), 0), _age(updated, now))
+            column = 0
+            for (title, width), value in zip(SYMBOL_COLUMNS, values):
+                cells[(row, column)] = f"{value:<{width}}" if column == 0 else f"{value:>{width - 1}} "
+                column += width
+
+        row += 2
+        column = 0
+        for title, width in BALANCE_COLUMNS:
+            cells[(row, column)] = f"{title:<{width}}"
+            column += width
+        for account_number in self.account_numbers:
+            row += 1
+            balances = account_store.balances(account_number) or {}
+            stats = account_store.stats(account_number) or {}
+            values = (account_number, _fmt(_number(balances.get("net-liquidating-value"))),
+                      _fmt(_number(balances.get("cash-balance"))), _fmt(_number(balances.get("equity-buying-power"))),
+                      str(stats.get("updates", 0)), _age(stats.get("updated_at"), now))
+            column = 0
+            for (title, width), value in zip(BALANCE_COLUMNS, values):
+                cells[(row, column)] = f"{value:<{width}}" if column == 0 else f"{value:>{width - 1}} "
+                column += width
+
+        row += 2
+        cells[(row, 0)] = f"Press Enter to return to the menu.  frame {self.frames}"
+        return cells, (len(symbols), len(self.account_numbers))
+
+    # --- drawing -----------------------------------------------------------------
+
+    def _draw(self, cells, layout):
+        parts = []
+        if layout != self._layout:
+            # Rows moved: start from a clean screen
+            parts.append("\x1b[2J")
+            self._cells = {}
+            self._layout = layout
+        for (row, column), text in cells.items():
+            previous = self._cells.get((row, column))
+            if previous == text:
+                continue
+            # Pad with spaces so a shorter value fully covers the old one
+            if previous is not None and len(previous) > len(text):
+                text_out = text + " " * (len(previous) - len(text))
+            else:
+                text_out = text
+            parts.append(f"\x1b[{row + 1};{column + 1}H{text_out}")
+        self._cells = cells
+        if parts:
+            parts.append(f"\x1b[{max(row for row, _ in cells) + 2};1H")
+            self.out.write("".join(parts))
+            self.out.flush()
+
+    def frame(self):
+        """Build and draw one frame."""
+        changed, skipped = set(), 0
+        if self._conflator is not None:
+            snapshot, skipped = self.runtime.call(self._conflator.take)
+            changed = {symbol for _, symbol in snapshot}
+        cells, layout = self._build(changed, skipped)
+        self._draw(cells, layout)
+        self.frames += 1
+
+    def run(self):
+        """Show the dashboard until the user presses Enter."""
+        if os.name == "nt":
+            os.system("")  # enable ANSI escape handling in the Windows console
+        # The conflator lives on the runtime loop, where the bus is published to
+        self._conflator = self.runtime.call(lambda: Conflator(event_bus, name="dashboard"))
+        self.out.write("\x1b[?25l")  # hide the cursor
+        try:
+            while True:
+                started = time.monotonic()
+                self.frame()
+                if _wait_for_enter(max(0.0, self.interval - (time.monotonic() - started))):
+                    break
+        finally:
+            self.runtime.call(self._conflator.close)
+            self._conflator = None
+            self._layout = None
+            self.out.write("\x1b[?25h\x1b[2J\x1b[H")
+            self.out.flush()
+
+
+def show_dashboard(runtime, fps=DASHBOARD_FPS):
+    Dashboard(runtime, fps).run()
@@ -0,0 +1,300 @@
+# event_bus.py
+import time
+import asyncio
+from collections import deque
+from config import EVENT_QUEUE_SIZE, EVENT_QUEUE_POLICY
+
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+CONFLATE = "conflate"
+POLICIES = (BLOCK, DROP_OLDEST, CONFLATE)
+
+
+class Subscription:
+    """
+    One consumer's bounded queue on an EventBus. Read it with `await get()`, `async for`, or
+    drain() for everything queued right now. What happens when the queue is full depends on policy:
+
+    - block: the publisher waits for room. Nothing is lost, but a slow consumer slows the receiver.
+    - drop_oldest: the oldest queued item is discarded to make room.
+    - conflate: only the newest item per (event type, symbol) is kept. An update for a key that is
+      already queued replaces it in place; a new key on a full queue drops the oldest key.
+
+    Counters: delivered, dropped, conflated, max_depth, and lag (publish to get(), in seconds).
+    """
+
+    def __init__(self, event_types=None, symbols=None, maxsize=EVENT_QUEUE_SIZE, policy=EVENT_QUEUE_POLICY, name=None):
+        if policy not in POLICIES:
+            raise Exception(f"Unknown overflow policy {policy!r}; expected one of: {', '.join(POLICIES)}")
+        self.event_types = set(event_types) if event_types else None
+        self.symbols = set(symbols) if symbols else None
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.name = name or policy
+        # conflate keeps (event type, symbol) -> entry in arrival order; the others a plain deque
+        self._queue = {} if policy == CONFLATE else deque()
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.blocked = 0
+        self.max_depth = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._lag_total = 0.0
+
+    def __len__(self):
+        return len(self._queue)
+
+    def matches(self, event_type, symbol):
+        return (self.event_types is None or event_type in self.event_types) and \
+               (self.symbols is None or symbol in self.symbols)
+
+    def offer(self, event_type, symbol, item, published_at):
+        """Queue item without waiting. Returns False only for a full block-policy queue."""
+        queue = self._queue
+        if self.policy == CONFLATE:
+            key = (event_type, symbol)
+            if key in queue:
+                # Keep the original slot (and its publish time, so lag shows how stale the key is)
+                queue[key] = (queue[key][0], item)
+                self.conflated += 1
+                self.published += 1
+                return True
+            if len(queue) >= self.maxsize:
+                del queue[next(iter(queue))]
+                self.dropped += 1
+            queue[key] = (published_at, item)
+        else:
+            if len(queue) >= self.maxsize:
+                if self.policy == BLOCK:
+                    self._space.clear()
+                    return False
+                queue.popleft()
+                self.dropped += 1
+            queue.append((published_at, item))
+        self.published += 1
+        if len(queue) > self.max_depth:
+            self.max_depth = len(queue)
+        self._ready.set()
+        return True
+
+    async def put(self, event_type, symbol, item, published_at):
+        """Queue item, waiting for room if the queue is full (block policy)."""
+        while not self.offer(event_type, symbol, item, published_at):
+            self.blocked += 1
+            await self._space.wait()
+
+    def _pop(self):
+        return self._pop_entry()[1]
+
+    def _pop_entry(self):
+        if self.policy == CONFLATE:
+            key = next(iter(self._queue))
+            published_at, item = self._queue.pop(key)
+        else:
+            published_at, item = self._queue.popleft()
+        lag = time.time() - published_at
+        self.last_lag = lag
+        self._lag_total += lag
+        if lag > self.max_lag:
+            self.max_lag = lag
+        self.delivered += 1
+        if not self._queue:
+            self._ready.clear()
+        self._space.set()
+        return published_at, item
+
+    async def get(self):
+        while not self._queue:
+            await self._ready.wait()
+        return self._pop()
+
+    def get_nowait(self):
+        if not self._queue:
+            raise asyncio.QueueEmpty()
+        return self._pop()
+
+    def drain(self, max_items=None):
+        """Everything queued right now (up to max_items), oldest first."""
+        items = []
+        while self._queue and (max_items is None or len(items) < max_items):
+            items.append(self._pop())
+        return items
+
+    async def get_batch(self, max_items=None):
+        """
+        Wait for at least one item, then take everything queued (up to max_items) as
+        [(published_at, item)], oldest first.
+        """
+        while not self._queue:
+            await self._ready.wait()
+        entries = []
+        while self._queue and (max_items is None or len(entries) < max_items):
+            entries.append(self._pop_entry())
+        return entries
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.get()
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "policy": self.policy,
+            "depth": len(self._queue),
+            "maxsize": self.maxsize,
+            "max_depth": self.max_depth,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "conflated": self.conflated,
+            "blocked": self.blocked,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+            "mean_lag": self._lag_total / self.delivered if self.delivered else 0.0
+        }
+
+
+class EventBus:
+    """
+    Publish/subscribe between the stream receive loops and whatever consumes their events.
+
+    Receivers publish (event type, symbol, item) entries; each matching subscriber gets them in
+    its own bounded queue, so a slow consumer only ever affects itself (or, with the block
+    policy, explicitly pushes back on the receiver). Must be used from the event loop the
+    streams run on; subscribe()/unsubscribe() may be called from any thread.
+    """
+
+    def __init__(self):
+        self._subscriptions = ()
+
+    def subscribe(self, event_types=None, symbols=None, maxsize=EVENT_QUEUE_SIZE, policy=EVENT_QUEUE_POLICY,
+                  name=None):
+        """
+        :param event_types: Event types to receive ("Quote", "Trade", "AccountBalance", ...); None for all.
+        :param symbols: Symbols (or account numbers for account messages) to receive; None for all.
+        :param policy: block, drop_oldest or conflate - see Subscription.
+        """
+        subscription = Subscription(event_types, symbols, maxsize, policy, name)
+        # Replace rather than mutate so publishers iterating the old tuple are unaffected
+        self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+
+    def subscriptions(self):
+        return list(self._subscriptions)
+
+    def has_subscribers(self):
+        """False while nobody is subscribed, so publishers can skip building entries at all."""
+        return bool(self._subscriptions)
+
+    async def publish(self, entries, published_at=None):
+        """
+        Deliver (event_type, symbol, item) entries to every matching subscription. Returns
+        without waiting unless a block-policy subscriber is full; its items (and every later
+        item for it) are then delivered in order once it has room.
+        """
+        subscriptions = self._subscriptions
+        if not subscriptions:
+            return
+        if published_at is None:
+            published_at = time.time()
+        pending = []
+        blocked = set()
+        for event_type, symbol, item in entries:
+            for subscription in subscriptions:
+                if not subscription.matches(event_type, symbol):
+                    continue
+                if subscription in blocked or not subscription.offer(event_type, symbol, item, published_at):
+                    blocked.add(subscription)
+                    pending.append((subscription, event_type, symbol, item))
+        for subscription, event_type, symbol, item in pending:
+            await subscription.put(event_type, symbol, item, published_at)
+
+    def stats(self):
+        return [subscription.stats() for subscription in self._subscriptions]
+
+
+class HandlerConsumer:
+    """
+    Runs stream handlers on their own bus subscription instead of inside a receive loop. The
+    handlers are called on a worker thread (one batch at a time, in order), so a slow handler
+    only backs up its own queue and never stalls the event loop. With the default block policy
+    nothing is lost; the receiver is only held up once the queue is full. Handlers must be
+    thread-safe with respect to whoever reads their state.
+
+    batched handlers are called as handler(items, received_at) with the items that were
+    published together (e.g. the events of one FEED_DATA message), the others as
+    handler(item, received_at) per item; received_at is the publish time. A handler that
+    raises is reported and the consumer carries on.
+
+        consumer = HandlerConsumer(event_bus, [recorder.record], batched=True, event_types=("Trade",)).start()
+        ...
+        await consumer.stop()
+    """
+
+    def __init__(self, bus, handlers, batched=False, event_types=None, symbols=None, maxsize=EVENT_QUEUE_SIZE,
+                 policy=BLOCK, name=None):
+        self.bus = bus
+        self.handlers = list(handlers)
+        self.batched = batched
+        self.subscription = bus.subscribe(event_types=event_types, symbols=symbols, maxsize=maxsize,
+                                          policy=policy, name=name)
+        self.errors = 0
+        self._task = None
+        self._stopped = False
+
+    def start(self):
+        """Start consuming on the running event loop. Returns self."""
+        self._task = asyncio.create_task(self._run(), name=self.subscription.name)
+        return self
+
+    async def stop(self):
+        # Also ends a batch the worker thread is still going through
+        self._stopped = True
+        self.bus.unsubscribe(self.subscription)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _call(self, *args):
+        if self._stopped:
+            return
+        for handler in self.handlers:
+            try:
+                handler(*args)
+            except Exception as e:
+                self.errors += 1
+                print(f"Error in {self.subscription.name} handler: {e}")
+
+    async def _run(self):
+        while True:
+            entries = await self.subscription.get_batch()
+            await asyncio.to_thread(self._dispatch, entries)
+
+    def _dispatch(self, entries):
+        if not self.batched:
+            for published_at, item in entries:
+                self._call(item, published_at)
+            return
+        start = 0
+        for end in range(1, len(entries) + 1):
+            if end == len(entries) or entries[end][0] != entries[start][0]:
+                self._call([item for _, item in entries[start:end]], entries[start][0])
+                start = end
+
+
+# Shared bus the runtime's streams publish to
+event_bus = EventBus()
@@ -0,0 +1,166 @@
+# feed_decoder.py
+"""
+Decoder for DXLink FEED_DATA messages sent in COMPACT format.
+
+COMPACT payloads look like ["Quote", ["Quote", "SPY", 1.0, 1.1, 100, 200, "Quote", "AAPL", ...], "Trade", [...]]:
+one flat value array per event type, laid out in the field order negotiated by FEED_SETUP/FEED_CONFIG.
+CompactDecoder slices those arrays straight into small __slots__ records, no intermediate dicts.
+"""
+
+# Fields requested for each event type in FEED_SETUP. Record classes below use the same order,
+# so when the server echoes these fields back in FEED_CONFIG the values map positionally.
+FEED_EVENT_FIELDS = {
+    "Trade": ["eventType", "eventSymbol", "price", "dayVolume", "size"],
+    "Quote": ["eventType", "eventSymbol", "bidPrice", "askPrice", "bidSize", "askSize"],
+    "Profile": [
+        "eventType", "eventSymbol", "description", "shortSaleRestriction",
+        "tradingStatus", "statusReason", "haltStartTime", "haltEndTime",
+        "highLimitPrice", "lowLimitPrice", "high52WeekPrice", "low52WeekPrice"
+    ],
+    "Summary": [
+        "eventType", "eventSymbol", "openInterest", "dayOpenPrice",
+        "dayHighPrice", "dayLowPrice", "prevDayClosePrice"
+    ]
+}
+
+# DXLink sends non-finite doubles as strings
+_SPECIAL_VALUES = {"NaN": float("nan"), "Infinity": float("inf"), "-Infinity": float("-inf")}
+# Fields that hold text, where "NaN" is a legitimate value (a symbol, a description) and not a double
+TEXT_FIELDS = frozenset({
+    "eventType", "eventSymbol", "description", "shortSaleRestriction", "tradingStatus", "statusReason"
+})
+
+
+class FeedEvent:
+    __slots__ = ()
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__[2:])
+        return f"{self.eventType}({self.eventSymbol}: {fields})"
+
+
+class Trade(FeedEvent):
+    __slots__ = ("eventType", "eventSymbol", "price", "dayVolume", "size")
+
+    def __init__(self, eventType, eventSymbol, price=None, dayVolume=None, size=None):
+        self.eventType = eventType
+        self.eventSymbol = eventSymbol
+        self.price = price
+        self.dayVolume = dayVolume
+        self.size = size
+
+
+class Quote(FeedEvent):
+    __slots__ = ("eventType", "eventSymbol", "bidPrice", "askPrice", "bidSize", "askSize")
+
+    def __init__(self, eventType, eventSymbol, bidPrice=None, askPrice=None, bidSize=None, askSize=None):
+        self.eventType = eventType
+        self.eventSymbol = eventSymbol
+        self.bidPrice = bidPrice
+        self.askPrice = askPrice
+        self.bidSize = bidSize
+        self.askSize = askSize
+
+
+class Profile(FeedEvent):
+    __slots__ = (
+        "eventType", "eventSymbol", "description", "shortSaleRestriction",
+        "tradingStatus", "statusReason", "haltStartTime", "haltEndTime",
+        "highLimitPrice", "lowLimitPrice", "high52WeekPrice", "low52WeekPrice"
+    )
+
+    def __init__(self, eventType, eventSymbol, description=None, shortSaleRestriction=None,
+                 tradingStatus=None, statusReason=None, haltStartTime=None, haltEndTime=None,
+                 highLimitPrice=None, lowLimitPrice=None, high52WeekPrice=None, low52WeekPrice=None):
+        self.eventType = eventType
+        self.eventSymbol = eventSymbol
+        self.description = description
+        self.shortSaleRestriction = shortSaleRestriction
+        self.tradingStatus = tradingStatus
+        self.statusReason = statusReason
+        self.haltStartTime = haltStartTime
+        self.haltEndTime = haltEndTime
+        self.highLimitPrice = highLimitPrice
+        self.lowLimitPrice = lowLimitPrice
+        self.high52WeekPrice = high52WeekPrice
+        self.low52WeekPrice = low52WeekPrice
+
+
+class Summary(FeedEvent):
+    __slots__ = (
+        "eventType", "eventSymbol", "openInterest", "dayOpenPrice",
+        "dayHighPrice", "dayLowPrice", "prevDayClosePrice"
+    )
+
+    def __init__(self, eventType, eventSymbol, openInterest=None, dayOpenPrice=None,
+                 dayHighPrice=None, dayLowPrice=None, prevDayClosePrice=None):
+        self.eventType = eventType
+        self.eventSymbol = eventSymbol
+        self.openInterest = openInterest
+        self.dayOpenPrice = dayOpenPrice
+        self.dayHighPrice = dayHighPrice
+        self.dayLowPrice = dayLowPrice
+        self.prevDayClosePrice = prevDayClosePrice
+
+
+EVENT_CLASSES = {
+    "Trade": Trade,
+    "Quote": Quote,
+    "Profile": Profile,
+    "Summary": Summary
+}
+
+
+class CompactDecoder:
+    """
+    Turns the "data" array of COMPACT FEED_DATA messages into FeedEvent records.
+
+    The field layout per event type starts as FEED_EVENT_FIELDS and is replaced by whatever
+    the server reports in FEED_CONFIG, so the decoder keeps working if the server drops or
+    reorders fields. Event types without a record class are decoded to plain dicts.
+    """
+
+    def __init__(self, event_fields=FEED_EVENT_FIELDS):
+        self._layouts = {}
+        for event_type, fields in event_fields.items():
+            self.set_fields(event_type, fields)
+
+    def set_fields(self, event_type, fields):
+        fields = tuple(fields)
+        cls = EVENT_CLASSES.get(event_type)
+        if cls is None or fields == cls.__slots__:
+            order = None
+        else:
+            # Server layout differs from the record layout: remember where each slot lives
+            order = tuple(fields.index(name) if name in fields else None for name in cls.__slots__)
+        numeric = tuple(name not in TEXT_FIELDS for name in fields)
+        self._layouts[event_type] = (cls, fields, len(fields), order, numeric)
+
+    def update_from_config(self, message):
+        """Apply the eventFields of a FEED_CONFIG message."""
+        for event_type, fields in (message.get("eventFields") or {}).items():
+            self.set_fields(event_type, fields)
+
+    def decode(self, data):
+        events = []
+        append = events.append
+        special = _SPECIAL_VALUES.get
+        for i in range(0, len(data) - 1, 2):
+            layout = self._layouts.get(data[i])
+            if layout is None:
+                continue
+            cls, fields, width, order, numeric = layout
+            values = [special(v, v) if v.__class__ is str and numeric[k % width] else v
+                      for k, v in enumerate(data[i + 1])]
+            for j in range(0, len(values) - width + 1, width):
+                chunk = values[j:j + width]
+                if cls is None:
+                    append(dict(zip(fields, chunk)))
+                elif order is None:
+                    append(cls(*chunk))
+                else:
+                    append(cls(*[chunk[k] if k is not None else None for k in order]))
+        return events
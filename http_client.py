@@ -0,0 +1,129 @@
+# http_client.py
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+import codec
+from config import BASE_URL, HTTP_TIMEOUT, HTTP_POOL_SIZE
+from rest_stats import rest_stats
+
+MAX_TOKEN_ALIASES = 16  # stale session tokens remembered so callers holding one still get the new token
+
+
+class HttpClient:
+    """
+    One pooled requests.Session shared by every REST call in the CLI.
+
+    Connections are kept alive between calls, so only the first request to the
+    API pays for the TCP+TLS handshake. Paths are resolved against base_url;
+    absolute URLs are passed through unchanged. If stats is given (a rest_stats.RestStats),
+    every request's latency and status is recorded into it.
+    """
+
+    def __init__(self, base_url=BASE_URL, timeout=HTTP_TIMEOUT, pool_size=HTTP_POOL_SIZE, stats=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.stats = stats
+        self.auth_token = None
+        self.unauthorized_handler = None
+        self._token_aliases = {}
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Accept": "application/json",
+            "Content-Type": "application/json"
+        })
+
+    def set_auth_token(self, token):
+        """Default Authorization header for calls that don't pass a session_token."""
+        self.auth_token = token
+
+    def set_unauthorized_handler(self, handler):
+        """
+        handler(rejected_token) -> new_token is called once when a request comes
+        back 401; the request is then retried with the new token.
+        """
+        self.unauthorized_handler = handler
+
+    def url(self, path):
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _send(self, method, url, retry, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            if self.stats is not None:
+                self.stats.record(method, url, type(e).__name__, time.perf_counter() - start, retry)
+            raise
+        if self.stats is not None:
+            self.stats.record(method, url, response.status_code, time.perf_counter() - start, retry)
+        return response
+
+    def request(self, method, path, session_token=None, authenticate=True, timeout=None, attempt=1, **kwargs):
+        """
+        :param attempt: 1 for a first call; callers that retry a request themselves pass the
+            attempt number so the retry shows up in the stats.
+        """
+        headers = dict(kwargs.pop("headers", None) or {})
+        if "json" in kwargs:
+            # Serialize request bodies with the fast codec; Content-Type is already a default header
+            kwargs["data"] = codec.dumps(kwargs.pop("json")).encode()
+        token = None
+        if authenticate:
+            token = session_token or self.auth_token
+            token = self._token_aliases.get(token, token)
+            if token:
+                headers["Authorization"] = token
+
+        url = self.url(path)
+        timeout = timeout or self.timeout
+        response = self._send(method, url, attempt > 1, headers=headers, timeout=timeout, **kwargs)
+
+        if response.status_code == 401 and token and self.unauthorized_handler is not None:
+            new_token = self.unauthorized_handler(token)
+            if new_token and new_token != token:
+                with self._lock:
+                    self._alias_token(token, new_token)
+                    if self.auth_token == token:
+                        self.auth_token = new_token
+                headers["Authorization"] = new_token
+                response = self._send(method, url, True, headers=headers, timeout=timeout, **kwargs)
+        return response
+
+    def _alias_token(self, old_token, new_token):
+        """Map old_token (and every token already mapped to it) straight to new_token. Caller holds _lock."""
+        aliases = self._token_aliases
+        for stale, current in list(aliases.items()):
+            if current == old_token:
+                aliases[stale] = new_token
+        aliases.pop(new_token, None)
+        aliases.pop(old_token, None)
+        aliases[old_token] = new_token
+        while len(aliases) > MAX_TOKEN_ALIASES:
+            del aliases[next(iter(aliases))]
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+# Shared client used by session.py, account_stream.py and orders.py
+client = HttpClient(stats=rest_stats)
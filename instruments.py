@@ -0,0 +1,221 @@
+# instruments.py
+import os
+import json
+import tempfile
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, ROUND_HALF_UP
+from urllib.parse import quote
+import codec
+from http_client import client
+from config import INSTRUMENT_CACHE_FILE, INSTRUMENT_CACHE_TTL, INSTRUMENT_NEGATIVE_TTL
+
+INSTRUMENT_ENDPOINTS = {
+    "Equity": "/instruments/equities",
+    "Equity Option": "/instruments/equity-options",
+    "Future": "/instruments/futures",
+    "Cryptocurrency": "/instruments/cryptocurrencies"
+}
+
+
+def _tick_schedule(tick_sizes):
+    """API tick-sizes list -> [(threshold or None, tick)], lowest threshold first."""
+    schedule = []
+    for entry in tick_sizes or []:
+        if entry.get("value") is None:
+            continue
+        threshold = entry.get("threshold")
+        schedule.append((float(threshold) if threshold is not None else None, entry["value"]))
+    schedule.sort(key=lambda item: float("inf") if item[0] is None else item[0])
+    return schedule
+
+
+def tick_size_for(schedule, price):
+    """Tick (as a string) that applies at price: the first entry whose threshold is above it."""
+    for threshold, tick in schedule:
+        if threshold is None or price < threshold:
+            return tick
+    return schedule[-1][1] if schedule else None
+
+
+def snap_price(price, schedule):
+    """Round price to the nearest valid tick. Returns price unchanged if there's no schedule."""
+    tick = tick_size_for(schedule, price)
+    if tick is None or Decimal(tick) == 0:
+        return price
+    tick = Decimal(tick)
+    snapped = (Decimal(str(price)) / tick).quantize(Decimal(1), rounding=ROUND_HALF_UP) * tick
+    # Never snap a positive price down to zero
+    return float(max(snapped, tick))
+
+
+class InstrumentCache:
+    """
+    Symbol existence, tick sizes and crypto quantity precision, fetched lazily from the
+    instruments endpoints and kept on disk so the next run doesn't pay for them again.
+
+    Entries expire after ttl seconds; symbols the API doesn't know are remembered for
+    negative_ttl seconds. Lookups that fail for other reasons (network, 5xx) return None and
+    aren't cached, so validation never blocks an order on an unreachable metadata endpoint.
+    """
+
+    def __init__(self, cache_file=INSTRUMENT_CACHE_FILE, ttl=INSTRUMENT_CACHE_TTL, negative_ttl=INSTRUMENT_NEGATIVE_TTL):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._load()
+
+    @staticmethod
+    def _key(instrument_type, symbol):
+        return f"{instrument_type}:{symbol}"
+
+    def _expired(self, entry, now):
+        ttl = self.ttl if entry["exists"] else self.negative_ttl
+        return now - entry["fetched_at"] > ttl
+
+    def get(self, session_token, instrument_type, symbol, save=True):
+        """
+        Metadata dict for the instrument ({"exists", "tick_sizes", "quantity_precision", ...}),
+        from the cache if fresh, else from the API. None if the API couldn't be reached.
+
+        :param save: Write the cache file after a fetch; prefetch() turns this off and saves once.
+        """
+        key = self._key(instrument_type, symbol)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry, now):
+                return entry
+        entry = self._fetch(session_token, instrument_type, symbol)
+        if entry is None:
+            return None
+        with self._lock:
+            self._entries[key] = entry
+            if save:
+                self._save()
+        return entry
+
+    def prefetch(self, session_token, instruments, max_workers=8):
+        """Load many (instrument_type, symbol) pairs in parallel so later get() calls hit the cache."""
+        instruments = list(dict.fromkeys(instruments))
+        if not instruments:
+            return
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(instruments)))) as executor:
+            list(executor.map(lambda item: self.get(session_token, *item, save=False), instruments))
+        with self._lock:
+            self._save()
+
+    def _fetch(self, session_token, instrument_type, symbol):
+        endpoint = INSTRUMENT_ENDPOINTS.get(instrument_type)
+        if endpoint is None:
+            return None
+        try:
+            response = client.get(f"{endpoint}/{quote(symbol, safe='')}", session_token=session_token)
+        except Exception:
+            return None
+        entry = {"symbol": symbol, "instrument_type": instrument_type, "fetched_at": time.time(),
+                 "exists": False, "active": False, "tick_sizes": [], "quantity_precision": None}
+        if response.status_code in (400, 404):
+            return entry
+        if response.status_code != 200:
+            return None
+        data = codec.loads_response(response).get("data", {})
+        entry["exists"] = True
+        entry["active"] = data.get("active", True)
+
+        if instrument_type == "Cryptocurrency":
+            entry["tick_sizes"] = _tick_schedule([{"value": data.get("tick-size")}])
+            precisions = [venue.get("quantity-precision") for venue in data.get("destination-venue-symbols", [])
+                          if venue.get("quantity-precision") is not None]
+            entry["quantity_precision"] = min(precisions) if precisions else None
+        elif instrument_type == "Future":
+            entry["tick_sizes"] = _tick_schedule(
+                data.get("tick-sizes") or [{"value": data.get("tick-size")}])
+        elif instrument_type == "Equity Option":
+            # Option ticks are published on the underlying equity
+            underlying = self.get(session_token, "Equity", data.get("underlying-symbol") or "")
+            if underlying is not None and underlying.get("exists"):
+                entry["tick_sizes"] = underlying.get("option_tick_sizes", [])
+        else:
+            entry["tick_sizes"] = _tick_schedule(data.get("tick-sizes"))
+            entry["option_tick_sizes"] = _tick_schedule(data.get("option-tick-sizes"))
+        return entry
+
+    def validate_order(self, session_token, order_data):
+        """
+        Check every leg's symbol and crypto quantity precision against instrument metadata and
+        snap the price to the first leg's tick size. Returns (order_data, notes) where notes
+        describe any adjustment; raises ValueError for unknown symbols or bad quantities.
+        """
+        notes = []
+        schedule = None
+        for leg in order_data.get("legs", []):
+            entry = self.get(session_token, leg["instrument-type"], leg["symbol"])
+            if entry is None:
+                notes.append(f"Could not load instrument data for {leg['symbol']}; not validated.")
+                continue
+            if not entry["exists"]:
+                raise ValueError(f"Unknown {leg['instrument-type']} symbol {leg['symbol']!r}.")
+            if not entry.get("active", True):
+                raise ValueError(f"{leg['symbol']} is not an active instrument.")
+            precision = entry.get("quantity_precision")
+            if precision is not None and round(float(leg["quantity"]), precision) != float(leg["quantity"]):
+                raise ValueError(f"{leg['symbol']} quantity allows at most {precision} decimal place(s).")
+            if schedule is None and entry["tick_sizes"]:
+                schedule = entry["tick_sizes"]
+
+        price = order_data.get("price")
+        if price is not None and schedule:
+            snapped = snap_price(price, schedule)
+            if snapped != price:
+                notes.append(f"Price {price} snapped to tick size: {snapped}")
+                order_data = dict(order_data, price=snapped)
+        return order_data, notes
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._save()
+
+    def _load(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, "r") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, entry in entries.items():
+            entry["tick_sizes"] = [tuple(item) for item in entry.get("tick_sizes", [])]
+            if "option_tick_sizes" in entry:
+                entry["option_tick_sizes"] = [tuple(item) for item in entry["option_tick_sizes"]]
+            if not self._expired(entry, now):
+                self._entries[key] = entry
+
+    def _save(self):
+        if not self.cache_file:
+            return
+        now = time.time()
+        # Evict expired entries whenever the file is rewritten
+        self._entries = {key: entry for key, entry in self._entries.items() if not self._expired(entry, now)}
+        # Write a temporary file and swap it in, so a crash or a second process never sees half a file
+        directory = os.path.dirname(os.path.abspath(self.cache_file))
+        try:
+            fd, temp_path = tempfile.mkstemp(prefix=".tt_instruments.", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(self._entries, f)
+                os.replace(temp_path, self.cache_file)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+        except OSError as e:
+            print(f"Could not write instrument cache: {e}")
+
+
+# Shared cache used by orders.submit_order() and batch_orders.py
+instrument_cache = InstrumentCache()
@@ -1,19 +1,242 @@
 # main.py
-import asyncio
+import time
+import threading
 from config import (
     USERNAME,
     PASSWORD,
-    ACCOUNT_NUMBER,
     ACCOUNT_NUMBERS,
-    MARKET_DATA_SYMBOLS  # <--- Import the default symbol list
+    MARKET_DATA_SYMBOLS,  # <--- Import the default symbol list
+    TICK_RECORDING,
+    TICK_RECORD_DIR,
+    BAR_BUILDING,
+    BAR_TIMEFRAMES,
+    DXLINK_URL,
+    DASHBOARD_ON_CONNECT,
+    ACCOUNT_CONNECT_TIMEOUT
 )
-from session import create_session_with_password, get_api_quote_token
-from market_stream import stream_market_data, disconnect_stream, is_connected
-from account_stream import stream_account_data, fetch_account_balances, fetch_account_positions
+from session import SessionManager
+from http_client import client
+from rest_stats import rest_stats
+from runtime import runtime, MARKET_STREAM, ACCOUNT_STREAM
+from quote_cache import quote_cache
+import market_stream
+from event_bus import event_bus
+from tick_recorder import TickRecorder
+from bars import BarBuilder, timeframe_label
+from account_stream import print_account_balances, print_account_positions
+from account_state import account_store
+from order_tracker import order_tracker
 from orders import order_manager
+from portfolio import (
+    fetch_accounts_concurrently,
+    store_snapshots,
+    print_balance_table,
+    print_net_positions,
+    print_consolidated_view
+)
+from dashboard import show_dashboard
 
 def menu():
     global USERNAME, PASSWORD
+    session_manager = SessionManager(USERNAME, PASSWORD)
+    session_manager.start_background_refresh()
+    # Re-login through the session manager whenever a REST call comes back 401
+    client.set_unauthorized_handler(session_manager.handle_unauthorized)
+    # Streams run on the runtime's background event loop so the menu stays usable
+    runtime.start()
+    recorder = TickRecorder(TICK_RECORD_DIR) if TICK_RECORDING else None
+    bar_builder = None
+    if BAR_BUILDING:
+        try:
+            bar_builder = BarBuilder()
+        except Exception as e:
+            print(f"Bar building disabled: {e}")
+    try:
+        _menu_loop(session_manager, recorder, bar_builder)
+    finally:
+        runtime.shutdown()
+        if recorder is not None:
+            recorder.close()
+        session_manager.stop_background_refresh()
+        client.close()
+
+def show_stream_status():
+    status = runtime.status()
+    print("\n--- Stream Status ---")
+    print(f"Market Data Stream: {status.get(MARKET_STREAM, 'not started')}")
+    print(f"Account Stream: {status.get(ACCOUNT_STREAM, 'not started')}")
+
+    stream = market_stream.active_stream
+    if stream is not None:
+        stats = stream.stats()
+        print(f"Market Stream Reconnects: {stats['reconnects']}")
+        print(f"Market Data Gaps: {stats['outages']} totalling {stats['total_gap_seconds']:.1f}s")
+        if stats["in_outage_since"]:
+            print(f"Currently reconnecting (no data for {time.time() - stats['in_outage_since']:.1f}s)")
+        for shard in stats.get("shards", [{"shard": 0, "channels": stats["channels"]}]):
+            for channel in shard["channels"]:
+                print(f"  Shard {shard['shard']} channel {channel['channel']}: {channel['symbols']} symbol(s), "
+                      f"{channel['messages_per_second']:.1f} msg/s, {channel['events']} events")
+
+    subscriptions = event_bus.stats()
+    if subscriptions:
+        print("\n--- Event Bus Subscribers ---")
+        for sub in subscriptions:
+            print(f"{sub['name']} ({sub['policy']}): depth {sub['depth']}/{sub['maxsize']}, "
+                  f"delivered {sub['delivered']}, dropped {sub['dropped']}, conflated {sub['conflated']}, "
+                  f"lag {sub['last_lag'] * 1000:.1f} ms (max {sub['max_lag'] * 1000:.1f} ms)")
+
+    symbols = quote_cache.symbols()
+    if not symbols:
+        return
+    print("\n--- Latest Quotes ---")
+    now = time.time()
+    for symbol in symbols:
+        snapshot = quote_cache.get(symbol)
+        updated = max(snapshot["quoteTime"] or 0, snapshot["tradeTime"] or 0)
+        age = f"{now - updated:.1f}s ago" if updated else "n/a"
+        print(f"{symbol}: bid {snapshot['bidPrice']} / ask {snapshot['askPrice']}, "
+              f"last {snapshot['price']}, volume {snapshot['dayVolume']} ({age})")
+
+def show_bars(bar_builder):
+    if bar_builder is None:
+        print("Bar building is disabled (BAR_BUILDING in config.py).")
+        return
+    symbol = input("Symbol: ").strip()
+    labels = ", ".join(timeframe_label(timeframe) for timeframe in BAR_TIMEFRAMES)
+    label = input(f"Timeframe ({labels}): ").strip()
+    for timeframe in BAR_TIMEFRAMES:
+        if timeframe_label(timeframe) == label:
+            bar_builder.print_bars(symbol, timeframe)
+            return
+    print("Invalid timeframe.")
+
+def manage_subscriptions():
+    stream = market_stream.active_stream
+    if stream is None or not runtime.is_running(MARKET_STREAM):
+        print("Connect to the market data stream first.")
+        return
+    print(f"\nSubscribed symbols: {', '.join(sorted(stream.subscriptions)) or 'none'}")
+    print("1. Add Symbols")
+    print("2. Remove Symbols")
+    choice = input("Enter your choice: ")
+    if choice not in ('1', '2'):
+        print("Invalid choice.")
+        return
+    symbols = [s.strip() for s in input("Enter symbols (comma separated): ").split(",") if s.strip()]
+    if not symbols:
+        return
+    try:
+        if choice == '1':
+            print(f"Added {runtime.subscribe(symbols)} subscription(s).")
+        else:
+            print(f"Removed {runtime.unsubscribe(symbols)} subscription(s).")
+    except Exception as e:
+        print(f"Error updating subscriptions: {e}")
+
+def _load_accounts(session_manager, account_numbers):
+    """
+    Make sure account_store holds current data for every account in account_numbers. While the
+    account stream runs the store is kept up to date by it and each account only needs seeding
+    once; without the stream every request goes back to REST. Accounts that need a fetch are
+    fetched concurrently. Returns the account numbers that are ready to read.
+    """
+    live = runtime.is_running(ACCOUNT_STREAM)
+    missing = [account_number for account_number in account_numbers
+               if not (live and account_store.is_seeded(account_number))]
+    if not missing:
+        return list(account_numbers)
+    try:
+        snapshots, _ = fetch_accounts_concurrently(session_manager.get_session_token(), missing,
+                                                   fetch=("balances", "positions"))
+    except Exception as e:
+        print(f"Error fetching accounts: {e}")
+        return [account_number for account_number in account_numbers if account_number not in missing]
+    failed = set()
+    for account_number, snapshot in snapshots.items():
+        for name, error in snapshot["errors"].items():
+            print(f"{account_number} {name}: {error}")
+            failed.add(account_number)
+    return [account_number for account_number in account_numbers if account_number not in failed]
+
+def _print_state_age(account_number):
+    stats = account_store.stats(account_number)
+    if stats and runtime.is_running(ACCOUNT_STREAM):
+        print(f"(live from account stream, {stats['updates']} update(s), "
+              f"last {time.time() - stats['updated_at']:.1f}s ago)")
+
+def show_balances(session_manager, account_numbers):
+    ready = _load_accounts(session_manager, account_numbers)
+    for account_number in ready:
+        print_account_balances(account_store.balances(account_number))
+        _print_state_age(account_number)
+    if len(ready) > 1:
+        print_balance_table(store_snapshots(ready))
+
+def show_positions(session_manager, account_numbers):
+    ready = _load_accounts(session_manager, account_numbers)
+    for account_number in ready:
+        if len(account_numbers) > 1:
+            print(f"\n=== Account {account_number} ===")
+        print_account_positions(account_store.positions(account_number))
+        _print_state_age(account_number)
+    if len(ready) > 1:
+        print_net_positions(store_snapshots(ready))
+
+def choose_account(session_manager, account_numbers):
+    """
+    The account to manage orders for: the only one configured, or one picked from a list that
+    shows every account's live orders (fetched concurrently). None if the choice is invalid.
+    """
+    if len(account_numbers) == 1:
+        return account_numbers[0]
+    try:
+        snapshots, _ = fetch_accounts_concurrently(session_manager.get_session_token(), account_numbers,
+                                                   fetch=("live_orders",))
+    except Exception as e:
+        print(f"Error fetching live orders: {e}")
+        snapshots = {}
+    print("\n--- Accounts ---")
+    for index, account_number in enumerate(account_numbers, 1):
+        orders = (snapshots.get(account_number) or {}).get("live_orders")
+        print(f"{index}. {account_number} ({len(orders) if orders is not None else 'n/a'} live order(s))")
+    choice = input("Select an account: ").strip()
+    if not choice.isdigit() or not 1 <= int(choice) <= len(account_numbers):
+        print("Invalid choice.")
+        return None
+    return account_numbers[int(choice) - 1]
+
+def show_all_accounts(session_manager):
+    try:
+        snapshots, elapsed = fetch_accounts_concurrently(session_manager.get_session_token(), ACCOUNT_NUMBERS)
+    except Exception as e:
+        print(f"Error fetching accounts: {e}")
+        return
+    print_consolidated_view(snapshots, elapsed)
+
+def show_rest_stats():
+    rest_stats.print_stats()
+    path = input("\nExport to JSON file (enter a path, or press Enter to skip): ").strip()
+    if path:
+        try:
+            rest_stats.export_json(path)
+            print(f"Stats written to {path}")
+        except OSError as e:
+            print(f"Could not write stats: {e}")
+
+def _offer_dashboard():
+    if DASHBOARD_ON_CONNECT == "ask":
+        if input("Open the live dashboard? (y/n): ").lower() != "y":
+            return
+    elif not DASHBOARD_ON_CONNECT:
+        return
+    show_dashboard(runtime)
+
+def _fresh_quote_token(session_manager):
+    api_quote_token, dxlink_url = session_manager.get_quote_token(force_refresh=True)
+    return api_quote_token, DXLINK_URL or dxlink_url
+
+def _menu_loop(session_manager, recorder=None, bar_builder=None):
     while True:
         print("\n--- Account Management Menu ---")
         print("1. Connect to Market Data Stream")
@@ -23,53 +246,105 @@ def menu():
         print("5. Order Manager")
         print("6. Disconnect from Streams")
         print("7. Exit")
+        print("8. Stream Status")
+        print("9. Manage Market Data Symbols")
+        print("10. All Accounts Overview")
+        print("11. REST Stats")
+        print("12. Show Bars")
         choice = input("Enter your choice: ")
 
         if choice == '1':
-            if not is_connected:
+            if not runtime.is_running(MARKET_STREAM):
                 try:
-                    session_token = create_session_with_password(USERNAME, PASSWORD)
-                    api_quote_token, dxlink_url = get_api_quote_token(session_token)
+                    api_quote_token, dxlink_url = session_manager.get_quote_token()
+                    handlers = []
+                    if recorder is not None:
+                        handlers.append(recorder.record)
+                    if bar_builder is not None:
+                        handlers.append(bar_builder.on_events)
                     
                     # Use the default list of symbols from config.py
-                    asyncio.run(stream_market_data(dxlink_url, api_quote_token, MARKET_DATA_SYMBOLS))
+                    runtime.start_market_stream(
+                        DXLINK_URL or dxlink_url, api_quote_token, MARKET_DATA_SYMBOLS,
+                        # Fetch a fresh quote token if DXLink rejects ours after a reconnect
+                        token_provider=lambda: _fresh_quote_token(session_manager),
+                        handlers=handlers or None
+                    )
+                    print("Market data stream started in the background.")
+                    if recorder is not None:
+                        print(f"Recording trades and quotes to {TICK_RECORD_DIR}/")
                 except Exception as e:
                     print(f"Error connecting to market stream: {e}")
             else:
                 print("Already connected to the market data stream.")
+            if runtime.is_running(MARKET_STREAM):
+                _offer_dashboard()
         
         elif choice == '2':
-            try:
-                session_token = create_session_with_password(USERNAME, PASSWORD)
-                # Use your configured list of account numbers
-                asyncio.run(stream_account_data(session_token, ACCOUNT_NUMBERS))
-            except Exception as e:
-                print(f"Error connecting to account stream: {e}")
+            if not runtime.is_running(ACCOUNT_STREAM):
+                try:
+                    session_token = session_manager.get_session_token()
+                    connected = threading.Event()
+                    # Use your configured list of account numbers
+                    runtime.start_account_stream(session_token, ACCOUNT_NUMBERS,
+                                                 handlers=[account_store.handle_message,
+                                                           order_tracker.handle_message],
+                                                 connected=connected)
+                    print("Account stream started in the background.")
+                    # Seed once the streamer has accepted the subscription, so no update falls
+                    # between the snapshot and the stream
+                    if not runtime.wait_until(ACCOUNT_STREAM, connected, ACCOUNT_CONNECT_TIMEOUT):
+                        if runtime.is_running(ACCOUNT_STREAM):
+                            print("Account stream hasn't connected yet; balances may miss updates until it does.")
+                        else:
+                            print("Account stream failed to connect; balances and positions come from REST only.")
+                    for account_number in ACCOUNT_NUMBERS:
+                        try:
+                            account_store.seed(session_token, account_number)
+                        except Exception as e:
+                            print(e)
+                except Exception as e:
+                    print(f"Error connecting to account stream: {e}")
+            else:
+                print("Already connected to the account stream.")
+            if runtime.is_running(ACCOUNT_STREAM):
+                _offer_dashboard()
         
         elif choice == '3':
-            session_token = create_session_with_password(USERNAME, PASSWORD)
-            # Use your configured single account number
-            fetch_account_balances(session_token, ACCOUNT_NUMBER)
+            # Every configured account, with totals when there is more than one
+            show_balances(session_manager, ACCOUNT_NUMBERS)
         
         elif choice == '4':
-            session_token = create_session_with_password(USERNAME, PASSWORD)
-            # Use your configured single account number
-            fetch_account_positions(session_token, ACCOUNT_NUMBER)
+            show_positions(session_manager, ACCOUNT_NUMBERS)
         
         elif choice == '5':
-            session_token = create_session_with_password(USERNAME, PASSWORD)
-            # Use your configured single account number
-            order_manager(session_token, ACCOUNT_NUMBER)
+            account_number = choose_account(session_manager, ACCOUNT_NUMBERS)
+            if account_number is not None:
+                order_manager(session_manager.get_session_token(), account_number)
         
         elif choice == '6':
-            asyncio.run(disconnect_stream())
+            if not runtime.stop_all():
+                print("No active streams to disconnect.")
         
         elif choice == '7':
-            if is_connected:
-                asyncio.run(disconnect_stream())
             print("Exiting program.")
             break
         
+        elif choice == '8':
+            show_stream_status()
+        
+        elif choice == '9':
+            manage_subscriptions()
+        
+        elif choice == '10':
+            show_all_accounts(session_manager)
+        
+        elif choice == '11':
+            show_rest_stats()
+        
+        elif choice == '12':
+            show_bars(bar_builder)
+        
         else:
             print("Invalid choice. Please try again.")
 
@@ -1,170 +1,676 @@
 # market_stream.py
-import json
+import time
+import random
 import asyncio
+from collections import deque
 import websockets
-import keyboard
-from config import MARKET_DATA_SYMBOLS  # Import your default symbol list
+from config import (
+    MARKET_DATA_SYMBOLS,  # Import your default symbol list
+    RECONNECT_BACKOFF_BASE,
+    RECONNECT_BACKOFF_MAX,
+    RECONNECT_MAX_ATTEMPTS,
+    FEED_SUBSCRIPTION_BATCH_SIZE,
+    SHARD_CONNECTIONS,
+    SHARD_CHANNELS_PER_CONNECTION,
+    ECHO_CONFLATE,
+    CONFLATION_MAX_KEYS
+)
 from session import get_api_quote_token  # if needed
+import codec
+from codec import message_type
+from feed_decoder import CompactDecoder, FEED_EVENT_FIELDS, EVENT_CLASSES
+from event_bus import DROP_OLDEST, CONFLATE, HandlerConsumer
+from conflation import Conflator
+from quote_cache import quote_cache
 
 # Module-level state for market stream
 is_connected = False
+active_stream = None
 
-async def stream_market_data(dxlink_url, api_quote_token, symbols=None):
+FEED_CHANNEL = 3
+DEFAULT_EVENT_TYPES = ("Trade", "Quote", "Profile", "Summary")
+RATE_WINDOW = 10  # seconds covered by FeedChannel.message_rate()
+
+# Frames that never change are serialized once
+SETUP_FRAME = codec.dumps({
+    "type": "SETUP",
+    "channel": 0,
+    "version": "0.1-DXF-JS/0.3.0",
+    "keepaliveTimeout": 60,
+    "acceptKeepaliveTimeout": 60
+})
+KEEPALIVE_FRAME = codec.dumps({"type": "KEEPALIVE", "channel": 0})
+
+
+class DXLinkAuthError(Exception):
+    """The DXLink server rejected the API quote token."""
+
+
+class DXLinkProtocolError(Exception):
+    """The DXLink server sent a message we didn't expect or couldn't decode."""
+
+
+def _decode(message):
+    try:
+        return codec.loads(message)
+    except ValueError as e:
+        raise DXLinkProtocolError(f"Undecodable message: {e}")
+
+
+class FeedChannel:
+    """One FEED channel on a DXLink connection: the symbols routed to it, its decoder and counters."""
+
+    def __init__(self, number):
+        self.number = number
+        self.request_frame = codec.dumps({
+            "type": "CHANNEL_REQUEST",
+            "channel": number,
+            "service": "FEED",
+            "parameters": {"contract": "AUTO"}
+        })
+        self.setup_frame = codec.dumps({
+            "type": "FEED_SETUP",
+            "channel": number,
+            "acceptAggregationPeriod": 0.1,
+            "acceptDataFormat": "COMPACT",
+            "acceptEventFields": FEED_EVENT_FIELDS
+        })
+        self.symbols = set()
+        self.decoder = CompactDecoder()
+        self.messages = 0
+        self.events = 0
+        # (time, messages) taken by the receive path at most once a second; readers only look
+        self._samples = deque([(time.time(), 0)], maxlen=RATE_WINDOW + 1)
+
+    def count(self, events, received_at):
+        """Count one FEED_DATA message carrying events."""
+        self.messages += 1
+        self.events += events
+        if received_at - self._samples[-1][0] >= 1.0:
+            self._samples.append((received_at, self.messages))
+
+    def message_rate(self):
+        """FEED_DATA messages per second over about the last RATE_WINDOW seconds. Doesn't change any state."""
+        now = time.time()
+        samples = list(self._samples)
+        then, count = samples[-1]
+        for then, count in samples:
+            if then >= now - RATE_WINDOW:
+                break
+        return (self.messages - count) / (now - then) if now > then else 0.0
+
+    def stats(self):
+        return {
+            "channel": self.number,
+            "symbols": len(self.symbols),
+            "messages": self.messages,
+            "events": self.events,
+            "messages_per_second": self.message_rate()
+        }
+
+
+class MarketDataStream:
     """
-    Connect to the DXLink WebSocket and stream market data.
-    
-    :param dxlink_url: The WebSocket URL obtained from get_api_quote_token.
-    :param api_quote_token: The API quote token used for authorization.
-    :param symbols: (Optional) A list of symbols to subscribe to. If None, defaults to MARKET_DATA_SYMBOLS from config.py.
+    One DXLink connection that keeps itself alive.
+
+    If the socket drops, run() reconnects with jittered exponential backoff, replays the
+    SETUP/AUTH/CHANNEL_REQUEST/FEED_SETUP/FEED_SUBSCRIPTION handshake and restores the
+    current subscriptions. Symbols can be added or removed while connected with
+    subscribe()/unsubscribe(), which only send the delta. A rejected quote token is replaced through token_provider
+    (or get_api_quote_token with session_token) before the next attempt. Every outage is
+    recorded in self.outages with how long data was missing.
+
+    With channels > 1 the connection opens several FEED channels and spreads symbols
+    across them, each with its own decoder. Decoded events from every channel go to the
+    quote cache and to the callables registered with add_handler(), and are published to
+    bus (an event_bus.EventBus) if one is given.
     """
-    global is_connected
-    
-    # If no symbols provided, use default from config
-    if symbols is None:
-        symbols = MARKET_DATA_SYMBOLS
-    
-    async with websockets.connect(dxlink_url) as websocket:
-        print("Connected to DXLink WebSocket")
-        is_connected = True
+
+    def __init__(self, dxlink_url, api_quote_token, symbols=None, echo=True,
+                 token_provider=None, session_token=None, reconnect=True, channels=1, bus=None):
+        """
+        :param token_provider: (Optional) Callable returning a fresh (api_quote_token, dxlink_url) pair,
+            e.g. SessionManager.get_quote_token. Called from a worker thread.
+        :param session_token: (Optional) Used with get_api_quote_token when no token_provider is given.
+        :param reconnect: Reconnect automatically when the connection is lost.
+        :param channels: Number of FEED channels to open on this connection.
+        :param bus: (Optional) EventBus to publish decoded events to. With a bus, echo prints events
+            from a bus consumer instead of inside the receive loop (see stream_market_data).
+        """
+        self.dxlink_url = dxlink_url
+        self.api_quote_token = api_quote_token
+        self.echo = echo
+        self.token_provider = token_provider
+        self.session_token = session_token
+        self.reconnect = reconnect
+        self.bus = bus
+        self.last_received_at = None
+
+        # Odd channel numbers starting at 3, like the single-channel setup used before
+        self.channels = {}
+        for i in range(max(1, channels)):
+            self.channels[FEED_CHANNEL + 2 * i] = FeedChannel(FEED_CHANNEL + 2 * i)
+        self.handlers = []
+        self.raw_handlers = []
+        self._auth_frame = (None, None)
+        # symbol -> set of event types we are subscribed to, and symbol -> channel number
+        self.subscriptions = {}
+        self._symbol_channel = {}
+        for symbol in (MARKET_DATA_SYMBOLS if symbols is None else symbols):
+            self.subscriptions.setdefault(symbol, set()).update(DEFAULT_EVENT_TYPES)
+            self._assign_channel(symbol)
+
+        self.websocket = None
+        self.running = False
+        self.connected = False
+        self.reconnects = 0
+        self.outages = []
+        self._current_outage = None
+        self._token_stale = False
+        self._subscription_lock = asyncio.Lock()
+
+    def _log(self, *args):
+        if self.echo:
+            print(*args)
+
+    def add_handler(self, handler):
+        """Register handler(events, received_at), called with each decoded FEED_DATA batch."""
+        self.handlers.append(handler)
+
+    def remove_handler(self, handler):
+        if handler in self.handlers:
+            self.handlers.remove(handler)
+
+    def add_raw_handler(self, handler):
+        """
+        Register handler(raw, msg_type, received_at), called with every undecoded frame and its
+        top-level type before anything is parsed.
+        """
+        self.raw_handlers.append(handler)
+
+    def auth_frame(self):
+        """AUTH frame for the current quote token, serialized once per token."""
+        token, frame = self._auth_frame
+        if token != self.api_quote_token or frame is None:
+            frame = codec.dumps({"type": "AUTH", "channel": 0, "token": self.api_quote_token})
+            self._auth_frame = (self.api_quote_token, frame)
+        return frame
+
+    def _assign_channel(self, symbol):
+        """Channel number for symbol; new symbols go to the channel with the fewest symbols."""
+        number = self._symbol_channel.get(symbol)
+        if number is None:
+            channel = min(self.channels.values(), key=lambda c: len(c.symbols))
+            channel.symbols.add(symbol)
+            number = self._symbol_channel[symbol] = channel.number
+        return number
+
+    # --- connection lifecycle ------------------------------------------
+
+    async def run(self):
+        self.running = True
+        attempt = 0
         try:
-            # 1. SETUP
-            setup_msg = {
-                "type": "SETUP",
-                "channel": 0,
-                "version": "0.1-DXF-JS/0.3.0",
-                "keepaliveTimeout": 60,
-                "acceptKeepaliveTimeout": 60
-            }
-            await websocket.send(json.dumps(setup_msg))
-            print("Sent SETUP message")
-
-            setup_response = await websocket.recv()
-            print("Received SETUP Response:", setup_response)
-
-            # 2. Wait for AUTH_STATE: UNAUTHORIZED
-            auth_state_msg = await websocket.recv()
-            print("Received AUTH_STATE:", auth_state_msg)
-            auth_state = json.loads(auth_state_msg)
-            if auth_state.get("type") != "AUTH_STATE" or auth_state.get("state") != "UNAUTHORIZED":
-                raise Exception("Unexpected AUTH_STATE message.")
-
-            # 3. AUTHORIZE using the API quote token
-            auth_msg = {
-                "type": "AUTH",
-                "channel": 0,
-                "token": api_quote_token
-            }
-            await websocket.send(json.dumps(auth_msg))
-            print("Sent AUTH message with API Quote Token")
+            while self.running:
+                reason = "connection closed"
+                try:
+                    if self._token_stale:
+                        await self._refresh_token()
+                    async with websockets.connect(self.dxlink_url) as websocket:
+                        self.websocket = websocket
+                        print("Connected to DXLink WebSocket")
+                        await self._handshake(websocket)
+                        attempt = 0
+                        await self._receive_loop(websocket)
+                except websockets.exceptions.ConnectionClosed as e:
+                    reason = f"connection closed ({e})"
+                    print("WebSocket connection closed")
+                except DXLinkAuthError as e:
+                    reason = str(e)
+                    self._token_stale = True
+                    print(f"Market stream authorization failed: {e}")
+                except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException,
+                        DXLinkProtocolError) as e:
+                    reason = str(e) or e.__class__.__name__
+                    print(f"Market stream connection error: {reason}")
+                except Exception as e:
+                    # E.g. the token provider failing or a handler raising; retry like any other failure.
+                    # Cancellation is a BaseException and still ends the stream.
+                    reason = f"{e.__class__.__name__}: {e}"
+                    print(f"Market stream error: {reason}")
+                finally:
+                    self.websocket = None
+                    self.connected = False
+
+                if not self.running or not self.reconnect:
+                    break
+                attempt += 1
+                if RECONNECT_MAX_ATTEMPTS is not None and attempt > RECONNECT_MAX_ATTEMPTS:
+                    print(f"Giving up on the market stream after {RECONNECT_MAX_ATTEMPTS} reconnect attempts.")
+                    break
+                self._begin_outage(reason)
+                # Full jitter: spread reconnects so many clients don't retry in lockstep
+                delay = random.uniform(0, min(RECONNECT_BACKOFF_MAX, RECONNECT_BACKOFF_BASE * (2 ** (attempt - 1))))
+                print(f"Reconnecting to market stream in {delay:.1f}s (attempt {attempt})...")
+                await asyncio.sleep(delay)
+                self.reconnects += 1
+        finally:
+            self.running = False
+            self._end_outage(restored=False)
+            print("Disconnected from WebSocket.")
+
+    def stop(self):
+        self.running = False
+
+    async def _refresh_token(self):
+        if self.token_provider is not None:
+            self.api_quote_token, dxlink_url = await asyncio.to_thread(self.token_provider)
+        elif self.session_token is not None:
+            self.api_quote_token, dxlink_url = await asyncio.to_thread(get_api_quote_token, self.session_token)
+        else:
+            return
+        if dxlink_url:
+            self.dxlink_url = dxlink_url
+        self._token_stale = False
+
+    async def _handshake(self, websocket):
+        # 1. SETUP
+        await websocket.send(SETUP_FRAME)
+        self._log("Sent SETUP message")
+
+        setup_response = await websocket.recv()
+        self._log("Received SETUP Response:", setup_response)
 
-            auth_response = await websocket.recv()
-            print("Received AUTH Response:", auth_response)
-            auth_response_data = json.loads(auth_response)
-            if auth_response_data.get("type") != "AUTH_STATE" or auth_response_data.get("state") != "AUTHORIZED":
-                raise Exception("Authorization failed.")
+        # 2. Wait for AUTH_STATE: UNAUTHORIZED
+        auth_state_msg = await websocket.recv()
+        self._log("Received AUTH_STATE:", auth_state_msg)
+        auth_state = _decode(auth_state_msg)
+        if auth_state.get("type") != "AUTH_STATE" or auth_state.get("state") != "UNAUTHORIZED":
+            raise DXLinkProtocolError("Unexpected AUTH_STATE message.")
 
+        # 3. AUTHORIZE using the API quote token
+        await websocket.send(self.auth_frame())
+        self._log("Sent AUTH message with API Quote Token")
+
+        auth_response = await websocket.recv()
+        self._log("Received AUTH Response:", auth_response)
+        auth_response_data = _decode(auth_response)
+        if auth_response_data.get("type") != "AUTH_STATE" or auth_response_data.get("state") != "AUTHORIZED":
+            raise DXLinkAuthError("Authorization failed.")
+
+        for channel in self.channels.values():
             # 4. CHANNEL_REQUEST
-            channel_number = 3
-            channel_request_msg = {
-                "type": "CHANNEL_REQUEST",
-                "channel": channel_number,
-                "service": "FEED",
-                "parameters": {"contract": "AUTO"}
-            }
-            await websocket.send(json.dumps(channel_request_msg))
-            print(f"Sent CHANNEL_REQUEST for channel {channel_number}")
+            await websocket.send(channel.request_frame)
+            self._log(f"Sent CHANNEL_REQUEST for channel {channel.number}")
 
             channel_open_response = await websocket.recv()
-            print("Received CHANNEL_OPENED Response:", channel_open_response)
+            self._log("Received CHANNEL_OPENED Response:", channel_open_response)
 
             # 5. FEED_SETUP
-            feed_setup_msg = {
-                "type": "FEED_SETUP",
-                "channel": channel_number,
-                "acceptAggregationPeriod": 0.1,
-                "acceptDataFormat": "COMPACT",
-                "acceptEventFields": {
-                    "Trade": ["eventType", "eventSymbol", "price", "dayVolume", "size"],
-                    "Quote": ["eventType", "eventSymbol", "bidPrice", "askPrice", "bidSize", "askSize"],
-                    "Profile": [
-                        "eventType", "eventSymbol", "description", "shortSaleRestriction",
-                        "tradingStatus", "statusReason", "haltStartTime", "haltEndTime",
-                        "highLimitPrice", "lowLimitPrice", "high52WeekPrice", "low52WeekPrice"
-                    ],
-                    "Summary": [
-                        "eventType", "eventSymbol", "openInterest", "dayOpenPrice",
-                        "dayHighPrice", "dayLowPrice", "prevDayClosePrice"
-                    ]
-                }
-            }
-            await websocket.send(json.dumps(feed_setup_msg))
-            print("Sent FEED_SETUP message")
+            await websocket.send(channel.setup_frame)
+            self._log("Sent FEED_SETUP message")
 
             feed_setup_response = await websocket.recv()
-            print("Received FEED_SETUP Response:", feed_setup_response)
+            self._log("Received FEED_SETUP Response:", feed_setup_response)
+            channel.decoder = CompactDecoder()
+            feed_config = _decode(feed_setup_response)
+            if feed_config.get("type") == "FEED_CONFIG":
+                channel.decoder.update_from_config(feed_config)
+
+        # 6. FEED_SUBSCRIPTION - (re)subscribe everything we are tracking
+        async with self._subscription_lock:
+            for channel in self.channels.values():
+                entries = [
+                    {"type": event_type, "symbol": symbol}
+                    for symbol in channel.symbols
+                    for event_type in sorted(self.subscriptions[symbol])
+                ]
+                await self._send_subscription(websocket, channel.number, "add", entries, reset=True)
+            self._log(f"Sent FEED_SUBSCRIPTION for {len(self.subscriptions)} symbol(s)")
+            self.connected = True
 
-            # 6. FEED_SUBSCRIPTION
+    async def _send_subscription(self, websocket, channel_number, action, entries, reset=False):
+        """Send entries as FEED_SUBSCRIPTION messages of at most FEED_SUBSCRIPTION_BATCH_SIZE each."""
+        if not entries and not reset:
+            return
+        for start in range(0, max(len(entries), 1), FEED_SUBSCRIPTION_BATCH_SIZE):
             feed_subscription_msg = {
                 "type": "FEED_SUBSCRIPTION",
                 "channel": channel_number,
-                "reset": True,
-                "add": []
+                action: entries[start:start + FEED_SUBSCRIPTION_BATCH_SIZE]
             }
+            if reset and start == 0:
+                feed_subscription_msg["reset"] = True
+            await websocket.send(codec.dumps(feed_subscription_msg))
 
-            for symbol in symbols:
-                feed_subscription_msg["add"].extend([
-                    {"type": "Trade", "symbol": symbol},
-                    {"type": "Quote", "symbol": symbol},
-                    {"type": "Profile", "symbol": symbol},
-                    {"type": "Summary", "symbol": symbol}
-                ])
-
-            await websocket.send(json.dumps(feed_subscription_msg))
-            print("Sent FEED_SUBSCRIPTION message:", feed_subscription_msg)
+    # --- runtime subscriptions ---------------------------------------------
 
-            subscription_response = await websocket.recv()
-            print("Received Initial FEED_DATA/Subscription Response:", subscription_response)
+    async def subscribe(self, symbols, event_types=DEFAULT_EVENT_TYPES):
+        """
+        Add symbols/event types to the open channel. Only pairs we are not already subscribed
+        to are sent. Returns the number of (symbol, event type) pairs added.
+        """
+        async with self._subscription_lock:
+            entries = {}
+            for symbol in dict.fromkeys(symbols):
+                subscribed = self.subscriptions.setdefault(symbol, set())
+                channel_number = self._assign_channel(symbol)
+                for event_type in event_types:
+                    if event_type not in subscribed:
+                        subscribed.add(event_type)
+                        entries.setdefault(channel_number, []).append({"type": event_type, "symbol": symbol})
+            if self.connected and self.websocket is not None:
+                for channel_number, channel_entries in entries.items():
+                    await self._send_subscription(self.websocket, channel_number, "add", channel_entries)
+            return sum(len(channel_entries) for channel_entries in entries.values())
 
-            # 7. Keepalive loop
-            async def keepalive_loop():
-                while is_connected:
-                    keepalive_msg = {"type": "KEEPALIVE", "channel": 0}
-                    await websocket.send(json.dumps(keepalive_msg))
-                    print("Sent KEEPALIVE message")
-                    await asyncio.sleep(30)
+    async def unsubscribe(self, symbols, event_types=None):
+        """
+        Remove symbols from the open channel; event_types=None removes every event type.
+        Returns the number of (symbol, event type) pairs removed.
+        """
+        async with self._subscription_lock:
+            entries = {}
+            for symbol in dict.fromkeys(symbols):
+                subscribed = self.subscriptions.get(symbol)
+                if not subscribed:
+                    continue
+                channel_number = self._symbol_channel[symbol]
+                for event_type in list(subscribed if event_types is None else event_types):
+                    if event_type in subscribed:
+                        subscribed.discard(event_type)
+                        entries.setdefault(channel_number, []).append({"type": event_type, "symbol": symbol})
+                if not subscribed:
+                    del self.subscriptions[symbol]
+                    del self._symbol_channel[symbol]
+                    self.channels[channel_number].symbols.discard(symbol)
+            if self.connected and self.websocket is not None:
+                for channel_number, channel_entries in entries.items():
+                    await self._send_subscription(self.websocket, channel_number, "remove", channel_entries)
+            return sum(len(channel_entries) for channel_entries in entries.values())
 
-            keepalive_task = asyncio.create_task(keepalive_loop())
+    async def _receive_loop(self, websocket):
+        # 7. Keepalive loop
+        async def keepalive_loop():
+            while True:
+                await websocket.send(KEEPALIVE_FRAME)
+                self._log("Sent KEEPALIVE message")
+                await asyncio.sleep(30)
 
+        keepalive_task = asyncio.create_task(keepalive_loop())
+        try:
+            while self.running:
+                message = await websocket.recv()
+                events = self.handle_message(message)
+                if events and self.bus is not None and self.bus.has_subscribers():
+                    # Consumers read from their own queues; this only waits for block-policy subscribers
+                    await self.bus.publish([(event.eventType, event.eventSymbol, event) for event in events],
+                                           self.last_received_at)
+        finally:
+            keepalive_task.cancel()
             try:
-                while is_connected:
-                    if keyboard.is_pressed("esc"):
-                        print("\nEsc pressed. Returning to menu...")
-                        break
-                    try:
-                        message = await websocket.recv()
-                        data = json.loads(message)
-                        print("Market Data Received:", json.dumps(data, indent=2))
-                    except websockets.exceptions.ConnectionClosed:
-                        print("WebSocket connection closed")
-                        break
-            except asyncio.CancelledError:
-                print("Stream task cancelled.")
-            except Exception as e:
-                print("Error:", e)
-            finally:
-                keepalive_task.cancel()
-                try:
-                    await keepalive_task
-                except asyncio.CancelledError:
-                    pass
+                await keepalive_task
+            except (asyncio.CancelledError, websockets.exceptions.ConnectionClosed):
+                pass
+
+    # --- message handling ------------------------------------------------
+
+    def handle_message(self, message):
+        """Process one raw message. Returns the decoded events of a FEED_DATA message, else None."""
+        received_at = self.last_received_at = time.time()
+        msg_type = message_type(message)
+        for handler in self.raw_handlers:
+            handler(message, msg_type, received_at)
+        if msg_type == "KEEPALIVE" or (msg_type not in ("FEED_DATA", "FEED_CONFIG") and not self.echo):
+            # Nothing consumes these; skip the parse
+            return
+        data = _decode(message)
+        if msg_type == "FEED_DATA":
+            channel = self.channels.get(data.get("channel"))
+            if channel is None:
+                return
+            if self._current_outage is not None:
+                self._end_outage(restored=True, at=received_at)
+            events = channel.decoder.decode(data.get("data", []))
+            channel.count(len(events), received_at)
+            if self.bus is None:
+                # Without a bus the cache is kept here; otherwise by its own bus consumer
+                for event in events:
+                    quote_cache.update(event, received_at)
+                    if self.echo:
+                        print("Market Data Received:", event)
+            for handler in self.handlers:
+                handler(events, received_at)
+            return events
+        elif msg_type == "FEED_CONFIG":
+            channel = self.channels.get(data.get("channel"))
+            if channel is not None:
+                channel.decoder.update_from_config(data)
+        elif self.echo:
+            print("Market Data Received:", message)
+
+    # --- gap accounting ----------------------------------------------------
+
+    def _begin_outage(self, reason):
+        if self._current_outage is None:
+            # The gap began with the last message we got, not when we noticed it
+            started_at = self.last_received_at or time.time()
+            self._current_outage = {"started_at": started_at, "reason": reason, "attempts": 0}
+        self._current_outage["attempts"] += 1
+
+    def _end_outage(self, restored, at=None):
+        outage = self._current_outage
+        if outage is None:
+            return
+        self._current_outage = None
+        outage["restored_at"] = (at or time.time()) if restored else None
+        outage["duration"] = (outage["restored_at"] or time.time()) - outage["started_at"]
+        self.outages.append(outage)
+        if restored:
+            print(f"Market data restored after a {outage['duration']:.1f}s gap ({outage['attempts']} reconnect attempt(s)).")
+
+    def stats(self):
+        return {
+            "connected": self.connected,
+            "symbols": len(self.subscriptions),
+            "reconnects": self.reconnects,
+            "outages": len(self.outages),
+            "total_gap_seconds": sum(outage["duration"] for outage in self.outages),
+            "last_outage": self.outages[-1] if self.outages else None,
+            "in_outage_since": self._current_outage["started_at"] if self._current_outage else None,
+            "channels": [channel.stats() for channel in self.channels.values()]
+        }
+
+
+class ShardedMarketStream:
+    """
+    Spreads a large symbol universe over several DXLink connections, each with several
+    FEED channels, so no single socket, receive loop or decoder carries every symbol.
+
+    New symbols go to the least-loaded connection (and, inside it, the least-loaded
+    channel). Each shard reconnects on its own; their decoded events are merged into one
+    stream for the handlers registered with add_handler(). stats() reports message rates
+    per shard and channel so the load can be rebalanced.
+    """
+
+    def __init__(self, dxlink_url, api_quote_token, symbols=None, echo=True, token_provider=None,
+                 connections=SHARD_CONNECTIONS, channels_per_connection=SHARD_CHANNELS_PER_CONNECTION, bus=None):
+        self.shards = [
+            MarketDataStream(dxlink_url, api_quote_token, symbols=[], echo=echo,
+                             token_provider=token_provider, channels=channels_per_connection, bus=bus)
+            for _ in range(max(1, connections))
+        ]
+        self.handlers = []
+        self._symbol_shard = {}
+        for shard in self.shards:
+            shard.add_handler(self._merge)
+        for symbol in (MARKET_DATA_SYMBOLS if symbols is None else symbols):
+            shard = self._assign_shard(symbol)
+            shard.subscriptions.setdefault(symbol, set()).update(DEFAULT_EVENT_TYPES)
+            shard._assign_channel(symbol)
+
+    @property
+    def subscriptions(self):
+        merged = {}
+        for shard in self.shards:
+            merged.update(shard.subscriptions)
+        return merged
+
+    @property
+    def connected(self):
+        return all(shard.connected for shard in self.shards)
+
+    def add_handler(self, handler):
+        """Register handler(events, received_at); receives the merged output of every shard."""
+        self.handlers.append(handler)
+
+    def remove_handler(self, handler):
+        if handler in self.handlers:
+            self.handlers.remove(handler)
+
+    def add_raw_handler(self, handler):
+        for shard in self.shards:
+            shard.add_raw_handler(handler)
+
+    def _merge(self, events, received_at):
+        for handler in self.handlers:
+            handler(events, received_at)
+
+    def _assign_shard(self, symbol):
+        shard = self._symbol_shard.get(symbol)
+        if shard is None:
+            shard = min(self.shards, key=lambda s: len(s._symbol_channel))
+            self._symbol_shard[symbol] = shard
+        return shard
+
+    async def run(self):
+        tasks = [asyncio.create_task(shard.run(), name=f"market-shard-{i}") for i, shard in enumerate(self.shards)]
+        try:
+            await asyncio.gather(*tasks)
         finally:
-            is_connected = False
-            print("Disconnected from WebSocket.")
+            # One shard failing (or this task being cancelled) takes the others down with it,
+            # so none is left running where runtime.stop_task can't reach it
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
-async def disconnect_stream():
-    global is_connected
-    if is_connected:
-        is_connected = False
-        print("Disconnecting from market data stream...")
+    def stop(self):
+        for shard in self.shards:
+            shard.stop()
+
+    async def subscribe(self, symbols, event_types=DEFAULT_EVENT_TYPES):
+        by_shard = {}
+        for symbol in dict.fromkeys(symbols):
+            by_shard.setdefault(self._assign_shard(symbol), []).append(symbol)
+        added = await asyncio.gather(*(shard.subscribe(shard_symbols, event_types)
+                                       for shard, shard_symbols in by_shard.items()))
+        return sum(added)
+
+    async def unsubscribe(self, symbols, event_types=None):
+        by_shard = {}
+        for symbol in dict.fromkeys(symbols):
+            shard = self._symbol_shard.get(symbol)
+            if shard is not None:
+                by_shard.setdefault(shard, []).append(symbol)
+        removed = await asyncio.gather(*(shard.unsubscribe(shard_symbols, event_types)
+                                         for shard, shard_symbols in by_shard.items()))
+        for shard, shard_symbols in by_shard.items():
+            for symbol in shard_symbols:
+                if symbol not in shard.subscriptions:
+                    self._symbol_shard.pop(symbol, None)
+        return sum(removed)
+
+    def stats(self):
+        shard_stats = [shard.stats() for shard in self.shards]
+        in_outage = [s["in_outage_since"] for s in shard_stats if s["in_outage_since"]]
+        return {
+            "connected": all(s["connected"] for s in shard_stats),
+            "symbols": sum(s["symbols"] for s in shard_stats),
+            "reconnects": sum(s["reconnects"] for s in shard_stats),
+            "outages": sum(s["outages"] for s in shard_stats),
+            "total_gap_seconds": sum(s["total_gap_seconds"] for s in shard_stats),
+            "in_outage_since": min(in_outage) if in_outage else None,
+            "shards": [
+                {
+                    "shard": i,
+                    "connected": s["connected"],
+                    "symbols": s["symbols"],
+                    "messages_per_second": sum(c["messages_per_second"] for c in s["channels"]),
+                    "channels": s["channels"]
+                }
+                for i, s in enumerate(shard_stats)
+            ]
+        }
+
+
+async def stream_market_data(dxlink_url, api_quote_token, symbols=None, echo=True, token_provider=None,
+                             connections=SHARD_CONNECTIONS, channels_per_connection=SHARD_CHANNELS_PER_CONNECTION,
+                             handlers=None, bus=None):
+    """
+    Connect to the DXLink WebSocket and stream market data.
+
+    :param dxlink_url: The WebSocket URL obtained from get_api_quote_token.
+    :param api_quote_token: The API quote token used for authorization.
+    :param symbols: (Optional) A list of symbols to subscribe to. If None, defaults to MARKET_DATA_SYMBOLS from config.py.
+    :param echo: Print every received event. Turn off when the stream runs in the background (see runtime.py).
+    :param token_provider: (Optional) Callable returning a fresh (api_quote_token, dxlink_url) after an auth failure.
+    :param connections: Number of websocket connections to shard symbols across.
+    :param channels_per_connection: Number of FEED channels opened on each connection.
+    :param handlers: (Optional) Callables handler(events, received_at) that receive every decoded FEED_DATA batch.
+    :param bus: (Optional) EventBus to publish decoded events to. The quote cache, each handler and
+        the echo then run as bus consumers, so a slow one can't hold up the receive loop. The cache
+        keeps only the latest event per symbol and type (conflate); handlers get every event (block).
+        Echo prints conflated per-symbol snapshots if ECHO_CONFLATE is set, otherwise every event
+        through a drop-oldest queue.
+    """
+    global is_connected, active_stream
+
+    if connections > 1:
+        active_stream = ShardedMarketStream(dxlink_url, api_quote_token, symbols, echo=echo,
+                                            token_provider=token_provider, connections=connections,
+                                            channels_per_connection=channels_per_connection, bus=bus)
+    else:
+        active_stream = MarketDataStream(dxlink_url, api_quote_token, symbols, echo=echo,
+                                         token_provider=token_provider, channels=channels_per_connection, bus=bus)
+    consumers = []
+    if bus is None:
+        for handler in handlers or []:
+            active_stream.add_handler(handler)
     else:
-        print("No active market data connection to disconnect.")
+        consumers.append(HandlerConsumer(bus, [quote_cache.update_many], batched=True, event_types=EVENT_CLASSES,
+                                         maxsize=CONFLATION_MAX_KEYS, policy=CONFLATE, name="quote-cache").start())
+        for handler in handlers or []:
+            consumers.append(HandlerConsumer(bus, [handler], batched=True, event_types=EVENT_CLASSES,
+                                             name=getattr(handler, "__qualname__", "market-handler")).start())
+    echo_subscription = echo_task = None
+    if echo and bus is not None and ECHO_CONFLATE:
+        conflator = Conflator(bus, event_types=EVENT_CLASSES, name="market-echo")
+        echo_subscription = conflator.subscription
+        echo_task = asyncio.create_task(_print_snapshots(conflator))
+    elif echo and bus is not None:
+        echo_subscription = bus.subscribe(event_types=EVENT_CLASSES, policy=DROP_OLDEST, name="market-echo")
+        echo_task = asyncio.create_task(_print_events(echo_subscription))
+    is_connected = True
+    try:
+        await active_stream.run()
+    except asyncio.CancelledError:
+        print("Stream task cancelled.")
+        raise
+    finally:
+        is_connected = False
+        if echo_task is not None:
+            echo_task.cancel()
+            bus.unsubscribe(echo_subscription)
+        for consumer in consumers:
+            await consumer.stop()
+
+async def _print_events(subscription):
+    async for event in subscription:
+        print("Market Data Received:", event)
+
+async def _print_snapshots(conflator):
+    async for snapshot, skipped in conflator:
+        for event in snapshot.values():
+            print("Market Data Received:", event)
+        if skipped:
+            print(f"({skipped} intermediate update(s) conflated)")
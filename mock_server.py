@@ -0,0 +1,478 @@
+# mock_server.py
+"""
+Local stand-in for the DXLink market data endpoint and the account streamer.
+
+Run it and point the CLI at it with config.DXLINK_URL / config.ACCOUNT_STREAMER_URL:
+
+    python mock_server.py --rate 2000 --batch 10
+    python mock_server.py --replay ticks/20240105 --rate 5000
+
+The DXLink side speaks the SETUP / AUTH_STATE / CHANNEL_OPENED / FEED_CONFIG / FEED_DATA sequence
+and emits COMPACT FEED_DATA for whatever each channel subscribed to, either synthetic
+(random-walk quotes and trades) or replayed from tick_recorder files (replayed events keep
+their recorded symbols). The account side answers connect/heartbeat and pushes synthetic
+AccountBalance updates. MockRestServer answers the account, order and instrument REST endpoints.
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+import websockets
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+from feed_decoder import FEED_EVENT_FIELDS
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_DXLINK_PORT = 8765
+DEFAULT_ACCOUNT_PORT = 8766
+
+
+class SyntheticFeed:
+    """Random-walk Quote/Trade/Summary/Profile values for any symbol, laid out by field name."""
+
+    def __init__(self, seed=None):
+        self._random = random.Random(seed)
+        self._prices = {}
+        self._volumes = {}
+
+    def _step(self, symbol):
+        price = self._prices.get(symbol) or self._random.uniform(20, 500)
+        price = max(0.01, price * (1 + self._random.gauss(0, 0.0005)))
+        self._prices[symbol] = price
+        return price
+
+    def values(self, event_type, symbol, fields):
+        price = self._step(symbol)
+        spread = max(0.01, round(price * 0.0002, 2))
+        size = self._random.randint(1, 500)
+        self._volumes[symbol] = self._volumes.get(symbol, 0) + size
+        known = {
+            "eventType": event_type,
+            "eventSymbol": symbol,
+            "price": round(price, 2),
+            "size": size,
+            "dayVolume": self._volumes[symbol],
+            "bidPrice": round(price - spread / 2, 2),
+            "askPrice": round(price + spread / 2, 2),
+            "bidSize": self._random.randint(1, 1000),
+            "askSize": self._random.randint(1, 1000),
+            "openInterest": 0,
+            "dayOpenPrice": round(price, 2),
+            "dayHighPrice": round(price * 1.01, 2),
+            "dayLowPrice": round(price * 0.99, 2),
+            "prevDayClosePrice": round(price, 2),
+            "description": f"{symbol} (mock)",
+            "tradingStatus": "ACTIVE"
+        }
+        return [known.get(name, "NaN") for name in fields]
+
+
+class ReplayFeed:
+    """Replays Trade/Quote records from a tick_recorder day directory, looping at the end."""
+
+    def __init__(self, day_dir):
+        from tick_recorder import TickReader, RECORD_LAYOUTS
+        directory, day = os.path.split(os.path.normpath(day_dir))
+        reader = TickReader(directory)
+        self._symbols = reader.symbols(day)
+        self._records = {event_type: reader.load(day, event_type) for event_type in RECORD_LAYOUTS}
+        self._fields = {event_type: layout["fields"] for event_type, layout in RECORD_LAYOUTS.items()}
+        self._positions = {event_type: 0 for event_type in RECORD_LAYOUTS}
+
+    @property
+    def symbols(self):
+        return list(self._symbols)
+
+    def next_event(self, event_type):
+        """(symbol, {field: value}) of the next recorded event of event_type, or None if none were recorded."""
+        records = self._records.get(event_type)
+        if records is None or len(records) == 0:
+            return None
+        position = self._positions[event_type] % len(records)
+        self._positions[event_type] = position + 1
+        record = records[position]
+        values = {name: float(record[name]) for name in self._fields[event_type]}
+        return self._symbols[int(record["symbol_id"])], values
+
+
+class MockServer:
+    """
+    Serves a DXLink endpoint and an account-streamer endpoint on two local ports.
+
+    :param rate: FEED_DATA messages per second per FEED channel with subscriptions.
+    :param batch: Events per FEED_DATA message.
+    :param event_types: Event types the load generator emits (must be subscribed to be sent).
+    :param replay_dir: (Optional) tick_recorder day directory to replay instead of synthetic data.
+    :param account_rate: AccountBalance messages per second per account-streamer connection.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, dxlink_port=DEFAULT_DXLINK_PORT, account_port=DEFAULT_ACCOUNT_PORT,
+                 rate=100, batch=10, event_types=("Quote", "Trade"), replay_dir=None, account_rate=1,
+                 seed=None):
+        self.host = host
+        self.dxlink_port = dxlink_port
+        self.account_port = account_port
+        self.rate = rate
+        self.batch = batch
+        self.event_types = tuple(event_types)
+        self.account_rate = account_rate
+        self.synthetic = SyntheticFeed(seed)
+        self.replay = ReplayFeed(replay_dir) if replay_dir else None
+        self.messages_sent = 0
+        self.events_sent = 0
+        self._servers = []
+
+    @property
+    def dxlink_url(self):
+        return f"ws://{self.host}:{self.dxlink_port}"
+
+    @property
+    def account_url(self):
+        return f"ws://{self.host}:{self.account_port}"
+
+    async def start(self):
+        self._servers = [
+            await websockets.serve(self._dxlink_handler, self.host, self.dxlink_port),
+            await websockets.serve(self._account_handler, self.host, self.account_port)
+        ]
+        # Port 0 asks the OS for a free port; report the one we actually got
+        self.dxlink_port = list(self._servers[0].sockets)[0].getsockname()[1]
+        self.account_port = list(self._servers[1].sockets)[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers = []
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Mock DXLink server on {self.dxlink_url}, account streamer on {self.account_url}")
+        try:
+            await asyncio.Future()
+        finally:
+            await self.stop()
+
+    # --- DXLink ------------------------------------------------------------
+
+    async def _dxlink_handler(self, websocket, *_):
+        channels = {}
+        generators = {}
+        try:
+            async for message in websocket:
+                data = json.loads(message)
+                msg_type = data.get("type")
+                channel = data.get("channel", 0)
+                if msg_type == "SETUP":
+                    await websocket.send(json.dumps({
+                        "type": "SETUP", "channel": 0, "version": "1.0-mock",
+                        "keepaliveTimeout": 60, "acceptKeepaliveTimeout": 60
+                    }))
+                    await websocket.send(json.dumps({"type": "AUTH_STATE", "channel": 0, "state": "UNAUTHORIZED"}))
+                elif msg_type == "AUTH":
+                    await websocket.send(json.dumps({"type": "AUTH_STATE", "channel": 0, "state": "AUTHORIZED"}))
+                elif msg_type == "CHANNEL_REQUEST":
+                    channels[channel] = {"fields": dict(FEED_EVENT_FIELDS), "symbols": {}}
+                    await websocket.send(json.dumps({
+                        "type": "CHANNEL_OPENED", "channel": channel,
+                        "service": data.get("service"), "parameters": data.get("parameters", {})
+                    }))
+                elif msg_type == "FEED_SETUP" and channel in channels:
+                    channels[channel]["fields"] = data.get("acceptEventFields") or channels[channel]["fields"]
+                    await websocket.send(json.dumps({
+                        "type": "FEED_CONFIG", "channel": channel,
+                        "aggregationPeriod": data.get("acceptAggregationPeriod", 0.1),
+                        "dataFormat": "COMPACT",
+                        "eventFields": channels[channel]["fields"]
+                    }))
+                elif msg_type == "FEED_SUBSCRIPTION" and channel in channels:
+                    symbols = channels[channel]["symbols"]
+                    if data.get("reset"):
+                        symbols.clear()
+                    for entry in data.get("add", []):
+                        symbols.setdefault(entry["symbol"], set()).add(entry["type"])
+                    for entry in data.get("remove", []):
+                        event_types = symbols.get(entry["symbol"])
+                        if event_types is not None:
+                            event_types.discard(entry["type"])
+                            if not event_types:
+                                del symbols[entry["symbol"]]
+                    if channel not in generators:
+                        generators[channel] = asyncio.create_task(self._generate(websocket, channel, channels[channel]))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            for task in generators.values():
+                task.cancel()
+
+    async def _generate(self, websocket, channel, state):
+        """Send FEED_DATA at self.rate messages/second, catching up in bursts if the loop falls behind."""
+        interval = 1.0 / self.rate if self.rate > 0 else 0
+        next_send = time.perf_counter()
+        cursor = 0
+        while True:
+            symbols = state["symbols"]
+            if not symbols:
+                await asyncio.sleep(0.05)
+                next_send = time.perf_counter()
+                continue
+            pairs = [(symbol, event_type) for symbol, event_types in symbols.items()
+                     for event_type in self.event_types if event_type in event_types]
+            if pairs:
+                by_type = {}
+                for i in range(self.batch):
+                    symbol, event_type = pairs[(cursor + i) % len(pairs)]
+                    by_type.setdefault(event_type, []).extend(self._event_values(event_type, symbol, state["fields"]))
+                cursor += self.batch
+                payload = []
+                for event_type, values in by_type.items():
+                    payload += [event_type, values]
+                await websocket.send(json.dumps({"type": "FEED_DATA", "channel": channel, "data": payload}))
+                self.messages_sent += 1
+                self.events_sent += self.batch
+
+            next_send += interval
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif delay < -1.0:
+                # Too far behind to catch up; reset instead of bursting forever
+                next_send = time.perf_counter()
+            else:
+                await asyncio.sleep(0)
+
+    def _event_values(self, event_type, symbol, event_fields):
+        fields = event_fields.get(event_type, FEED_EVENT_FIELDS.get(event_type, ["eventType", "eventSymbol"]))
+        if self.replay is not None:
+            recorded = self.replay.next_event(event_type)
+            if recorded is not None:
+                recorded_symbol, values = recorded
+                values.update({"eventType": event_type, "eventSymbol": recorded_symbol})
+                return [values.get(name, "NaN") for name in fields]
+        return self.synthetic.values(event_type, symbol, fields)
+
+    # --- account streamer ----------------------------------------------------
+
+    async def _account_handler(self, websocket, *_):
+        accounts = []
+        pusher = None
+        try:
+            async for message in websocket:
+                data = json.loads(message)
+                action = data.get("action")
+                if action == "connect":
+                    accounts = data.get("value") or []
+                    await websocket.send(json.dumps({
+                        "status": "ok", "action": "connect",
+                        "web-socket-session-id": f"mock-{id(websocket)}",
+                        "value": accounts, "request-id": data.get("request-id")
+                    }))
+                    if pusher is None and self.account_rate > 0:
+                        pusher = asyncio.create_task(self._push_balances(websocket, accounts))
+                elif action == "heartbeat":
+                    await websocket.send(json.dumps({
+                        "status": "ok", "action": "heartbeat", "request-id": data.get("request-id")
+                    }))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            if pusher is not None:
+                pusher.cancel()
+
+    async def _push_balances(self, websocket, accounts):
+        net_liq = {account: 100000.0 for account in accounts}
+        while True:
+            for account in accounts:
+                net_liq[account] *= 1 + random.gauss(0, 0.0005)
+                await websocket.send(json.dumps({
+                    "type": "AccountBalance",
+                    "data": {
+                        "account-number": account,
+                        "net-liquidating-value": f"{net_liq[account]:.2f}",
+                        "cash-balance": "50000.00",
+                        "equity-buying-power": f"{net_liq[account] * 2:.2f}",
+                        "derivative-buying-power": f"{net_liq[account]:.2f}",
+                        "updated-at": time.strftime("%Y-%m-%dT%H:%M:%S.000+00:00", time.gmtime())
+                    },
+                    "timestamp": int(time.time() * 1000)
+                }))
+            await asyncio.sleep(1.0 / self.account_rate)
+
+
+#-----------------------------------------------------------------------------
+
+
+# Instrument metadata served by the mock, keyed by the /instruments/<kind> path segment
+MOCK_INSTRUMENTS = {
+    "equities": {"active": True, "tick-sizes": [{"value": "0.0001", "threshold": "1.0"}, {"value": "0.01"}],
+                 "option-tick-sizes": [{"value": "0.01", "threshold": "3.0"}, {"value": "0.05"}]},
+    "equity-options": {"active": True, "underlying-symbol": "SPY"},
+    "futures": {"active": True, "tick-size": "0.25"},
+    "cryptocurrencies": {"active": True, "tick-size": "0.01",
+                         "destination-venue-symbols": [{"quantity-precision": 8, "price-precision": 2}]}
+}
+
+
+class _RestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    disable_nagle_algorithm = True  # headers and body are separate writes; don't stall keep-alive replies
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload):
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        if len(parts) == 3 and parts[0] == "accounts" and parts[2] == "balances":
+            self._reply(200, {"data": {
+                "account-number": parts[1],
+                "net-liquidating-value": "100000.00",
+                "cash-balance": "50000.00",
+                "long-equity-value": "50000.00",
+                "short-equity-value": "0.00",
+                "equity-buying-power": "200000.00",
+                "derivative-buying-power": "100000.00",
+                "cash-available-to-withdraw": "50000.00"
+            }})
+        elif len(parts) == 3 and parts[0] == "accounts" and parts[2] == "positions":
+            self._reply(200, {"data": {"items": [
+                {"account-number": parts[1], "symbol": f"MOCK{i}", "instrument-type": "Equity",
+                 "quantity": "10", "quantity-direction": "Long", "close-price": "100.0",
+                 "average-open-price": "95.0", "realized-day-gain": "0.0", "realized-today": "0.0",
+                 "updated-at": "2024-01-05T15:00:00.000+00:00"}
+                for i in range(self.server.positions)
+            ]}})
+        elif len(parts) == 4 and parts[0] == "accounts" and parts[2:] == ["orders", "live"]:
+            self._reply(200, {"data": {"items": [
+                {"id": 1000 + i, "account-number": parts[1], "underlying-symbol": f"MOCK{i}",
+                 "order-type": "Limit", "size": 1, "status": "Live", "price": "1.00",
+                 "time-in-force": "Day", "price-effect": "Debit",
+                 "legs": [{"instrument-type": "Equity", "symbol": f"MOCK{i}", "action": "Buy to Open", "quantity": 1}]}
+                for i in range(self.server.orders)
+            ]}})
+        elif len(parts) == 4 and parts[0] == "accounts" and parts[2] == "orders" and parts[3].isdigit():
+            self._reply(200, {"data": {
+                "id": int(parts[3]), "account-number": parts[1], "underlying-symbol": "MOCK0",
+                "order-type": "Limit", "size": 1, "status": "Live", "price": "1.00",
+                "time-in-force": "Day", "price-effect": "Debit",
+                "legs": [{"instrument-type": "Equity", "symbol": "MOCK0", "action": "Buy to Open", "quantity": 1}]
+            }})
+        elif len(parts) == 3 and parts[0] == "instruments" and parts[1] in MOCK_INSTRUMENTS:
+            # Every symbol exists except those starting with "BAD"
+            symbol = unquote(parts[2])
+            if symbol.startswith("BAD"):
+                self._reply(404, {"error": {"code": "record_not_found", "message": f"{symbol} not found"}})
+            else:
+                self._reply(200, {"data": dict(MOCK_INSTRUMENTS[parts[1]], symbol=symbol)})
+        else:
+            self._reply(404, {"error": {"message": f"no mock for GET {self.path}"}})
+
+    def do_POST(self):
+        parts = self.path.strip("/").split("/")
+        body = self._read_body() or {}
+        if len(parts) == 3 and parts[0] == "accounts" and parts[2] == "orders":
+            self.server.next_order_id += 1
+            self._reply(201, {"data": {"order": dict(body, id=self.server.next_order_id, status="Received")}})
+        else:
+            self._reply(404, {"error": {"message": f"no mock for POST {self.path}"}})
+
+    def do_PUT(self):
+        parts = self.path.strip("/").split("/")
+        body = self._read_body() or {}
+        if len(parts) == 4 and parts[0] == "accounts" and parts[2] == "orders":
+            self.server.next_order_id += 1
+            self._reply(200, {"data": dict(body, id=self.server.next_order_id, status="Received")})
+        else:
+            self._reply(404, {"error": {"message": f"no mock for PUT {self.path}"}})
+
+    def do_DELETE(self):
+        parts = self.path.strip("/").split("/")
+        if len(parts) == 4 and parts[0] == "accounts" and parts[2] == "orders":
+            self._reply(200, {"data": {"id": parts[3], "status": "Cancelled"}})
+        else:
+            self._reply(404, {"error": {"message": f"no mock for DELETE {self.path}"}})
+
+
+class MockRestServer:
+    """
+    Threaded local HTTP server answering the account and order endpoints the CLI calls,
+    for timing REST paths without the network. delay adds a fixed per-request latency.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=0, delay=0.0, positions=10, orders=10):
+        self._server = ThreadingHTTPServer((host, port), _RestHandler)
+        self._server.daemon_threads = True
+        self._server.delay = delay
+        self._server.positions = positions
+        self._server.orders = orders
+        self._server.next_order_id = 10000
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-rest", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local DXLink and account-streamer stand-in with a load generator.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--dxlink-port", type=int, default=DEFAULT_DXLINK_PORT)
+    parser.add_argument("--account-port", type=int, default=DEFAULT_ACCOUNT_PORT)
+    parser.add_argument("--rate", type=float, default=100, help="FEED_DATA messages per second per channel")
+    parser.add_argument("--batch", type=int, default=10, help="events per FEED_DATA message")
+    parser.add_argument("--event-types", default="Quote,Trade", help="comma separated event types to emit")
+    parser.add_argument("--replay", default=None, help="tick_recorder day directory to replay, e.g. ticks/20240105")
+    parser.add_argument("--account-rate", type=float, default=1, help="AccountBalance messages per second")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--rest-port", type=int, default=None,
+                        help="also serve the account/order REST endpoints on this port (point config.BASE_URL at it)")
+    parser.add_argument("--rest-delay", type=float, default=0.0, help="simulated REST latency in seconds")
+    args = parser.parse_args()
+
+    server = MockServer(
+        host=args.host, dxlink_port=args.dxlink_port, account_port=args.account_port,
+        rate=args.rate, batch=args.batch, event_types=args.event_types.split(","),
+        replay_dir=args.replay, account_rate=args.account_rate, seed=args.seed
+    )
+    rest_server = None
+    if args.rest_port is not None:
+        rest_server = MockRestServer(host=args.host, port=args.rest_port, delay=args.rest_delay).start()
+        print(f"Mock REST API on {rest_server.url}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\nMock server stopped.")
+    finally:
+        if rest_server is not None:
+            rest_server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+# order_tracker.py
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future
+from rest_stats import LATENCY_BUCKETS_MS
+
+ORDER_MESSAGE = "Order"
+TERMINAL_STATUSES = {"Filled", "Cancelled", "Rejected", "Expired", "Removed"}
+STAGES = ("ack", "live", "fill")  # submit -> POST response, -> first Live, -> Filled
+UNCLAIMED_LIMIT = 1000  # stream updates kept for orders not registered yet
+FINISHED_LIMIT = 1000  # finished orders kept for inspection before the oldest are forgotten
+LATENCY_SAMPLES = 1000  # most recent latencies per histogram used for the percentiles
+
+
+def order_key(order_id):
+    """Order ids arrive as ints from the API and the stream but as str from input() and ttctl."""
+    if isinstance(order_id, str) and order_id.strip().isdigit():
+        return int(order_id)
+    return order_id
+
+
+class LatencyHistogram:
+    __slots__ = ("count", "total", "max", "buckets", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+
+    def add(self, seconds):
+        ms = seconds * 1000
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        self.samples.append(ms)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def as_dict(self):
+        ordered = sorted(self.samples)
+        pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else None,
+            "p50_ms": pick(0.50),
+            "p95_ms": pick(0.95),
+            "max_ms": self.max if self.count else None,
+            "histogram": dict(zip(labels, self.buckets))
+        }
+
+
+class TrackedOrder:
+    """
+    One submitted order and the status changes seen for it. done is a concurrent.futures.Future
+    resolved with the final status, so it can be waited on from any thread (wait()) or
+    awaited on an event loop (await wait_async()).
+    """
+
+    def __init__(self, order_id, account_number, order_type, instrument_type, submitted_at, acked_at, status):
+        self.order_id = order_id
+        self.account_number = account_number
+        self.order_type = order_type
+        self.instrument_type = instrument_type
+        self.submitted_at = submitted_at
+        self.acked_at = acked_at
+        self.live_at = None
+        self.filled_at = None
+        self.status = status
+        self.history = [(status, acked_at)]
+        self.done = Future()
+
+    @property
+    def key(self):
+        return (self.order_type, self.instrument_type)
+
+    def wait(self, timeout=None):
+        """Block until the order reaches a final status; returns it. Raises TimeoutError."""
+        return self.done.result(timeout)
+
+    async def wait_async(self, timeout=None):
+        return await asyncio.wait_for(asyncio.wrap_future(self.done), timeout)
+
+    def as_dict(self):
+        return {
+            "order_id": self.order_id,
+            "account_number": self.account_number,
+            "order_type": self.order_type,
+            "instrument_type": self.instrument_type,
+            "status": self.status,
+            "history": self.history,
+            "ack_ms": (self.acked_at - self.submitted_at) * 1000,
+            "live_ms": (self.live_at - self.submitted_at) * 1000 if self.live_at else None,
+            "fill_ms": (self.filled_at - self.submitted_at) * 1000 if self.filled_at else None
+        }
+
+
+class OrderTracker:
+    """
+    Follows submitted orders through Received -> Live -> Filled/Cancelled/Rejected using the
+    account streamer's Order messages (handle_message is a stream_account_data handler),
+    and keeps submit->ack, submit->live and submit->fill latency histograms per
+    (order type, instrument type).
+
+    The stream can report an order before the POST that created it has returned; such
+    updates are held until register() claims them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._orders = {}
+        self._unclaimed = {}
+        self._finished = deque()
+        self._histograms = {}
+
+    def register(self, order, account_number, submitted_at, acked_at=None):
+        """
+        Start tracking an order from the POST /orders response.
+
+        :param order: The "order" object of the response (needs id; status, order-type and legs are used if present).
+        :param submitted_at: Epoch time the POST was sent.
+        :param acked_at: Epoch time the response arrived (defaults to now).
+        """
+        acked_at = acked_at or time.time()
+        legs = order.get("legs") or [{}]
+        tracked = TrackedOrder(order_key(order.get("id")), account_number, order.get("order-type"),
+                               legs[0].get("instrument-type"), submitted_at, acked_at,
+                               order.get("status") or "Received")
+        with self._lock:
+            self._orders[tracked.order_id] = tracked
+            self._histogram(tracked.key, "ack").add(acked_at - submitted_at)
+            early = self._unclaimed.pop(tracked.order_id, [])
+        self._apply(tracked, tracked.status, acked_at)
+        for status, at in early:
+            self._apply(tracked, status, at)
+        return tracked
+
+    def _histogram(self, key, stage):
+        histograms = self._histograms.get(key)
+        if histograms is None:
+            histograms = self._histograms[key] = {name: LatencyHistogram() for name in STAGES}
+        return histograms[stage]
+
+    def _apply(self, tracked, status, at):
+        with self._lock:
+            if tracked.done.done():
+                return
+            if status != tracked.history[-1][0]:
+                tracked.history.append((status, at))
+            tracked.status = status
+            if status == "Live" and tracked.live_at is None:
+                tracked.live_at = at
+                self._histogram(tracked.key, "live").add(at - tracked.submitted_at)
+            if status == "Filled" and tracked.filled_at is None:
+                tracked.filled_at = at
+                self._histogram(tracked.key, "fill").add(at - tracked.submitted_at)
+            final = status in TERMINAL_STATUSES
+            if final:
+                self._finished.append(tracked.order_id)
+                while len(self._finished) > FINISHED_LIMIT:
+                    # Keeps a long-running daemon from holding every order it ever placed
+                    self._orders.pop(self._finished.popleft(), None)
+        if final:
+            tracked.done.set_result(status)
+
+    def handle_message(self, message, received_at=None):
+        """Stream handler: apply Order status updates to tracked orders."""
+        if message.get("type") != ORDER_MESSAGE:
+            return
+        data = message.get("data") or {}
+        order_id = order_key(data.get("id"))
+        status = data.get("status")
+        if order_id is None or status is None:
+            return
+        received_at = received_at or time.time()
+        with self._lock:
+            tracked = self._orders.get(order_id)
+            if tracked is None:
+                early = self._unclaimed.setdefault(order_id, [])
+                early.append((status, received_at))
+                if len(self._unclaimed) > UNCLAIMED_LIMIT:
+                    # Orders placed elsewhere (web, mobile) are never claimed; forget the oldest
+                    del self._unclaimed[next(iter(self._unclaimed))]
+                return
+        self._apply(tracked, status, received_at)
+
+    # Alias so the tracker can be passed anywhere a handler is expected
+    __call__ = handle_message
+
+    def get(self, order_id):
+        return self._orders.get(order_key(order_id))
+
+    def last_status(self, order_id):
+        """
+        Latest status the stream reported for order_id, including orders that were never
+        registered (placed elsewhere, or before this session), or None.
+        """
+        order_id = order_key(order_id)
+        with self._lock:
+            tracked = self._orders.get(order_id)
+            if tracked is not None:
+                return tracked.status
+            early = self._unclaimed.get(order_id)
+            return early[-1][0] if early else None
+
+    def orders(self):
+        with self._lock:
+            return list(self._orders.values())
+
+    def stats(self):
+        """
+        {"order type / instrument type": {"ack": {...}, "live": {...}, "fill": {...}}}. Counts, means
+        and maxima cover every order; percentiles the last LATENCY_SAMPLES of each stage.
+        """
+        with self._lock:
+            return {
+                f"{order_type} / {instrument_type}": {stage: h.as_dict() for stage, h in histograms.items()}
+                for (order_type, instrument_type), histograms in self._histograms.items()
+            }
+
+    def print_stats(self):
+        orders = self.orders()
+        print("\n--- Order Lifecycle ---")
+        if not orders:
+            print("No orders tracked yet.")
+            return
+        open_orders = [order for order in orders if not order.done.done()]
+        print(f"Tracked: {len(orders)}, still open: {len(open_orders)}")
+        fmt = lambda value: f"{value:.0f}" if value is not None else "-"
+        print(f"{'Order / Instrument':<36}{'Stage':>6}{'Count':>7}{'Mean':>8}{'p50':>8}{'p95':>8}{'Max':>8}")
+        for name, stages in self.stats().items():
+            for stage, stats in stages.items():
+                if stats["count"]:
+                    print(f"{name:<36}{stage:>6}{stats['count']:>7}{fmt(stats['mean_ms']):>8}"
+                          f"{fmt(stats['p50_ms']):>8}{fmt(stats['p95_ms']):>8}{fmt(stats['max_ms']):>8}")
+        print("(latencies in ms from submit)")
+        for order in orders[-10:]:
+            print(f"Order {order.order_id}: " + " -> ".join(status for status, _ in order.history))
+
+
+# Shared tracker fed by the account stream (see main.menu() and daemon.py)
+order_tracker = OrderTracker()
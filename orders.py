@@ -1,19 +1,38 @@
 # orders.py
 import requests
-import json
-import keyboard
+from http_client import client
+import codec
+from quote_cache import quote_cache
+from instruments import instrument_cache, snap_price
+from order_tracker import order_tracker, order_key, TERMINAL_STATUSES
+from runtime import runtime, MARKET_STREAM
+import math
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from config import BASE_URL
+from config import (
+    CANCEL_MAX_WORKERS,
+    CANCEL_MAX_RETRIES,
+    CANCEL_RETRY_BACKOFF,
+    CHASE_INTERVAL,
+    CHASE_MAX_REPLACES,
+    CHASE_TARGET,
+    CHASE_QUOTE_WAIT
+)
+
+ACTIVE_ORDER_STATUSES = {"Received", "Live", "Pending", "Working"}
+
+def get_live_orders(session_token, account_number):
+    """Active orders of one account. Raises requests.exceptions.RequestException on failure."""
+    response = client.get(f"/accounts/{account_number}/orders/live", session_token=session_token)
+    response.raise_for_status()
+    all_items = codec.loads_response(response).get("data", {}).get("items", [])
+    return [order for order in all_items if order.get('status') in ACTIVE_ORDER_STATUSES]
 
 def fetch_live_orders(session_token, account_number):
-    url = f"{BASE_URL}/accounts/{account_number}/orders/live"
-    headers = {"Authorization": session_token}
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        all_items = response.json().get("data", {}).get("items", [])
-        active_statuses = {"Received", "Live", "Pending", "Working"}
-        active_orders = [order for order in all_items if order.get('status') in active_statuses]
+        active_orders = get_live_orders(session_token, account_number)
         
         if not active_orders:
             print("\n--- No Active Orders Found ---")
@@ -39,21 +58,127 @@ def fetch_live_orders(session_token, account_number):
         if hasattr(e, 'response') and e.response is not None:
             print(f"Error details: {e.response.text}")
 
-def submit_order(session_token, account_number):
-    url = f"https://api.cert.tastyworks.com/accounts/{account_number}/orders"
-    headers = {
-        "Authorization": session_token,
-        "Content-Type": "application/json"
+ORDER_TYPES = ["Limit", "Market", "Stop", "Stop Limit", "Notional Market"]
+PRICED_ORDER_TYPES = {"Limit", "Stop", "Stop Limit"}
+TIME_IN_FORCE = ["Day", "GTC", "GTD"]
+INSTRUMENT_TYPES = ["Equity", "Equity Option", "Future", "Cryptocurrency"]
+ACTIONS = ["Buy to Open", "Sell to Close", "Sell to Open", "Buy to Close"]
+PRICE_EFFECTS = ["Credit", "Debit", "None"]
+
+def _numbered(options):
+    return {str(i): value for i, value in enumerate(options, 1)}
+
+def _check_choice(name, value, options):
+    if value not in options:
+        raise ValueError(f"Invalid {name} {value!r}; expected one of: {', '.join(options)}")
+    return value
+
+def validate_gtd_date(gtc_date):
+    """Raise ValueError unless gtc_date is a YYYY-MM-DD date in the future."""
+    try:
+        date_obj = datetime.strptime(gtc_date, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        raise ValueError("Invalid date format. Use YYYY-MM-DD.")
+    if date_obj.date() <= datetime.now().date():
+        raise ValueError("GTD date must be in the future.")
+    return gtc_date
+
+def validate_quantity(quantity, instrument_type):
+    """Positive, finite quantity; whole numbers except for cryptocurrency. Returns it as int or float."""
+    try:
+        value = float(quantity)
+        if not math.isfinite(value):
+            raise ValueError
+        if instrument_type != "Cryptocurrency":
+            if value != int(value):
+                raise ValueError
+            value = int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"Invalid quantity {quantity!r}. Please enter a positive number.")
+    quantity = value
+    if quantity <= 0:
+        raise ValueError(f"Invalid quantity {quantity!r}. Please enter a positive number.")
+    return quantity
+
+def validate_price(price):
+    try:
+        value = float(price)
+        if not math.isfinite(value):
+            raise ValueError
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"Invalid price {price!r}. Please enter a valid number.")
+    price = value
+    if price <= 0:
+        raise ValueError("Price must be greater than 0.")
+    return price
+
+def build_order(order_type, time_in_force, legs, price=None, price_effect="None", gtc_date=None):
+    """
+    Validate an order and return the payload for POST /accounts/{n}/orders. Used by the
+    interactive submit_order() and by batch_orders.py, so both apply the same rules.
+
+    :param legs: List of dicts with instrument-type, symbol, action and quantity.
+    :raises ValueError: If anything is invalid.
+    """
+    _check_choice("order type", order_type, ORDER_TYPES)
+    _check_choice("time-in-force", time_in_force, TIME_IN_FORCE)
+    _check_choice("price effect", price_effect, PRICE_EFFECTS)
+    if time_in_force == "GTD":
+        validate_gtd_date(gtc_date)
+    if order_type in PRICED_ORDER_TYPES:
+        if price is None or price == "":
+            raise ValueError(f"A price is required for {order_type} orders.")
+        price = validate_price(price)
+    else:
+        price = None
+    if not legs:
+        raise ValueError("An order needs at least one leg.")
+
+    order_legs = []
+    for leg in legs:
+        instrument_type = _check_choice("instrument type", leg.get("instrument-type"), INSTRUMENT_TYPES)
+        symbol = (leg.get("symbol") or "").strip().upper()
+        if not symbol:
+            raise ValueError("Symbol cannot be empty.")
+        order_legs.append({
+            "instrument-type": instrument_type,
+            "symbol": symbol,
+            "action": _check_choice("action", leg.get("action"), ACTIONS),
+            "quantity": validate_quantity(leg.get("quantity"), instrument_type)
+        })
+
+    order_data = {
+        "time-in-force": time_in_force,
+        "order-type": order_type,
+        "price": price,
+        "price-effect": price_effect,
+        "legs": order_legs
     }
 
+    # Add GTD date if applicable
+    if time_in_force == "GTD":
+        order_data["gtc-date"] = gtc_date
+
+    # Remove None values from the payload
+    return {k: v for k, v in order_data.items() if v is not None}
+
+def post_order(session_token, account_number, order_data):
+    """
+    POST one order and register it with order_tracker. Returns the response's data dict;
+    raises requests.exceptions.RequestException on failure.
+    """
+    submitted_at = time.time()
+    response = client.post(f"/accounts/{account_number}/orders", session_token=session_token, json=order_data)
+    response.raise_for_status()
+    data = codec.loads_response(response).get("data", {})
+    order = data.get("order") or {}
+    if order.get("id") is not None:
+        order_tracker.register(dict(order_data, **order), account_number, submitted_at)
+    return data
+
+def submit_order(session_token, account_number):
     # Order type validation
-    valid_order_types = {
-        "1": "Limit",
-        "2": "Market",
-        "3": "Stop",
-        "4": "Stop Limit",
-        "5": "Notional Market"
-    }
+    valid_order_types = _numbered(ORDER_TYPES)
     print("\nAvailable Order Types:")
     for key, value in valid_order_types.items():
         print(f"{key}. {value}")
@@ -64,11 +189,7 @@ def submit_order(session_token, account_number):
     order_type = valid_order_types[order_type_choice]
 
     # Time in force validation
-    valid_tif = {
-        "1": "Day",
-        "2": "GTC",
-        "3": "GTD"
-    }
+    valid_tif = _numbered(TIME_IN_FORCE)
     print("\nAvailable Time-in-Force options:")
     for key, value in valid_tif.items():
         print(f"{key}. {value}")
@@ -84,21 +205,13 @@ def submit_order(session_token, account_number):
         while True:
             gtc_date = input("Enter the GTD expiration date (YYYY-MM-DD): ")
             try:
-                date_obj = datetime.strptime(gtc_date, "%Y-%m-%d")
-                if date_obj.date() <= datetime.now().date():
-                    print("GTD date must be in the future.")
-                    continue
+                validate_gtd_date(gtc_date)
                 break
-            except ValueError:
-                print("Invalid date format. Use YYYY-MM-DD.")
+            except ValueError as e:
+                print(e)
 
     # Instrument type validation
-    valid_instrument_types = {
-        "1": "Equity",
-        "2": "Equity Option",
-        "3": "Future",
-        "4": "Cryptocurrency"
-    }
+    valid_instrument_types = _numbered(INSTRUMENT_TYPES)
     print("\nAvailable Instrument Types:")
     for key, value in valid_instrument_types.items():
         print(f"{key}. {value}")
@@ -114,13 +227,20 @@ def submit_order(session_token, account_number):
         print("Symbol cannot be empty.")
         return
 
+    # Check the symbol exists before asking for the rest of the order
+    instrument = instrument_cache.get(session_token, instrument_type, symbol)
+    if instrument is not None and not instrument["exists"]:
+        print(f"Unknown {instrument_type} symbol: {symbol}")
+        return
+
+    # Show the latest streamed quote, if the market stream has seen this symbol
+    cached_quote = quote_cache.get_quote(symbol)
+    if cached_quote is not None:
+        bid, ask, quoted_at = cached_quote
+        print(f"Current Bid/Ask: {bid} / {ask} (as of {time.time() - quoted_at:.1f}s ago)")
+
     # Action validation
-    valid_actions = {
-        "1": "Buy to Open",
-        "2": "Sell to Close",
-        "3": "Sell to Open",
-        "4": "Buy to Close"
-    }
+    valid_actions = _numbered(ACTIONS)
     print("\nAvailable Actions:")
     for key, value in valid_actions.items():
         print(f"{key}. {value}")
@@ -133,38 +253,23 @@ def submit_order(session_token, account_number):
     # Quantity validation
     while True:
         try:
-            quantity = input("\nEnter the order quantity: ")
-            if instrument_type == "Cryptocurrency":
-                quantity = float(quantity)
-                if quantity <= 0:
-                    raise ValueError
-            else:
-                quantity = int(quantity)
-                if quantity <= 0:
-                    raise ValueError
+            quantity = validate_quantity(input("\nEnter the order quantity: "), instrument_type)
             break
         except ValueError:
             print("Invalid quantity. Please enter a positive number.")
 
     # Price validation for limit and stop orders
     price = None
-    if order_type in ["Limit", "Stop", "Stop Limit"]:
+    if order_type in PRICED_ORDER_TYPES:
         while True:
             try:
-                price = float(input("\nEnter the price: "))
-                if price <= 0:
-                    print("Price must be greater than 0.")
-                    continue
+                price = validate_price(input("\nEnter the price: "))
                 break
-            except ValueError:
-                print("Invalid price. Please enter a valid number.")
+            except ValueError as e:
+                print(e)
 
     # Price effect validation
-    valid_price_effects = {
-        "1": "Credit",
-        "2": "Debit",
-        "3": "None"
-    }
+    valid_price_effects = _numbered(PRICE_EFFECTS)
     print("\nAvailable Price Effects:")
     for key, value in valid_price_effects.items():
         print(f"{key}. {value}")
@@ -175,27 +280,21 @@ def submit_order(session_token, account_number):
     price_effect = valid_price_effects[price_effect_choice]
 
     # Construct order payload
-    order_data = {
-        "time-in-force": time_in_force,
-        "order-type": order_type,
-        "price": price if price is not None else None,
-        "price-effect": price_effect,
-        "legs": [
-            {
-                "instrument-type": instrument_type,
-                "symbol": symbol,
-                "action": action,
-                "quantity": quantity
-            }
-        ]
-    }
-
-    # Add GTD date if applicable
-    if time_in_force == "GTD":
-        order_data["gtc-date"] = gtc_date
+    order_data = build_order(
+        order_type, time_in_force,
+        [{"instrument-type": instrument_type, "symbol": symbol, "action": action, "quantity": quantity}],
+        price=price, price_effect=price_effect, gtc_date=gtc_date
+    )
 
-    # Remove None values from the payload
-    order_data = {k: v for k, v in order_data.items() if v is not None}
+    # Check quantity precision and snap the price to the instrument's tick size
+    try:
+        order_data, notes = instrument_cache.validate_order(session_token, order_data)
+    except ValueError as e:
+        print(e)
+        return
+    for note in notes:
+        print(note)
+    price = order_data.get("price", price)
 
     # Confirm order details
     print("\n=== Order Details ===")
@@ -215,9 +314,7 @@ def submit_order(session_token, account_number):
 
     # Submit the order
     try:
-        response = requests.post(url, headers=headers, json=order_data)
-        response.raise_for_status()
-        data = response.json().get("data", {})
+        data = post_order(session_token, account_number, order_data)
         print("\n=== Order Submitted Successfully ===")
         print(f"Order ID: {data.get('order', {}).get('id')}")
         print(f"Status: {data.get('order', {}).get('status')}")
@@ -239,11 +336,6 @@ def cancel_order(session_token, account_number, order_id=None):
         if not order_id:
             return
 
-    url = f"https://api.cert.tastyworks.com/accounts/{account_number}/orders/{order_id}"
-    headers = {
-        "Authorization": session_token
-    }
-
     # Confirm cancellation
     confirm = input(f"\nAre you sure you want to cancel order {order_id}? (y/n): ").lower()
     if confirm != 'y':
@@ -251,9 +343,9 @@ def cancel_order(session_token, account_number, order_id=None):
         return
 
     try:
-        response = requests.delete(url, headers=headers)
+        response = client.delete(f"/accounts/{account_number}/orders/{order_id}", session_token=session_token)
         response.raise_for_status()
-        data = response.json().get("data", {})
+        data = codec.loads_response(response).get("data", {})
         print("\n=== Order Canceled Successfully ===")
         print(f"Order ID: {data.get('id')}")
         print(f"Status: {data.get('status')}")
@@ -266,22 +358,75 @@ def cancel_order(session_token, account_number, order_id=None):
 #-----------------------------------------------------------------------------------------------------
 
 
+def _is_retryable_cancel_error(error):
+    """Connection errors, timeouts, 429 and 5xx are worth retrying; other 4xx are final."""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return True
+    return response.status_code == 429 or response.status_code >= 500
+
+
+def _cancel_with_retry(session_token, account_number, order_id, max_retries, backoff):
+    start = time.perf_counter()
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            response = client.delete(f"/accounts/{account_number}/orders/{order_id}",
+                                     session_token=session_token, attempt=attempts)
+            response.raise_for_status()
+            return {
+                "order_id": order_id,
+                "ok": True,
+                "attempts": attempts,
+                "latency": time.perf_counter() - start,
+                "error": None
+            }
+        except requests.exceptions.RequestException as e:
+            if attempts > max_retries or not _is_retryable_cancel_error(e):
+                error = str(e)
+                if hasattr(e, 'response') and e.response is not None:
+                    error = f"{error} - {e.response.text}"
+                return {
+                    "order_id": order_id,
+                    "ok": False,
+                    "attempts": attempts,
+                    "latency": time.perf_counter() - start,
+                    "error": error
+                }
+            # Exponential backoff with jitter so retries don't arrive in lockstep
+            time.sleep(backoff * (2 ** (attempts - 1)) * random.uniform(0.5, 1.5))
+
+
+def cancel_orders_concurrently(session_token, account_number, order_ids,
+                               max_workers=CANCEL_MAX_WORKERS,
+                               max_retries=CANCEL_MAX_RETRIES,
+                               backoff=CANCEL_RETRY_BACKOFF):
+    """
+    Cancel the given orders in parallel on the shared HTTP connection pool.
+
+    :param max_workers: Maximum number of DELETE requests in flight at once.
+    :param max_retries: Retries per order for connection errors, 429 and 5xx responses.
+    :param backoff: Base delay in seconds for the exponential retry backoff.
+    :return: (results, elapsed) - one result dict per order, in the order given, and the wall-clock time in seconds.
+    """
+    start = time.perf_counter()
+    if not order_ids:
+        return [], 0.0
+    workers = max(1, min(max_workers, len(order_ids)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(
+            lambda order_id: _cancel_with_retry(session_token, account_number, order_id, max_retries, backoff),
+            order_ids
+        ))
+    return results, time.perf_counter() - start
+
+
 def cancel_all_orders(session_token, account_number):
     """Cancel all eligible open orders for the given account."""
-    url = f"https://api.cert.tastyworks.com/accounts/{account_number}/orders/live"
-    headers = {
-        "Authorization": session_token
-    }
-
     try:
-        # Get all live orders
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        all_items = response.json().get("data", {}).get("items", [])
-        
-        # Filter for only active orders
-        active_statuses = {"Received", "Live", "Pending", "Working"}
-        active_orders = [order for order in all_items if order.get('status') in active_statuses]
+        # Get all active orders
+        active_orders = get_live_orders(session_token, account_number)
         
         if not active_orders:
             print("\nNo active orders found to cancel.")
@@ -304,30 +449,28 @@ def cancel_all_orders(session_token, account_number):
             print("Bulk cancellation aborted.")
             return
 
-        # Cancel each active order
+        # Cancel all active orders concurrently
         print("\nCancelling orders...")
-        successful_cancels = 0
-        failed_cancels = 0
+        order_ids = [order.get('id') for order in active_orders]
+        results, elapsed = cancel_orders_concurrently(session_token, account_number, order_ids)
 
-        for order in active_orders:
-            order_id = order.get('id')
-            try:
-                cancel_url = f"https://api.cert.tastyworks.com/accounts/{account_number}/orders/{order_id}"
-                cancel_response = requests.delete(cancel_url, headers=headers)
-                cancel_response.raise_for_status()
-                successful_cancels += 1
-                print(f"Successfully cancelled order {order_id}")
-            except requests.exceptions.RequestException as e:
-                failed_cancels += 1
-                print(f"Failed to cancel order {order_id}: {str(e)}")
-                if hasattr(e, 'response') and e.response is not None:
-                    print(f"Error details: {e.response.text}")
+        for result in results:
+            if result["ok"]:
+                print(f"Successfully cancelled order {result['order_id']} "
+                      f"({result['attempts']} attempt(s), {result['latency'] * 1000:.0f} ms)")
+            else:
+                print(f"Failed to cancel order {result['order_id']} "
+                      f"after {result['attempts']} attempt(s): {result['error']}")
+
+        successful_cancels = sum(1 for result in results if result["ok"])
+        failed_cancels = total_orders - successful_cancels
 
         # Summary
         print("\n=== Cancellation Summary ===")
         print(f"Total active orders processed: {total_orders}")
         print(f"Successfully cancelled: {successful_cancels}")
         print(f"Failed to cancel: {failed_cancels}")
+        print(f"Total time: {elapsed:.2f} s")
 
     except requests.exceptions.RequestException as e:
         print(f"\nFailed to fetch orders: {str(e)}")
@@ -338,6 +481,181 @@ def cancel_all_orders(session_token, account_number):
 #-----------------------------------------------------------------------------------------------------
 
 
+def get_order(session_token, account_number, order_id):
+    """One order by id. Raises requests.exceptions.RequestException on failure."""
+    response = client.get(f"/accounts/{account_number}/orders/{order_id}", session_token=session_token)
+    response.raise_for_status()
+    return codec.loads_response(response).get("data", {})
+
+def replace_order(session_token, account_number, order_id, price=None, quantity=None, order=None):
+    """
+    Replace a working order with a new price and/or quantity in one PUT
+    /accounts/{n}/orders/{id}, instead of a cancel followed by a new order.
+
+    The replacement is built from the existing order (fetched unless passed as order) and
+    goes through the same validation and tick-size snapping as submit_order(). The API
+    returns the replacement under a new order id, which is registered with order_tracker.
+
+    :param quantity: New quantity; only for single-leg orders.
+    :return: (replacement, notes) - the replacement order dict (with its new id) and the
+        adjustments made to it, e.g. a price snapped to the tick size. Raises ValueError for an
+        invalid replacement and requests.exceptions.RequestException if the API rejects it.
+    """
+    if order is None:
+        order = get_order(session_token, account_number, order_id)
+    legs = [
+        {key: leg.get(key) for key in ("instrument-type", "symbol", "action", "quantity")}
+        for leg in order.get("legs", [])
+    ]
+    if quantity is not None:
+        if len(legs) != 1:
+            raise ValueError("Quantity can only be changed on single-leg orders.")
+        legs[0]["quantity"] = quantity
+    order_data = build_order(
+        order.get("order-type"), order.get("time-in-force"), legs,
+        price=price if price is not None else order.get("price"),
+        price_effect=order.get("price-effect") or "None", gtc_date=order.get("gtc-date")
+    )
+    order_data, notes = instrument_cache.validate_order(session_token, order_data)
+
+    submitted_at = time.time()
+    response = client.put(f"/accounts/{account_number}/orders/{order_id}", session_token=session_token,
+                          json=order_data)
+    response.raise_for_status()
+    data = codec.loads_response(response).get("data", {})
+    replacement = data.get("order", data)
+    if replacement.get("id") is not None:
+        order_tracker.register(dict(order_data, **replacement), account_number, submitted_at)
+    return dict(order_data, **replacement), notes
+
+def _chase_price(leg, target, tick_schedule):
+    """Price for a chase step from the cached quote, or None if there's no usable quote."""
+    quote = quote_cache.get_quote(leg["symbol"])
+    if quote is None:
+        return None
+    bid, ask, _ = quote
+    if not (bid > 0 and ask > 0):
+        return None
+    buying = leg["action"].startswith("Buy")
+    if target == "join":
+        price = bid if buying else ask
+    elif target == "cross":
+        price = ask if buying else bid
+    else:
+        price = (bid + ask) / 2
+    return snap_price(price, tick_schedule) if tick_schedule else round(price, 2)
+
+def chase_order(session_token, account_number, order_id, interval=CHASE_INTERVAL,
+                max_replaces=CHASE_MAX_REPLACES, target=CHASE_TARGET):
+    """
+    Keep a working single-leg limit order priced against the live quote. The symbol is
+    subscribed on the running market stream if it isn't already; without a quote after
+    CHASE_QUOTE_WAIT intervals the chase gives up. Every interval seconds the target price is
+    worked out from quote_cache; the order is only replaced when that price moves. Stops when
+    the order reaches a final status (seen through order_tracker, or when a replace is
+    rejected), after max_replaces replacements, or on Ctrl+C.
+
+    :param target: "join", "mid" or "cross" - see CHASE_TARGET in config.py.
+    :return: (order_id, status) of the last order in the chain.
+    """
+    order = get_order(session_token, account_number, order_id)
+    legs = order.get("legs", [])
+    if len(legs) != 1 or order.get("order-type") != "Limit":
+        raise ValueError("Only single-leg limit orders can be chased.")
+    leg = legs[0]
+    order_id = order_key(order.get("id", order_id))
+    if quote_cache.get_quote(leg["symbol"]) is None:
+        if not runtime.is_running(MARKET_STREAM):
+            raise ValueError("Chasing needs live quotes; connect to the market data stream first.")
+        runtime.subscribe([leg["symbol"]])
+    instrument = instrument_cache.get(session_token, leg["instrument-type"], leg["symbol"])
+    tick_schedule = instrument["tick_sizes"] if instrument else None
+    price = float(order.get("price") or 0)
+    status = order.get("status")
+    replaces = 0
+    waited = 0
+    print(f"Chasing order {order_id} ({leg['action']} {leg['quantity']} {leg['symbol']} @ {price}); Ctrl+C to stop.")
+    try:
+        while status not in TERMINAL_STATUSES and replaces < max_replaces:
+            time.sleep(interval)
+            streamed = order_tracker.last_status(order_id)
+            if streamed in TERMINAL_STATUSES:
+                status = streamed
+                break
+            new_price = _chase_price(leg, target, tick_schedule)
+            if new_price is None:
+                waited += 1
+                if waited >= CHASE_QUOTE_WAIT:
+                    print(f"No usable quote for {leg['symbol']} after {waited} interval(s); stopping the chase.")
+                    break
+                continue
+            waited = 0
+            if new_price == price:
+                continue
+            try:
+                replacement, _ = replace_order(session_token, account_number, order_id, price=new_price, order=order)
+            except requests.exceptions.RequestException as e:
+                # Most often the order filled or was cancelled in the meantime
+                try:
+                    status = get_order(session_token, account_number, order_id).get("status", status)
+                except requests.exceptions.RequestException as lookup_error:
+                    print(f"Replace failed: {e}; could not re-check the order either: {lookup_error}")
+                    break
+                if status not in TERMINAL_STATUSES:
+                    print(f"Replace failed: {e}")
+                break
+            replaces += 1
+            order_id, price = order_key(replacement.get("id")), new_price
+            order = dict(order, **replacement)
+            status = replacement.get("status")
+            print(f"Replaced -> order {order_id} @ {price}")
+    except KeyboardInterrupt:
+        print("\nChase stopped.")
+    print(f"Order {order_id}: {status} after {replaces} replacement(s)")
+    return order_id, status
+
+def replace_order_menu(session_token, account_number):
+    order_id = input("Enter the Order ID to replace: ").strip()
+    if not order_id:
+        return
+    try:
+        order = get_order(session_token, account_number, order_id)
+    except requests.exceptions.RequestException as e:
+        print(f"\nFailed to fetch order: {str(e)}")
+        return
+    leg = (order.get("legs") or [{}])[0]
+    print(f"\nOrder {order_id}: {order.get('order-type')} {leg.get('action')} {leg.get('quantity')} "
+          f"{leg.get('symbol')} @ {order.get('price')} ({order.get('status')})")
+    print("1. Change Price/Quantity")
+    print("2. Chase the Live Quote")
+    choice = input("Enter your choice: ")
+    try:
+        if choice == '1':
+            price = input("New price (Enter to keep): ").strip()
+            quantity = input("New quantity (Enter to keep): ").strip()
+            replacement, notes = replace_order(session_token, account_number, order_id,
+                                               price=price or None, quantity=quantity or None, order=order)
+            for note in notes:
+                print(note)
+            print("\n=== Order Replaced Successfully ===")
+            print(f"New Order ID: {replacement.get('id')}")
+            print(f"Price: {replacement.get('price')}")
+            print(f"Status: {replacement.get('status')}")
+        elif choice == '2':
+            chase_order(session_token, account_number, order_id)
+        else:
+            print("Invalid choice.")
+    except ValueError as e:
+        print(e)
+    except requests.exceptions.RequestException as e:
+        print(f"\nFailed to replace order: {str(e)}")
+        if hasattr(e, 'response') and e.response is not None:
+            print(f"Error details: {e.response.text}")
+
+
+#-----------------------------------------------------------------------------------------------------
+
+
 def order_manager(session_token, account_number):
     while True:
         print("\n--- Order Manager ---")
@@ -346,6 +664,9 @@ def order_manager(session_token, account_number):
         print("3. Cancel an Order")
         print("4. Cancel All Orders")
         print("5. Back to Main Menu")
+        print("6. Submit Orders from File")
+        print("7. Order Lifecycle Stats")
+        print("8. Replace/Chase an Order")
         choice = input("Enter your choice: ")
 
         if choice == '1':
@@ -359,5 +680,13 @@ def order_manager(session_token, account_number):
             cancel_all_orders(session_token, account_number)
         elif choice == '5':
             break
+        elif choice == '6':
+            # Imported here: batch_orders imports this module
+            from batch_orders import submit_order_file
+            submit_order_file(session_token, account_number)
+        elif choice == '7':
+            order_tracker.print_stats()
+        elif choice == '8':
+            replace_order_menu(session_token, account_number)
         else:
             print("Invalid choice. Please try again.")
@@ -0,0 +1,157 @@
+# portfolio.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import ACCOUNT_FETCH_MAX_WORKERS
+from account_stream import get_account_balances, get_account_positions
+from account_state import account_store
+from orders import get_live_orders
+
+BALANCE_COLUMNS = (
+    ("net-liquidating-value", "Net Liq"),
+    ("cash-balance", "Cash"),
+    ("equity-buying-power", "Equity BP"),
+    ("derivative-buying-power", "Deriv. BP")
+)
+
+FETCHERS = {
+    "balances": get_account_balances,
+    "positions": get_account_positions,
+    "live_orders": get_live_orders
+}
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _timed_fetch(fetcher, session_token, account_number):
+    start = time.perf_counter()
+    try:
+        return fetcher(session_token, account_number), None, time.perf_counter() - start
+    except Exception as e:
+        return None, str(e), time.perf_counter() - start
+
+
+def fetch_accounts_concurrently(session_token, account_numbers, max_workers=ACCOUNT_FETCH_MAX_WORKERS,
+                                fetch=tuple(FETCHERS)):
+    """
+    Fetch balances, positions and live orders of every account at once. Each (account, endpoint)
+    pair is its own request on the shared connection pool, so with enough workers the sweep
+    takes about as long as the slowest single request.
+
+    Successful balance + position fetches are also merged into account_store.
+
+    :param max_workers: Maximum number of requests in flight at once.
+    :param fetch: Which of "balances", "positions" and "live_orders" to request; the others stay None.
+    :return: (snapshots, elapsed) - account number -> {"balances", "positions", "live_orders",
+        "errors", "latency"}, and the wall-clock time of the sweep in seconds.
+    """
+    start = time.perf_counter()
+    started_seq = account_store.sequence()
+    jobs = [(account_number, name) for account_number in account_numbers for name in fetch]
+    if not jobs:
+        return {}, 0.0
+    workers = max(1, min(max_workers, len(jobs)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(
+            lambda job: _timed_fetch(FETCHERS[job[1]], session_token, job[0]),
+            jobs
+        ))
+
+    snapshots = {
+        account_number: {"balances": None, "positions": None, "live_orders": None, "errors": {}, "latency": 0.0}
+        for account_number in account_numbers
+    }
+    for (account_number, name), (data, error, latency) in zip(jobs, results):
+        snapshot = snapshots[account_number]
+        snapshot[name] = data
+        snapshot["latency"] = max(snapshot["latency"], latency)
+        if error is not None:
+            snapshot["errors"][name] = error
+
+    for account_number, snapshot in snapshots.items():
+        if snapshot["balances"] is not None and snapshot["positions"] is not None:
+            account_store.apply_seed(account_number, snapshot["balances"], snapshot["positions"], started_seq)
+    return snapshots, time.perf_counter() - start
+
+
+def consolidate(snapshots):
+    """
+    Totals across accounts: balance columns summed, positions netted per (symbol, instrument type)
+    with short quantities negative, and the number of live orders.
+    """
+    totals = {key: 0.0 for key, _ in BALANCE_COLUMNS}
+    positions = {}
+    live_orders = 0
+    for account_number, snapshot in snapshots.items():
+        for key, _ in BALANCE_COLUMNS:
+            totals[key] += _number((snapshot["balances"] or {}).get(key))
+        for position in snapshot["positions"] or []:
+            quantity = _number(position.get("quantity"))
+            if position.get("quantity-direction") == "Short":
+                quantity = -quantity
+            key = (position.get("symbol"), position.get("instrument-type"))
+            entry = positions.setdefault(key, {"quantity": 0.0, "accounts": []})
+            entry["quantity"] += quantity
+            entry["accounts"].append(account_number)
+        live_orders += len(snapshot["live_orders"] or [])
+    return {"balances": totals, "positions": positions, "live_orders": live_orders}
+
+
+def store_snapshots(account_numbers):
+    """Snapshots of account_store in the fetch_accounts_concurrently() format, e.g. for consolidate()."""
+    return {
+        account_number: {"balances": account_store.balances(account_number),
+                         "positions": account_store.positions(account_number),
+                         "live_orders": None, "errors": {}, "latency": 0.0}
+        for account_number in account_numbers
+    }
+
+
+def print_balance_table(snapshots):
+    """One row of balances per account plus a TOTAL row."""
+    header = f"{'Account':<12}" + "".join(f"{title:>16}" for _, title in BALANCE_COLUMNS) \
+        + f"{'Positions':>11}{'Orders':>8}"
+    print("\n--- All Accounts ---")
+    print(header)
+    print("-" * len(header))
+    for account_number, snapshot in snapshots.items():
+        balances = snapshot["balances"] or {}
+        row = f"{account_number:<12}" + "".join(
+            f"{_number(balances.get(key)):>16,.2f}" if balances else f"{'n/a':>16}" for key, _ in BALANCE_COLUMNS)
+        positions = snapshot["positions"]
+        orders = snapshot["live_orders"]
+        row += f"{len(positions) if positions is not None else 'n/a':>11}"
+        row += f"{len(orders) if orders is not None else 'n/a':>8}"
+        print(row)
+
+    combined = consolidate(snapshots)
+    fetched_orders = any(snapshot["live_orders"] is not None for snapshot in snapshots.values())
+    print("-" * len(header))
+    print(f"{'TOTAL':<12}" + "".join(f"{combined['balances'][key]:>16,.2f}" for key, _ in BALANCE_COLUMNS)
+          + f"{len(combined['positions']):>11}{combined['live_orders'] if fetched_orders else 'n/a':>8}")
+
+
+def print_net_positions(snapshots):
+    """Positions netted across accounts."""
+    combined = consolidate(snapshots)
+    if combined["positions"]:
+        print("\n--- Net Positions ---")
+        for (symbol, instrument_type), entry in sorted(combined["positions"].items(),
+                                                       key=lambda item: item[0][0] or ""):
+            print(f"{symbol} ({instrument_type}): {entry['quantity']:g} "
+                  f"across {', '.join(entry['accounts'])}")
+
+
+def print_consolidated_view(snapshots, elapsed=None):
+    print_balance_table(snapshots)
+    print_net_positions(snapshots)
+    for account_number, snapshot in snapshots.items():
+        for name, error in snapshot["errors"].items():
+            print(f"{account_number} {name}: {error}")
+    if elapsed is not None:
+        slowest = max((snapshot["latency"] for snapshot in snapshots.values()), default=0.0)
+        print(f"\nFetched {len(snapshots)} account(s) in {elapsed:.2f} s (slowest request {slowest:.2f} s)")
@@ -0,0 +1,176 @@
+# quote_cache.py
+import time
+import threading
+from array import array
+
+QUOTE_FIELDS = ("bidPrice", "askPrice", "bidSize", "askSize")
+TRADE_FIELDS = ("price", "size", "dayVolume")
+SUMMARY_FIELDS = ("openInterest", "dayOpenPrice", "dayHighPrice", "dayLowPrice", "prevDayClosePrice")
+PROFILE_FIELDS = ("highLimitPrice", "lowLimitPrice", "high52WeekPrice", "low52WeekPrice",
+                  "haltStartTime", "haltEndTime")
+PROFILE_TEXT_FIELDS = ("description", "shortSaleRestriction", "tradingStatus", "statusReason")
+
+EVENT_FIELDS = {
+    "Quote": QUOTE_FIELDS,
+    "Trade": TRADE_FIELDS,
+    "Summary": SUMMARY_FIELDS,
+    "Profile": PROFILE_FIELDS
+}
+
+_NAN = float("nan")
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return _NAN
+
+
+class QuoteCache:
+    """
+    Latest value of every Quote/Trade/Summary/Profile field per symbol.
+
+    Each symbol gets a row number from a dict index; every numeric field is a column stored in
+    an array('d') (8 bytes per symbol), plus one last-update timestamp column per event type.
+    Missing values are NaN. 10k symbols cost well under 2 MB, and lookups are O(1).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = {}
+        self._base_index = {}
+        self._symbols = []
+        self._columns = {name: array("d") for fields in EVENT_FIELDS.values() for name in fields}
+        self._timestamps = {event_type: array("d") for event_type in EVENT_FIELDS}
+        self._profile_text = []
+
+    def __len__(self):
+        return len(self._symbols)
+
+    def __contains__(self, symbol):
+        return self.resolve(symbol) is not None
+
+    def symbols(self):
+        return list(self._symbols)
+
+    def resolve(self, symbol):
+        """
+        Map an order/position symbol to the streamer symbol we hold data for, e.g.
+        "BTC/USD" -> "BTC/USD:CXTALP". Returns None if the symbol isn't cached.
+        """
+        with self._lock:
+            return self._resolve(symbol)
+
+    def _resolve(self, symbol):
+        # Caller holds _lock
+        if symbol in self._index:
+            return symbol
+        return self._base_index.get(symbol)
+
+    def _row(self, symbol):
+        row = self._index.get(symbol)
+        if row is None:
+            row = len(self._symbols)
+            self._index[symbol] = row
+            self._base_index.setdefault(symbol.split(":", 1)[0], symbol)
+            self._symbols.append(symbol)
+            for column in self._columns.values():
+                column.append(_NAN)
+            for column in self._timestamps.values():
+                column.append(0.0)
+            self._profile_text.append(None)
+        return row
+
+    def update(self, event, timestamp=None):
+        """Store the fields of a decoded feed event (see feed_decoder)."""
+        fields = EVENT_FIELDS.get(event.eventType)
+        if fields is None:
+            return
+        if timestamp is None:
+            timestamp = time.time()
+        columns = self._columns
+        with self._lock:
+            row = self._row(event.eventSymbol)
+            for name in fields:
+                value = getattr(event, name, None)
+                if value is not None:
+                    columns[name][row] = _to_float(value)
+            if event.eventType == "Profile":
+                self._profile_text[row] = tuple(getattr(event, name, None) for name in PROFILE_TEXT_FIELDS)
+            self._timestamps[event.eventType][row] = timestamp
+
+    def update_many(self, events, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        for event in events:
+            self.update(event, timestamp)
+
+    def get(self, symbol):
+        """Snapshot of every cached field for symbol as a dict, or None if we have no data."""
+        with self._lock:
+            # Resolve under the lock so clear() can't drop the row in between
+            symbol = self._resolve(symbol)
+            if symbol is None:
+                return None
+            row = self._index[symbol]
+            snapshot = {"symbol": symbol}
+            for name, column in self._columns.items():
+                snapshot[name] = column[row]
+            for event_type, column in self._timestamps.items():
+                snapshot[f"{event_type.lower()}Time"] = column[row] or None
+            text = self._profile_text[row]
+            if text is not None:
+                snapshot.update(zip(PROFILE_TEXT_FIELDS, text))
+        return snapshot
+
+    def get_quote(self, symbol):
+        """(bid, ask, timestamp) of the latest Quote, or None."""
+        with self._lock:
+            symbol = self._resolve(symbol)
+            if symbol is None:
+                return None
+            row = self._index[symbol]
+            timestamp = self._timestamps["Quote"][row]
+            if not timestamp:
+                return None
+            return self._columns["bidPrice"][row], self._columns["askPrice"][row], timestamp
+
+    def get_last(self, symbol):
+        """(last trade price, timestamp) of the latest Trade, or None."""
+        with self._lock:
+            symbol = self._resolve(symbol)
+            if symbol is None:
+                return None
+            row = self._index[symbol]
+            timestamp = self._timestamps["Trade"][row]
+            if not timestamp:
+                return None
+            return self._columns["price"][row], timestamp
+
+    def get_mark(self, symbol):
+        """Mid of the latest quote, falling back to the last trade price. None if neither is cached."""
+        quote = self.get_quote(symbol)
+        if quote is not None:
+            bid, ask, _ = quote
+            if bid == bid and ask == ask:
+                return (bid + ask) / 2
+        last = self.get_last(symbol)
+        if last is not None and last[0] == last[0]:
+            return last[0]
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._index.clear()
+            self._base_index.clear()
+            self._symbols.clear()
+            for column in self._columns.values():
+                del column[:]
+            for column in self._timestamps.values():
+                del column[:]
+            self._profile_text.clear()
+
+
+# Shared cache filled by market_stream and read by orders/account views
+quote_cache = QuoteCache()
@@ -0,0 +1,150 @@
+# rest_stats.py
+import json
+import time
+import threading
+from collections import deque
+from urllib.parse import urlsplit
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+RECENT_SAMPLES = 1000  # latencies kept per endpoint for percentiles
+
+# Instrument endpoints whose next path segment is a symbol
+_SYMBOL_PARENTS = {"equities", "equity-options", "futures", "cryptocurrencies"}
+
+
+def endpoint_name(method, url):
+    """
+    "GET https://api.../accounts/5WW1/orders/42?x=1" -> "GET /accounts/{account}/orders/{id}", so
+    calls to the same endpoint with different accounts/orders/symbols are counted together.
+    """
+    parts = [part for part in urlsplit(url).path.split("/") if part]
+    template = []
+    for i, part in enumerate(parts):
+        parent = parts[i - 1] if i else None
+        if parent == "accounts":
+            template.append("{account}")
+        elif part.isdigit():
+            template.append("{id}")
+        elif parent in _SYMBOL_PARENTS:
+            template.append("{symbol}")
+        else:
+            template.append(part)
+    return f"{method} /{'/'.join(template)}"
+
+
+class EndpointStats:
+    __slots__ = ("name", "count", "errors", "retries", "total", "min", "max", "buckets", "statuses", "recent")
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.statuses = {}
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def add(self, status, latency, retry):
+        ms = latency * 1000
+        self.count += 1
+        self.total += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = ms if self.max is None else max(self.max, ms)
+        self.recent.append(ms)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if retry:
+            self.retries += 1
+        if not isinstance(status, int) or status >= 400:
+            self.errors += 1
+
+    def percentile(self, q):
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def as_dict(self):
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "mean_ms": self.total / self.count if self.count else None,
+            "min_ms": self.min,
+            "max_ms": self.max,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items(), key=str)},
+            "histogram": dict(zip(labels, self.buckets))
+        }
+
+
+class RestStats:
+    """
+    Latency histogram, status-code counts and retry counts per REST endpoint. HttpClient calls
+    record() for every request it sends, so every REST call in the CLI is covered.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self.started_at = time.time()
+
+    def record(self, method, url, status, latency, retry=False):
+        """
+        :param status: HTTP status code, or an exception class name if no response came back.
+        :param latency: Seconds from sending the request to receiving the response.
+        :param retry: True if this request repeats an earlier attempt.
+        """
+        name = endpoint_name(method, url)
+        with self._lock:
+            stats = self._endpoints.get(name)
+            if stats is None:
+                stats = self._endpoints[name] = EndpointStats(name)
+            stats.add(status, latency, retry)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "since": self.started_at,
+                "endpoints": {name: stats.as_dict() for name, stats in sorted(self._endpoints.items())}
+            }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+            self.started_at = time.time()
+
+    def export_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def print_stats(self):
+        snapshot = self.snapshot()
+        print(f"\n--- REST Stats (since {time.strftime('%H:%M:%S', time.localtime(snapshot['since']))}) ---")
+        if not snapshot["endpoints"]:
+            print("No requests recorded yet.")
+            return
+        fmt = lambda value: f"{value:.0f}" if value is not None else "-"
+        print(f"{'Endpoint':<48}{'Calls':>7}{'Err':>5}{'Retry':>7}{'p50':>7}{'p95':>7}{'p99':>7}{'Max':>7}  Statuses")
+        for name, stats in snapshot["endpoints"].items():
+            statuses = ", ".join(f"{status}={count}" for status, count in stats["statuses"].items())
+            print(f"{name:<48}{stats['count']:>7}{stats['errors']:>5}{stats['retries']:>7}"
+                  f"{fmt(stats['p50_ms']):>7}{fmt(stats['p95_ms']):>7}{fmt(stats['p99_ms']):>7}"
+                  f"{fmt(stats['max_ms']):>7}  {statuses}")
+        print("(latencies in ms)")
+
+
+# Shared instance recorded into by http_client.client
+rest_stats = RestStats()
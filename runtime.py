@@ -0,0 +1,184 @@
+# runtime.py
+import time
+import asyncio
+import threading
+from config import STREAM_ECHO, ACCOUNT_STREAMER_URL
+import market_stream
+from market_stream import stream_market_data
+from account_stream import stream_account_data
+from event_bus import event_bus
+
+MARKET_STREAM = "market"
+ACCOUNT_STREAM = "account"
+
+
+class StreamRuntime:
+    """
+    One asyncio event loop on a dedicated background thread that hosts the long-lived
+    market and account streams side by side.
+
+    Every public method is safe to call from the menu thread: work is handed to the
+    loop with run_coroutine_threadsafe/call_soon_threadsafe, so the menu never blocks
+    on a stream and streams keep their connection while the user does other things.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self._thread = None
+        self._tasks = {}
+        self._errors = {}
+
+    # --- loop lifecycle --------------------------------------------------
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        ready = threading.Event()
+
+        def run_loop():
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            self.loop.call_soon(ready.set)
+            self.loop.run_forever()
+            self.loop.close()
+
+        self._thread = threading.Thread(target=run_loop, name="stream-runtime", daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def shutdown(self, timeout=5):
+        if self._thread is None:
+            return
+        self.stop_all(timeout)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the runtime loop and wait for its result."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def call(self, func, *args, timeout=None):
+        """Run a plain function on the runtime loop (e.g. to touch loop-owned state) and return its result."""
+        async def invoke():
+            return func(*args)
+        return self.run(invoke(), timeout)
+
+    # --- named long-running tasks ---------------------------------------
+
+    def start_task(self, name, coro_factory):
+        """
+        Start coro_factory() as a named task on the loop unless one with that name is already running.
+        Returns True if a new task was started.
+        """
+        self.start()
+
+        async def create():
+            task = self._tasks.get(name)
+            if task is not None and not task.done():
+                return False
+            self._errors.pop(name, None)
+            task = asyncio.create_task(coro_factory(), name=name)
+            task.add_done_callback(lambda t: self._task_done(name, t))
+            self._tasks[name] = task
+            return True
+
+        return self.run(create())
+
+    def _task_done(self, name, task):
+        if not task.cancelled() and task.exception() is not None:
+            self._errors[name] = task.exception()
+            print(f"\n{name.capitalize()} stream stopped with error: {task.exception()}")
+
+    def stop_task(self, name, timeout=5):
+        if self.loop is None:
+            return False
+
+        async def cancel():
+            task = self._tasks.get(name)
+            if task is None or task.done():
+                return False
+            task.cancel()
+            await asyncio.wait([task], timeout=timeout)
+            return True
+
+        return self.run(cancel())
+
+    def stop_all(self, timeout=5):
+        stopped = [name for name in list(self._tasks) if self.stop_task(name, timeout)]
+        return stopped
+
+    def wait_until(self, name, event, timeout):
+        """
+        Wait up to timeout seconds for event (a threading.Event) while task name is running.
+        Returns True if the event was set, False on timeout or if the task ended first.
+        """
+        deadline = time.monotonic() + timeout
+        while not event.wait(0.1):
+            if not self.is_running(name) or time.monotonic() >= deadline:
+                return event.is_set()
+        return True
+
+    def is_running(self, name):
+        task = self._tasks.get(name)
+        return task is not None and not task.done()
+
+    def status(self):
+        """name -> "running" / "stopped" / "error: ..." for every task started so far."""
+        result = {}
+        for name, task in list(self._tasks.items()):
+            if not task.done():
+                result[name] = "running"
+            elif name in self._errors:
+                result[name] = f"error: {self._errors[name]}"
+            else:
+                result[name] = "stopped"
+        return result
+
+    # --- streams -----------------------------------------------------------
+
+    # Both streams publish to the shared event_bus; consumers subscribe there instead of
+    # running inside the receive loops.
+
+    def start_market_stream(self, dxlink_url, api_quote_token, symbols=None, echo=STREAM_ECHO,
+                            token_provider=None, handlers=None):
+        return self.start_task(
+            MARKET_STREAM,
+            lambda: stream_market_data(dxlink_url, api_quote_token, symbols, echo=echo,
+                                       token_provider=token_provider, handlers=handlers, bus=event_bus)
+        )
+
+    def start_account_stream(self, session_token, account_numbers, echo=STREAM_ECHO, handlers=None,
+                             ws_url=ACCOUNT_STREAMER_URL, connected=None):
+        return self.start_task(
+            ACCOUNT_STREAM,
+            lambda: stream_account_data(session_token, account_numbers, echo=echo, ws_url=ws_url,
+                                        handlers=handlers, bus=event_bus, connected=connected)
+        )
+
+    def subscribe(self, symbols, event_types=None):
+        """Add symbols to the running market stream. Returns the number of new subscriptions."""
+        stream = market_stream.active_stream
+        if stream is None or not self.is_running(MARKET_STREAM):
+            raise Exception("Market data stream is not running.")
+        if event_types is None:
+            return self.run(stream.subscribe(symbols))
+        return self.run(stream.subscribe(symbols, event_types))
+
+    def unsubscribe(self, symbols, event_types=None):
+        """Remove symbols from the running market stream. Returns the number of removed subscriptions."""
+        stream = market_stream.active_stream
+        if stream is None or not self.is_running(MARKET_STREAM):
+            raise Exception("Market data stream is not running.")
+        return self.run(stream.unsubscribe(symbols, event_types))
+
+    def stop_market_stream(self):
+        return self.stop_task(MARKET_STREAM)
+
+    def stop_account_stream(self):
+        return self.stop_task(ACCOUNT_STREAM)
+
+
+# Shared runtime used by main.menu()
+runtime = StreamRuntime()
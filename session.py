@@ -1,6 +1,38 @@
 # session.py
-import requests
-from config import SESSION_URL, API_QUOTE_TOKEN_URL
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from http_client import client
+import codec
+from config import (
+    SESSION_URL,
+    API_QUOTE_TOKEN_URL,
+    SESSION_CACHE_FILE,
+    SESSION_REFRESH_MARGIN,
+    SESSION_DEFAULT_TTL,
+    QUOTE_TOKEN_TTL
+)
+
+
+class SessionExpiredError(Exception):
+    """Raised when the API answers 401 for a session token we thought was valid."""
+
+
+def _post_session(payload):
+    response = client.post(SESSION_URL, json=payload, authenticate=False)
+    if response.status_code in (200, 201):
+        return codec.loads_response(response)['data']
+    raise Exception(f"Error logging in: {response.status_code}, {response.text}")
+
+def _fetch_api_quote_token(session_token):
+    response = client.get(API_QUOTE_TOKEN_URL, session_token=session_token)
+    if response.status_code == 200:
+        return codec.loads_response(response)["data"]
+    if response.status_code == 401:
+        raise SessionExpiredError(f"Error obtaining API Quote Token: {response.status_code}, {response.text}")
+    raise Exception(f"Error obtaining API Quote Token: {response.status_code}, {response.text}")
 
 def create_session_with_password(login, password, remember_me=True):
     payload = {
@@ -8,25 +40,207 @@ def create_session_with_password(login, password, remember_me=True):
         "password": password,
         "remember-me": remember_me
     }
-    headers = {"Content-Type": "application/json"}
-    response = requests.post(SESSION_URL, json=payload, headers=headers)
-    if response.status_code in (200, 201):
-        data = response.json()['data']
-        session_token = data.get("session-token")
-        print("Login successful!")
-        return session_token
-    else:
-        raise Exception(f"Error logging in: {response.status_code}, {response.text}")
+    data = _post_session(payload)
+    session_token = data.get("session-token")
+    print("Login successful!")
+    return session_token
 
 def get_api_quote_token(session_token):
-    headers = {"Authorization": session_token}
-    response = requests.get(API_QUOTE_TOKEN_URL, headers=headers)
-    
-    if response.status_code == 200:
-        data = response.json()["data"]
-        token = data.get("token")
-        dxlink_url = data.get("dxlink-url")
+    data = _fetch_api_quote_token(session_token)
+    token = data.get("token")
+    dxlink_url = data.get("dxlink-url")
+    print("API Quote Token obtained successfully!")
+    return token, dxlink_url
+
+
+#-----------------------------------------------------------------------------
+
+
+def _parse_expiration(value, default_ttl):
+    """Turn an ISO-8601 expiration from the API into an epoch timestamp."""
+    if value:
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            pass
+    return time.time() + default_ttl
+
+
+class SessionManager:
+    """
+    Keeps one session token and one API quote token (plus dxlink URL) alive for
+    the whole CLI run instead of logging in again for every menu action.
+
+    Tokens are cached in memory and, if cache_file is set, on disk so a restart
+    can reuse a still-valid session. A background timer refreshes them shortly
+    before they expire; otherwise we only log in again after a 401.
+    """
+
+    def __init__(self, login, password, remember_me=True,
+                 cache_file=SESSION_CACHE_FILE, refresh_margin=SESSION_REFRESH_MARGIN):
+        self.login = login
+        self.password = password
+        self.remember_me = remember_me
+        self.cache_file = cache_file
+        self.refresh_margin = refresh_margin
+
+        self.session_token = None
+        self.session_expires_at = 0.0
+        self.remember_token = None
+        self.quote_token = None
+        self.dxlink_url = None
+        self.quote_token_expires_at = 0.0
+
+        self._lock = threading.RLock()
+        self._refresh_timer = None
+        self._load_cache()
+
+    # --- token access ----------------------------------------------------
+
+    def get_session_token(self):
+        with self._lock:
+            if not self._session_valid():
+                self._login()
+            return self.session_token
+
+    def get_quote_token(self, force_refresh=False):
+        """Return (api_quote_token, dxlink_url), fetching a new pair only when needed."""
+        with self._lock:
+            if force_refresh or not self._quote_token_valid():
+                self._refresh_quote_token()
+            return self.quote_token, self.dxlink_url
+
+    def handle_unauthorized(self, rejected_token=None):
+        """Drop the cached session after a 401 and log in again. Returns the new token."""
+        with self._lock:
+            if rejected_token and rejected_token != self.session_token and self._session_valid():
+                # Another caller already logged in again; hand out the fresh token
+                return self.session_token
+            print("Session rejected by the API, logging in again...")
+            self.session_token = None
+            self.session_expires_at = 0.0
+            self.quote_token = None
+            self.quote_token_expires_at = 0.0
+            self._login()
+            return self.session_token
+
+    # --- background refresh ---------------------------------------------
+
+    def start_background_refresh(self):
+        with self._lock:
+            self._schedule_refresh()
+
+    def stop_background_refresh(self):
+        with self._lock:
+            if self._refresh_timer is not None:
+                self._refresh_timer.cancel()
+                self._refresh_timer = None
+
+    def _schedule_refresh(self):
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+        expirations = [t for t in (self.session_expires_at, self.quote_token_expires_at) if t]
+        if not expirations:
+            return
+        delay = max(min(expirations) - self.refresh_margin - time.time(), 1.0)
+        self._refresh_timer = threading.Timer(delay, self._background_refresh)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def _background_refresh(self):
+        try:
+            with self._lock:
+                if not self._session_valid():
+                    self._login()
+                if self.quote_token is not None and not self._quote_token_valid():
+                    self._refresh_quote_token()
+        except Exception as e:
+            print(f"Background session refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._refresh_timer = None
+                self._schedule_refresh()
+
+    # --- internals ---------------------------------------------------------
+
+    def _session_valid(self):
+        return self.session_token is not None and time.time() < self.session_expires_at - self.refresh_margin
+
+    def _quote_token_valid(self):
+        return self.quote_token is not None and time.time() < self.quote_token_expires_at - self.refresh_margin
+
+    def _login(self):
+        data = None
+        if self.remember_token:
+            try:
+                data = _post_session({
+                    "login": self.login,
+                    "remember-token": self.remember_token,
+                    "remember-me": self.remember_me
+                })
+            except Exception:
+                self.remember_token = None
+        if data is None:
+            data = _post_session({
+                "login": self.login,
+                "password": self.password,
+                "remember-me": self.remember_me
+            })
+            print("Login successful!")
+
+        self.session_token = data.get("session-token")
+        self.session_expires_at = _parse_expiration(data.get("session-expiration"), SESSION_DEFAULT_TTL)
+        self.remember_token = data.get("remember-token") or self.remember_token
+        self._save_cache()
+        if self._refresh_timer is not None:
+            self._schedule_refresh()
+
+    def _refresh_quote_token(self):
+        session_token = self.get_session_token()
+        try:
+            data = _fetch_api_quote_token(session_token)
+        except SessionExpiredError:
+            data = _fetch_api_quote_token(self.handle_unauthorized(session_token))
+        self.quote_token = data.get("token")
+        self.dxlink_url = data.get("dxlink-url")
+        self.quote_token_expires_at = _parse_expiration(data.get("expires-at"), QUOTE_TOKEN_TTL)
         print("API Quote Token obtained successfully!")
-        return token, dxlink_url
-    else:
-        raise Exception(f"Error obtaining API Quote Token: {response.status_code}, {response.text}")
+        self._save_cache()
+        if self._refresh_timer is not None:
+            self._schedule_refresh()
+
+    def _load_cache(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, "r") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return
+        if cached.get("login") != self.login:
+            return
+        self.session_token = cached.get("session-token")
+        self.session_expires_at = cached.get("session-expires-at", 0.0)
+        self.remember_token = cached.get("remember-token")
+        self.quote_token = cached.get("quote-token")
+        self.dxlink_url = cached.get("dxlink-url")
+        self.quote_token_expires_at = cached.get("quote-token-expires-at", 0.0)
+
+    def _save_cache(self):
+        if not self.cache_file:
+            return
+        cached = {
+            "login": self.login,
+            "session-token": self.session_token,
+            "session-expires-at": self.session_expires_at,
+            "remember-token": self.remember_token,
+            "quote-token": self.quote_token,
+            "dxlink-url": self.dxlink_url,
+            "quote-token-expires-at": self.quote_token_expires_at
+        }
+        try:
+            fd = os.open(self.cache_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(cached, f)
+        except OSError as e:
+            print(f"Could not write session cache: {e}")
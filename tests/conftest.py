@@ -0,0 +1,19 @@
+# tests/conftest.py
+import os
+import sys
+
+# The modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture
+def mock_rest(monkeypatch):
+    """A MockRestServer with the shared HTTP client pointed at it."""
+    from mock_server import MockRestServer
+    from http_client import client
+    server = MockRestServer(positions=2, orders=3).start()
+    monkeypatch.setattr(client, "base_url", server.url)
+    yield server
+    server.stop()
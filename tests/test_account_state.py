@@ -0,0 +1,80 @@
+# tests/test_account_state.py
+from account_state import AccountStateStore
+
+ACCOUNT = "5WW1"
+
+
+def _balance(updated_at, **fields):
+    return {"type": "AccountBalance",
+            "data": dict({"account-number": ACCOUNT, "updated-at": updated_at}, **fields)}
+
+
+def _position(symbol, quantity, updated_at):
+    return {"type": "CurrentPosition",
+            "data": {"account-number": ACCOUNT, "symbol": symbol, "instrument-type": "Equity",
+                     "quantity": quantity, "updated-at": updated_at}}
+
+
+def _rest_position(symbol, quantity):
+    return {"symbol": symbol, "instrument-type": "Equity", "quantity": quantity}
+
+
+def test_seed_then_stream_updates():
+    store = AccountStateStore()
+    store.apply_seed(ACCOUNT, {"cash-balance": "100", "net-liquidating-value": "500"}, [], store.sequence())
+    assert store.is_seeded(ACCOUNT)
+    store.handle_message(_balance("2024-01-05T10:00:00Z", **{"cash-balance": "90"}))
+    assert store.balances(ACCOUNT) == {"account-number": ACCOUNT, "updated-at": "2024-01-05T10:00:00Z",
+                                       "cash-balance": "90", "net-liquidating-value": "500"}
+
+
+def test_slow_seed_keeps_newer_streamed_records():
+    store = AccountStateStore()
+    started_seq = store.sequence()
+    # Updates arrive while the REST requests are in flight
+    store.handle_message(_balance("2024-01-05T10:00:00Z", **{"cash-balance": "90"}))
+    store.handle_message(_position("SPY", "7", "2024-01-05T10:00:00Z"))
+    store.handle_message(_position("AAPL", "0", "2024-01-05T10:00:00Z"))
+    store.apply_seed(ACCOUNT, {"cash-balance": "100", "net-liquidating-value": "500"},
+                     [_rest_position("SPY", "5"), _rest_position("AAPL", "3"), _rest_position("QQQ", "1")],
+                     started_seq)
+
+    balances = store.balances(ACCOUNT)
+    assert balances["cash-balance"] == "90"
+    assert balances["net-liquidating-value"] == "500"
+    # SPY keeps the streamed quantity, AAPL stays closed, QQQ comes from the seed
+    assert [(p["symbol"], p["quantity"]) for p in store.positions(ACCOUNT)] == [("QQQ", "1"), ("SPY", "7")]
+
+
+def test_seed_after_the_stream_replaces_older_records():
+    store = AccountStateStore()
+    store.handle_message(_position("SPY", "7", "2024-01-05T10:00:00Z"))
+    store.apply_seed(ACCOUNT, {"cash-balance": "100"}, [_rest_position("SPY", "8")], store.sequence())
+    assert [(p["symbol"], p["quantity"]) for p in store.positions(ACCOUNT)] == [("SPY", "8")]
+
+
+def test_out_of_order_updates_are_dropped():
+    store = AccountStateStore()
+    store.handle_message(_balance("2024-01-05T10:00:05Z", **{"cash-balance": "80"}))
+    store.handle_message(_balance("2024-01-05T10:00:01Z", **{"cash-balance": "95"}))
+    store.handle_message(_position("SPY", "7", "2024-01-05T10:00:05Z"))
+    store.handle_message(_position("SPY", "6", "2024-01-05T10:00:01Z"))
+    assert store.balances(ACCOUNT)["cash-balance"] == "80"
+    assert store.positions(ACCOUNT)[0]["quantity"] == "7"
+    assert store.stats(ACCOUNT)["stale"] == 2 and store.stats(ACCOUNT)["updates"] == 2
+
+
+def test_message_timestamp_orders_records_without_updated_at():
+    store = AccountStateStore()
+    newer = {"type": "AccountBalance", "data": {"account-number": ACCOUNT, "cash-balance": "1"}, "timestamp": 2000}
+    older = {"type": "AccountBalance", "data": {"account-number": ACCOUNT, "cash-balance": "2"}, "timestamp": 1000}
+    store.handle_message(newer)
+    store.handle_message(older)
+    assert store.balances(ACCOUNT)["cash-balance"] == "1"
+
+
+def test_other_messages_are_ignored():
+    store = AccountStateStore()
+    store.handle_message({"type": "Order", "data": {"account-number": ACCOUNT}})
+    store.handle_message({"type": "AccountBalance", "data": {}})
+    assert store.accounts() == [] and store.balances(ACCOUNT) is None and store.positions(ACCOUNT) == []
@@ -0,0 +1,54 @@
+# tests/test_account_stream.py
+import json
+import asyncio
+import threading
+import websockets
+from account_stream import stream_account_data
+from mock_server import MockServer
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 10))
+
+
+def test_connected_is_set_once_the_streamer_accepts():
+    received = []
+
+    async def scenario():
+        server = await MockServer(dxlink_port=0, account_port=0, account_rate=50).start()
+        connected = threading.Event()
+        task = asyncio.create_task(stream_account_data("token", ["5WW1"], echo=False, ws_url=server.account_url,
+                                                       handlers=[lambda data, at: received.append(data)],
+                                                       connected=connected))
+        try:
+            while not received:
+                await asyncio.sleep(0.01)
+            return connected.is_set()
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await server.stop()
+
+    assert run(scenario())
+    assert received[0]["type"] == "AccountBalance"
+
+
+def test_rejected_connect_ends_the_stream_without_setting_connected():
+    async def reject(websocket, *_):
+        await websocket.recv()
+        await websocket.send(json.dumps({"status": "error", "action": "connect", "message": "invalid token"}))
+        await websocket.wait_closed()
+
+    async def scenario():
+        server = await websockets.serve(reject, "127.0.0.1", 0)
+        port = list(server.sockets)[0].getsockname()[1]
+        connected = threading.Event()
+        try:
+            await stream_account_data("bad-token", ["5WW1"], echo=False, ws_url=f"ws://127.0.0.1:{port}",
+                                      connected=connected)
+        finally:
+            server.close()
+            await server.wait_closed()
+        return connected.is_set()
+
+    assert run(scenario()) is False
@@ -0,0 +1,72 @@
+# tests/test_bars.py
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from bars import BarRing, BarBuilder, sma, vwap, BAR_FIELDS
+from feed_decoder import Trade
+
+T0 = 1_700_000_040.0  # a multiple of 60
+
+
+def test_ring_keeps_last_bars_in_order():
+    ring = BarRing(4, np)
+    assert len(ring) == 0 and ring.view().shape == (len(BAR_FIELDS), 0)
+    for i in range(7):
+        ring.append((i,) * len(BAR_FIELDS))
+    assert len(ring) == 4
+    assert ring.column("close").tolist() == [3, 4, 5, 6]
+    assert ring.column("close", 2).tolist() == [5, 6]
+
+
+def test_ring_views_share_memory():
+    ring = BarRing(3, np)
+    for i in range(5):
+        ring.append((i,) * len(BAR_FIELDS))
+    column = ring.column("open")
+    assert column.flags["C_CONTIGUOUS"]
+    assert np.shares_memory(column, ring._data)
+
+
+def test_builder_ohlcv_and_vwap():
+    builder = BarBuilder(timeframes=(60,), history=10)
+    builder.add_trade("SPY", 10.0, 1, day_volume=100, at=T0)   # no earlier dayVolume: uses size
+    builder.add_trade("SPY", 12.0, 1, day_volume=103, at=T0 + 10)  # 3 from the dayVolume delta
+    builder.add_trade("SPY", 9.0, 1, day_volume=104, at=T0 + 20)
+    builder.add_trade("SPY", 11.0, 1, day_volume=105, at=T0 + 60)  # next period closes the bar
+    current = builder.current("SPY", 60)
+    assert current["time"] == T0 + 60 and current["open"] == 11.0 and current["trades"] == 1
+    # T0 is long past, so bars() also closes the open bar
+    bars = builder.bars("SPY", 60)
+    assert builder.current("SPY", 60) is None
+    assert bars["time"].tolist() == [T0, T0 + 60]
+    assert [bars[name][0] for name in ("open", "high", "low", "close", "volume", "trades")] == \
+        [10.0, 12.0, 9.0, 9.0, 5.0, 3]
+    assert bars["vwap"][0] == pytest.approx((10 * 1 + 12 * 3 + 9 * 1) / 5)
+
+
+def test_builder_handles_stream_events_and_bad_prices():
+    builder = BarBuilder(timeframes=(1, 60), history=10)
+    builder.on_events([Trade("Trade", "SPY", 5.0, None, 2), Trade("Trade", "SPY", float("nan"), None, 1)], T0)
+    assert builder.trades == 1
+    assert builder.current("SPY", 1)["volume"] == 2
+    assert builder.bars("SPY", 300) is None
+    assert builder.bars("QQQ", 60) is None
+
+
+def test_close_expired():
+    builder = BarBuilder(timeframes=(1,), history=10)
+    builder.add_trade("SPY", 5.0, 1, at=T0)
+    builder.close_expired(now=T0 + 0.5)
+    assert builder.current("SPY", 1) is not None
+    builder.close_expired(now=T0 + 1)
+    assert builder.current("SPY", 1) is None
+    assert len(builder.bars("SPY", 1)["close"]) == 1
+
+
+def test_indicators():
+    values = np.arange(1, 6, dtype=float)
+    result = sma(values, 3)
+    assert np.isnan(result[:2]).all()
+    assert result[2:].tolist() == [2.0, 3.0, 4.0]
+    assert vwap({"vwap": np.array([10.0, 20.0]), "volume": np.array([1.0, 3.0])}) == 17.5
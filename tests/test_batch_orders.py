@@ -0,0 +1,61 @@
+# tests/test_batch_orders.py
+import pytest
+from batch_orders import read_order_file, validate_orders
+
+
+def _write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+def test_csv_groups_rows_into_multi_leg_orders(tmp_path):
+    path = _write(tmp_path, "basket.csv", "\n".join([
+        "group,order_type,time_in_force,gtc_date,price,price_effect,instrument_type,symbol,action,quantity",
+        "a,Limit,Day,,1.50,Debit,Equity Option,SPY  240119C00470000,Buy to Open,1",
+        ",Market,Day,,,,Equity,aapl,Buy to Open,10",
+        "a,,,,,,Equity Option,SPY  240119C00480000,Sell to Open,1",
+        ",,,,,,,,,",
+    ]))
+    first, second = read_order_file(path)
+    assert (first["line"], first["order-type"], first["price"]) == (2, "Limit", "1.50")
+    assert [leg["action"] for leg in first["legs"]] == ["Buy to Open", "Sell to Open"]
+    assert (second["line"], second["price"], second["legs"][0]["symbol"]) == (3, None, "aapl")
+
+
+def test_jsonl_accepts_api_and_flat_orders(tmp_path):
+    path = _write(tmp_path, "basket.jsonl", "\n".join([
+        '{"order-type": "Limit", "time-in-force": "Day", "price": "2", "price-effect": "Debit",'
+        ' "legs": [{"instrument_type": "Equity", "symbol": "SPY", "action": "Buy to Open", "quantity": 1}]}',
+        "",
+        '{"order_type": "Market", "time_in_force": "Day", "instrument_type": "Equity",'
+        ' "symbol": "QQQ", "action": "Sell to Close", "quantity": 2}',
+        "{not json",
+    ]))
+    api, flat, broken = read_order_file(path)
+    assert api["legs"][0]["instrument-type"] == "Equity"
+    assert (flat["line"], flat["legs"][0]["symbol"]) == (3, "QQQ")
+    assert broken["line"] == 4 and broken["error"].startswith("Invalid JSON")
+
+
+def test_unsupported_file_type(tmp_path):
+    with pytest.raises(Exception):
+        read_order_file(_write(tmp_path, "basket.txt", ""))
+
+
+def test_validate_orders_reports_each_bad_line(tmp_path):
+    path = _write(tmp_path, "basket.jsonl", "\n".join([
+        '{"order-type": "Limit", "time-in-force": "Day", "price": "2", "price-effect": "Debit",'
+        ' "instrument-type": "Equity", "symbol": "spy", "action": "Buy to Open", "quantity": "3"}',
+        '{"order-type": "Limit", "time-in-force": "Day", "price": "inf", "price-effect": "Debit",'
+        ' "instrument-type": "Equity", "symbol": "SPY", "action": "Buy to Open", "quantity": "1"}',
+        '{"order-type": "Market", "time-in-force": "Day",'
+        ' "instrument-type": "Equity", "symbol": "SPY", "action": "Buy to Open", "quantity": "1.5"}',
+        "{",
+    ]))
+    valid, errors, notes = validate_orders(read_order_file(path))
+    assert valid == [(1, {"time-in-force": "Day", "order-type": "Limit", "price": 2.0, "price-effect": "Debit",
+                          "legs": [{"instrument-type": "Equity", "symbol": "SPY", "action": "Buy to Open",
+                                    "quantity": 3}]})]
+    assert [line for line, _ in errors] == [2, 3, 4]
+    assert notes == []
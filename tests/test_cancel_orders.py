@@ -0,0 +1,99 @@
+# tests/test_cancel_orders.py
+import time
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from http_client import client
+from orders import cancel_orders_concurrently, cancel_all_orders
+
+
+class _CancelHandler(BaseHTTPRequestHandler):
+    """
+    DELETE /accounts/<account>/orders/<id>: ids starting with "busy" answer 503 until their
+    third attempt, "gone" ids answer 404 and the rest succeed after server.delay seconds.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_DELETE(self):
+        server = self.server
+        order_id = self.path.rstrip("/").split("/")[-1]
+        with server.lock:
+            server.attempts[order_id] = server.attempts.get(order_id, 0) + 1
+            attempt = server.attempts[order_id]
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+        if order_id.startswith("gone"):
+            status = 404
+        elif order_id.startswith("busy") and attempt < 3:
+            status = 503
+        else:
+            status = 200
+        body = b'{"data": {"status": "Cancelled"}}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CancelHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.attempts = {}
+    server.in_flight = server.max_in_flight = 0
+    server.delay = 0.0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(client, "base_url", f"http://127.0.0.1:{server.server_address[1]}")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_cancels_run_in_parallel(server):
+    server.delay = 0.1
+    order_ids = [str(i) for i in range(8)]
+    results, elapsed = cancel_orders_concurrently("token", "5WT00000", order_ids, max_workers=8)
+    assert [result["order_id"] for result in results] == order_ids
+    assert all(result["ok"] and result["attempts"] == 1 for result in results)
+    assert server.max_in_flight > 1
+    assert elapsed < 0.1 * len(order_ids)
+
+
+def test_max_workers_bounds_requests_in_flight(server):
+    server.delay = 0.02
+    cancel_orders_concurrently("token", "5WT00000", [str(i) for i in range(6)], max_workers=2)
+    assert server.max_in_flight <= 2
+
+
+def test_retries_transient_errors_but_not_client_errors(server):
+    results, _ = cancel_orders_concurrently("token", "5WT00000", ["busy1", "gone1", "ok1"],
+                                            max_retries=3, backoff=0.001)
+    busy, gone, ok = results
+    assert busy["ok"] and busy["attempts"] == 3
+    assert not gone["ok"] and gone["attempts"] == 1 and "404" in gone["error"]
+    assert ok["ok"] and ok["attempts"] == 1
+
+
+def test_gives_up_after_max_retries(server):
+    (result,), _ = cancel_orders_concurrently("token", "5WT00000", ["busy1"], max_retries=1, backoff=0.001)
+    assert not result["ok"] and result["attempts"] == 2 and "503" in result["error"]
+
+
+def test_no_orders():
+    assert cancel_orders_concurrently("token", "5WT00000", []) == ([], 0.0)
+
+
+def test_cancel_all_orders_summary(mock_rest, monkeypatch, capsys):
+    monkeypatch.setattr("builtins.input", lambda prompt: "y")
+    cancel_all_orders("token", "5WT00000")
+    out = capsys.readouterr().out
+    assert "Successfully cancelled: 3" in out and "Failed to cancel: 0" in out
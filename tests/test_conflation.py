@@ -0,0 +1,49 @@
+# tests/test_conflation.py
+import asyncio
+from event_bus import EventBus
+from conflation import Conflator
+from feed_decoder import Quote, Trade
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 10))
+
+
+def _quote(symbol, bid):
+    return Quote("Quote", symbol, bid, bid + 0.01, 1, 1)
+
+
+def test_take_keeps_the_latest_event_per_symbol():
+    async def scenario():
+        bus = EventBus()
+        conflator = Conflator(bus)
+        events = [_quote("SPY", 1.0), _quote("AAPL", 2.0), _quote("SPY", 1.1), _quote("SPY", 1.2),
+                  Trade("Trade", "SPY", 1.15, 10, 1), Trade("Profile", "SPY")]
+        await bus.publish([(event.eventType, event.eventSymbol, event) for event in events])
+        first = conflator.take()
+        second = conflator.take()
+        conflator.close()
+        return first, second, bus.has_subscribers()
+
+    (snapshot, skipped), second, subscribed = run(scenario())
+    assert snapshot[("Quote", "SPY")].bidPrice == 1.2
+    assert snapshot[("Quote", "AAPL")].bidPrice == 2.0
+    assert snapshot[("Trade", "SPY")].price == 1.15
+    assert len(snapshot) == 3 and skipped == 2
+    assert second == ({}, 0)
+    assert not subscribed
+
+
+def test_iteration_yields_one_snapshot_per_interval():
+    async def scenario():
+        bus = EventBus()
+        conflator = Conflator(bus, interval=0.05)
+        for bid in range(100):
+            await bus.publish([("Quote", "SPY", _quote("SPY", bid))])
+        async for snapshot, skipped in conflator:
+            return snapshot, skipped, conflator.stats()
+
+    snapshot, skipped, stats = run(scenario())
+    assert list(snapshot) == [("Quote", "SPY")] and snapshot[("Quote", "SPY")].bidPrice == 99
+    assert skipped == 99
+    assert stats["coalesce_ratio"] == 100 and stats["pending_symbols"] == 0
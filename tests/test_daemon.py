@@ -0,0 +1,103 @@
+# tests/test_daemon.py
+import os
+import shutil
+import tempfile
+import pytest
+
+pytest.importorskip("websockets")
+
+from daemon import TradingDaemon
+from ttctl import request
+from quote_cache import quote_cache
+from account_state import account_store
+from feed_decoder import Quote
+
+ACCOUNT = "5WT00000"
+
+
+class _Session:
+    """The parts of SessionManager the daemon calls when it doesn't start the streams."""
+
+    def get_session_token(self):
+        return "token"
+
+
+@pytest.fixture
+def daemon():
+    # Unix socket paths are limited to ~100 bytes, which pytest's tmp_path can exceed
+    directory = tempfile.mkdtemp(prefix="ttd")
+    daemon = TradingDaemon(socket_path=os.path.join(directory, "d.sock"), symbols=[], account_numbers=[ACCOUNT],
+                           session_manager=_Session())
+    daemon.start(streams=False)
+    yield daemon
+    daemon.stop()
+    quote_cache.clear()
+    account_store.clear()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def call(daemon, cmd, *args):
+    return request(cmd, args, socket_path=daemon.socket_path)
+
+
+def test_ping_and_status(daemon):
+    assert call(daemon, "ping") == "pong"
+    status = call(daemon, "status")
+    assert status["requests"] == 2
+    assert status["market"] == "not started" and status["symbols"] == []
+
+
+def test_errors_come_back_as_messages(daemon):
+    with pytest.raises(Exception, match="Unknown command 'nope'; try: ping, status"):
+        call(daemon, "nope")
+    with pytest.raises(Exception, match="Usage: quote SYMBOL"):
+        call(daemon, "quote")
+    with pytest.raises(Exception, match="Market data stream is not running"):
+        call(daemon, "subscribe", "SPY")
+    with pytest.raises(Exception, match="Bar building is not running"):
+        call(daemon, "bars", "SPY")
+    # The connection handler survives failed commands
+    assert call(daemon, "ping") == "pong"
+
+
+def test_quote_reads_the_cache(daemon):
+    quote_cache.update(Quote("Quote", "SPY", 1.0, 1.1, 100, 200))
+    result = call(daemon, "quote", "SPY", "QQQ")
+    assert result["SPY"]["bidPrice"] == 1.0 and result["SPY"]["askPrice"] == 1.1
+    assert result["QQQ"] is None
+
+
+def test_account_commands_use_rest(daemon, mock_rest):
+    balances = call(daemon, "balances", ACCOUNT)
+    assert balances["net-liquidating-value"] == "100000.00"
+    assert account_store.is_seeded(ACCOUNT)
+    positions = call(daemon, "positions", ACCOUNT)
+    assert [position["symbol"] for position in positions] == ["MOCK0", "MOCK1"]
+    assert call(daemon, "orders", ACCOUNT)[0]["id"] == 1000
+
+
+def test_cancel_all_and_replace(daemon, mock_rest):
+    cancelled = call(daemon, "cancel-all", ACCOUNT)
+    assert len(cancelled["results"]) == 3
+    with pytest.raises(Exception, match="Usage: replace"):
+        call(daemon, "replace", "1000")
+    replaced = call(daemon, "replace", "1000", "1.25", None, ACCOUNT)
+    assert replaced["order"]["id"] > 10000
+
+
+def test_second_daemon_refuses_the_socket(daemon):
+    with pytest.raises(Exception, match="already listening"):
+        TradingDaemon(socket_path=daemon.socket_path, session_manager=_Session())._claim_socket()
+
+
+def test_stale_socket_is_reclaimed(daemon):
+    stale = TradingDaemon(socket_path=daemon.socket_path + ".old", session_manager=_Session())
+    open(stale.socket_path, "w").close()
+    stale._claim_socket()
+    assert not os.path.exists(stale.socket_path)
+
+
+def test_shutdown_replies_then_stops(daemon):
+    assert call(daemon, "shutdown") == "stopping"
+    assert daemon._stopped.wait(5)
+    assert not os.path.exists(daemon.socket_path)
@@ -0,0 +1,98 @@
+# tests/test_event_bus.py
+import asyncio
+import pytest
+from event_bus import EventBus, HandlerConsumer, BLOCK, DROP_OLDEST, CONFLATE
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_drop_oldest():
+    async def scenario():
+        bus = EventBus()
+        subscription = bus.subscribe(maxsize=2, policy=DROP_OLDEST)
+        await bus.publish([("Quote", "SPY", i) for i in range(5)])
+        return subscription.drain(), subscription.dropped
+    assert run(scenario()) == ([3, 4], 3)
+
+
+def test_conflate_keeps_latest_per_key_in_first_seen_order():
+    async def scenario():
+        bus = EventBus()
+        subscription = bus.subscribe(maxsize=10, policy=CONFLATE)
+        await bus.publish([("Quote", "SPY", 1), ("Quote", "AAPL", 2), ("Quote", "SPY", 3), ("Trade", "SPY", 4)])
+        return subscription.drain(), subscription.conflated
+    assert run(scenario()) == ([3, 2, 4], 1)
+
+
+def test_block_waits_for_room_and_loses_nothing():
+    async def scenario():
+        bus = EventBus()
+        subscription = bus.subscribe(maxsize=2, policy=BLOCK)
+        publisher = asyncio.create_task(bus.publish([("Quote", "SPY", i) for i in range(5)]))
+        received = []
+        while len(received) < 5:
+            received.append(await subscription.get())
+        await publisher
+        return received, subscription.blocked > 0, subscription.dropped
+    assert run(scenario()) == ([0, 1, 2, 3, 4], True, 0)
+
+
+def test_filters_and_has_subscribers():
+    async def scenario():
+        bus = EventBus()
+        assert not bus.has_subscribers()
+        trades = bus.subscribe(event_types=["Trade"], symbols=["SPY"])
+        assert bus.has_subscribers()
+        await bus.publish([("Quote", "SPY", 1), ("Trade", "AAPL", 2), ("Trade", "SPY", 3)])
+        bus.unsubscribe(trades)
+        assert not bus.has_subscribers()
+        return trades.drain()
+    assert run(scenario()) == [3]
+
+
+def test_unknown_policy():
+    with pytest.raises(Exception):
+        EventBus().subscribe(policy="bogus")
+
+
+def test_handler_consumer_batches_by_publish_time():
+    calls = []
+
+    async def scenario():
+        bus = EventBus()
+        consumer = HandlerConsumer(bus, [lambda items, at: calls.append((items, at))], batched=True).start()
+        await bus.publish([("Trade", "SPY", 1), ("Trade", "SPY", 2)], 100.0)
+        await bus.publish([("Trade", "SPY", 3)], 101.0)
+        for _ in range(100):
+            if sum(len(items) for items, _ in calls) == 3:
+                break
+            await asyncio.sleep(0.01)
+        await consumer.stop()
+        return bus.has_subscribers()
+    assert run(scenario()) is False
+    assert calls == [([1, 2], 100.0), ([3], 101.0)]
+
+
+def test_handler_consumer_survives_handler_errors(capsys):
+    seen = []
+
+    def handler(item, at):
+        if item == "bad":
+            raise ValueError("boom")
+        seen.append(item)
+
+    async def scenario():
+        bus = EventBus()
+        consumer = HandlerConsumer(bus, [handler], name="test").start()
+        await bus.publish([("Order", "A", "bad"), ("Order", "A", "good")])
+        for _ in range(100):
+            if seen:
+                break
+            await asyncio.sleep(0.01)
+        await consumer.stop()
+        return consumer.errors
+    assert run(scenario()) == 1
+    assert seen == ["good"]
+    assert "Error in test handler: boom" in capsys.readouterr().out
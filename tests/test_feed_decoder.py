@@ -0,0 +1,53 @@
+# tests/test_feed_decoder.py
+import math
+from feed_decoder import CompactDecoder, Quote, Trade, Profile
+
+
+def test_decode_default_layout():
+    decoder = CompactDecoder()
+    events = decoder.decode([
+        "Quote", ["Quote", "SPY", 1.0, 1.1, 100, 200, "Quote", "AAPL", 2.0, 2.1, 10, 20],
+        "Trade", ["Trade", "SPY", 1.05, 5000, 7]
+    ])
+    assert [type(event) for event in events] == [Quote, Quote, Trade]
+    assert events[1].eventSymbol == "AAPL" and events[1].askPrice == 2.1
+    assert events[2].price == 1.05 and events[2].dayVolume == 5000 and events[2].size == 7
+
+
+def test_special_values_become_floats():
+    events = CompactDecoder().decode(["Quote", ["Quote", "SPY", "NaN", "Infinity", 1, 1]])
+    assert math.isnan(events[0].bidPrice)
+    assert events[0].askPrice == float("inf")
+
+
+def test_text_fields_keep_special_strings():
+    profile = ["Profile", "NaN", "NaN", "NaN", "Infinity", "NaN", "NaN", "NaN", 1.0, "NaN", 2.0, 1.0]
+    event, = CompactDecoder().decode(["Profile", profile])
+    assert type(event) is Profile
+    assert (event.eventSymbol, event.description, event.tradingStatus) == ("NaN", "NaN", "Infinity")
+    assert math.isnan(event.haltStartTime) and math.isnan(event.lowLimitPrice)
+    assert event.highLimitPrice == 1.0
+
+
+def test_text_fields_follow_the_server_layout():
+    decoder = CompactDecoder()
+    decoder.update_from_config({"eventFields": {"Trade": ["eventType", "price", "eventSymbol"]}})
+    event, = decoder.decode(["Trade", ["Trade", "NaN", "NaN"]])
+    assert math.isnan(event.price) and event.eventSymbol == "NaN"
+
+
+def test_layout_from_feed_config():
+    decoder = CompactDecoder()
+    # Server reorders the fields and drops askSize
+    decoder.update_from_config({"eventFields": {"Quote": ["eventType", "eventSymbol", "askPrice", "bidPrice", "bidSize"]}})
+    event, = decoder.decode(["Quote", ["Quote", "SPY", 1.1, 1.0, 100]])
+    assert (event.bidPrice, event.askPrice, event.bidSize, event.askSize) == (1.0, 1.1, 100, None)
+
+
+def test_unknown_event_types():
+    decoder = CompactDecoder()
+    assert decoder.decode(["Greeks", ["Greeks", "SPY", 0.5]]) == []
+    decoder.set_fields("Greeks", ["eventType", "eventSymbol", "delta"])
+    assert decoder.decode(["Greeks", ["Greeks", "SPY", 0.5]]) == [
+        {"eventType": "Greeks", "eventSymbol": "SPY", "delta": 0.5}
+    ]
@@ -0,0 +1,107 @@
+# tests/test_http_client.py
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import http_client
+from http_client import HttpClient
+
+
+class _TokenHandler(BaseHTTPRequestHandler):
+    """Accepts only the server's current token; records the Authorization header of every request."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        token = self.headers.get("Authorization")
+        self.server.seen.append(token)
+        status = 200 if token == self.server.valid_token else 401
+        body = b'{"data": {}}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _TokenHandler)
+    server.seen = []
+    server.valid_token = "token-1"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(server):
+    client = HttpClient(base_url=f"http://127.0.0.1:{server.server_address[1]}")
+    yield client
+    client.close()
+
+
+def _relogin(server):
+    """An unauthorized handler that 'logs in again' by rotating the server's token."""
+    calls = []
+
+    def handler(rejected_token):
+        calls.append(rejected_token)
+        number = int(server.valid_token.split("-")[1]) + 1
+        server.valid_token = f"token-{number}"
+        return server.valid_token
+    return handler, calls
+
+
+def test_401_logs_in_again_and_retries_once(server, client):
+    handler, calls = _relogin(server)
+    client.set_unauthorized_handler(handler)
+    server.valid_token = "token-2"
+    response = client.get("/accounts", session_token="token-1")
+    assert response.status_code == 200
+    assert calls == ["token-1"]
+    assert server.seen == ["token-1", "token-3"]
+
+
+def test_401_without_handler_is_returned(server, client):
+    server.valid_token = "token-2"
+    assert client.get("/accounts", session_token="token-1").status_code == 401
+    assert server.seen == ["token-1"]
+
+
+def test_stale_token_is_mapped_to_the_new_one(server, client):
+    handler, calls = _relogin(server)
+    client.set_unauthorized_handler(handler)
+    client.set_auth_token("token-1")
+    server.valid_token = "token-2"
+    client.get("/accounts", session_token="token-1")
+    # Callers still holding the old token go straight to the new one
+    assert client.get("/accounts", session_token="token-1").status_code == 200
+    assert client.auth_token == "token-3"
+    assert server.seen[-1] == "token-3"
+    assert len(calls) == 1
+
+
+def test_alias_chains_collapse():
+    client = HttpClient(base_url="http://127.0.0.1:1")
+    try:
+        client._alias_token("a", "b")
+        client._alias_token("b", "c")
+        client._alias_token("c", "d")
+        assert client._token_aliases == {"a": "d", "b": "d", "c": "d"}
+    finally:
+        client.close()
+
+
+def test_alias_map_is_capped(monkeypatch):
+    monkeypatch.setattr(http_client, "MAX_TOKEN_ALIASES", 3)
+    client = HttpClient(base_url="http://127.0.0.1:1")
+    try:
+        for i in range(10):
+            client._alias_token(f"t{i}", f"t{i + 1}")
+        assert client._token_aliases == {"t7": "t10", "t8": "t10", "t9": "t10"}
+    finally:
+        client.close()
+
@@ -0,0 +1,92 @@
+# tests/test_instruments.py
+import json
+import pytest
+from instruments import InstrumentCache, snap_price, tick_size_for, _tick_schedule
+
+# $0.01 below $3, $0.05 from $3 up: the usual option tick schedule
+OPTION_TICKS = _tick_schedule([{"value": "0.05"}, {"value": "0.01", "threshold": "3.0"}])
+
+
+def test_tick_schedule_is_sorted_by_threshold():
+    assert OPTION_TICKS == [(3.0, "0.01"), (None, "0.05")]
+    assert tick_size_for(OPTION_TICKS, 2.99) == "0.01"
+    assert tick_size_for(OPTION_TICKS, 3.0) == "0.05"
+    assert tick_size_for([(1.0, "0.0001")], 5.0) == "0.0001"
+    assert tick_size_for([], 5.0) is None
+
+
+@pytest.mark.parametrize("price, expected", [
+    (1.234, 1.23),
+    (1.235, 1.24),      # half up, decided in decimal and not on the binary float
+    (3.02, 3.0),
+    (3.03, 3.05),
+    (3.075, 3.1),
+    (0.001, 0.01),      # never snapped down to zero
+])
+def test_snap_price(price, expected):
+    assert snap_price(price, OPTION_TICKS) == expected
+
+
+def test_snap_price_without_a_usable_tick():
+    assert snap_price(1.234, []) == 1.234
+    assert snap_price(1.234, [(None, "0")]) == 1.234
+
+
+@pytest.fixture
+def cache(tmp_path, mock_rest):
+    return InstrumentCache(cache_file=str(tmp_path / "instruments.json"))
+
+
+def _order(price, *legs):
+    return {"order-type": "Limit", "price": price,
+            "legs": [{"instrument-type": kind, "symbol": symbol, "quantity": quantity}
+                     for kind, symbol, quantity in legs]}
+
+
+def test_validate_order_snaps_to_the_underlyings_option_ticks(cache):
+    order, notes = cache.validate_order("token", _order(3.03, ("Equity Option", "SPY   240119C00470000", 1)))
+    assert order["price"] == 3.05
+    assert notes == ["Price 3.03 snapped to tick size: 3.05"]
+    order, notes = cache.validate_order("token", _order(2.5, ("Equity", "SPY", 1)))
+    assert order["price"] == 2.5 and notes == []
+
+
+def test_validate_order_rejects_unknown_symbols_and_extra_precision(cache):
+    with pytest.raises(ValueError):
+        cache.validate_order("token", _order(1.0, ("Equity", "BADSYM", 1)))
+    with pytest.raises(ValueError):
+        cache.validate_order("token", _order(1.0, ("Cryptocurrency", "BTC/USD", 0.123456789)))
+    order, _ = cache.validate_order("token", _order(1.0, ("Cryptocurrency", "BTC/USD", 0.12345678)))
+    assert order["legs"][0]["quantity"] == 0.12345678
+
+
+def test_unreachable_metadata_does_not_block_orders(tmp_path, monkeypatch):
+    from http_client import client
+    monkeypatch.setattr(client, "base_url", "http://127.0.0.1:1")
+    cache = InstrumentCache(cache_file=str(tmp_path / "instruments.json"))
+    order, notes = cache.validate_order("token", _order(1.234, ("Equity", "SPY", 1)))
+    assert order["price"] == 1.234
+    assert notes == ["Could not load instrument data for SPY; not validated."]
+    assert cache.get("token", "Equity", "SPY") is None
+
+
+def test_prefetch_saves_once_and_the_next_run_reuses_the_file(cache, mock_rest):
+    cache.prefetch("token", [("Equity", "SPY"), ("Future", "/ESZ4"), ("Equity", "BADSYM"), ("Equity", "SPY")])
+    with open(cache.cache_file) as f:
+        saved = json.load(f)
+    assert sorted(saved) == ["Equity:BADSYM", "Equity:SPY", "Future:/ESZ4"]
+    assert saved["Equity:BADSYM"]["exists"] is False
+
+    mock_rest.stop()
+    reloaded = InstrumentCache(cache_file=cache.cache_file)
+    entry = reloaded.get("token", "Future", "/ESZ4")
+    assert entry["tick_sizes"] == [(None, "0.25")]
+
+
+def test_expired_entries_are_dropped(cache):
+    cache.get("token", "Equity", "SPY")
+    cache.get("token", "Equity", "BADSYM")
+    cache.negative_ttl = -1
+    cache.prefetch("token", [("Equity", "QQQ")])
+    with open(cache.cache_file) as f:
+        assert sorted(json.load(f)) == ["Equity:QQQ", "Equity:SPY"]
@@ -0,0 +1,295 @@
+# tests/test_market_stream.py
+import json
+import time
+import socket
+import asyncio
+import contextlib
+import pytest
+import market_stream
+from market_stream import MarketDataStream, ShardedMarketStream, stream_market_data
+from mock_server import MockServer
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 20))
+
+
+async def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached in time")
+        await asyncio.sleep(0.01)
+
+
+@contextlib.asynccontextmanager
+async def mock_server(**kwargs):
+    options = dict(dxlink_port=0, account_port=0, rate=200, batch=2, account_rate=0, seed=1)
+    options.update(kwargs)
+    server = await RecordingServer(**options).start()
+    try:
+        yield server
+    finally:
+        await server.stop()
+
+
+class _RecordingSocket:
+    """Server-side websocket wrapper that keeps every frame the client sent."""
+
+    def __init__(self, websocket, frames):
+        self._websocket = websocket
+        self._frames = frames
+
+    def __getattr__(self, name):
+        return getattr(self._websocket, name)
+
+    async def __aiter__(self):
+        async for message in self._websocket:
+            self._frames.append(json.loads(message))
+            yield message
+
+
+class RecordingServer(MockServer):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.frames = []
+
+    async def _dxlink_handler(self, websocket, *args):
+        await super()._dxlink_handler(_RecordingSocket(websocket, self.frames), *args)
+
+    def subscriptions(self):
+        return [frame for frame in self.frames if frame["type"] == "FEED_SUBSCRIPTION"]
+
+
+@contextlib.asynccontextmanager
+async def running(stream):
+    task = asyncio.create_task(stream.run())
+    try:
+        yield task
+    finally:
+        stream.stop()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+def _closed_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(autouse=True)
+def fast_reconnects(monkeypatch):
+    monkeypatch.setattr(market_stream, "RECONNECT_BACKOFF_BASE", 0.01)
+
+
+def test_reconnects_and_restores_the_subscription():
+    async def scenario():
+        async with mock_server() as server:
+            stream = MarketDataStream(server.dxlink_url, "token", ["SPY"], echo=False)
+            seen = []
+            stream.add_handler(lambda events, received_at: seen.extend(event.eventSymbol for event in events))
+            async with running(stream):
+                await wait_until(lambda: seen)
+                await stream.websocket.close()
+                await wait_until(lambda: stream.reconnects == 1 and stream.connected)
+                count = len(seen)
+                # Data only flows again if the subscription was replayed on the new connection
+                await wait_until(lambda: len(seen) > count)
+                return stream.stats(), set(seen)
+
+    stats, symbols = run(scenario())
+    assert symbols == {"SPY"}
+    assert stats["outages"] == 1 and stats["in_outage_since"] is None
+    outage = stats["last_outage"]
+    assert outage["reason"].startswith("connection closed")
+    assert outage["restored_at"] >= outage["started_at"]
+
+
+def test_backoff_doubles_up_to_the_cap_then_gives_up(monkeypatch):
+    monkeypatch.setattr(market_stream, "RECONNECT_BACKOFF_MAX", 0.03)
+    monkeypatch.setattr(market_stream, "RECONNECT_MAX_ATTEMPTS", 4)
+    bounds = []
+    monkeypatch.setattr(market_stream.random, "uniform", lambda low, high: bounds.append(high) or 0)
+    stream = MarketDataStream(f"ws://127.0.0.1:{_closed_port()}", "token", ["SPY"], echo=False)
+    run(stream.run())
+    assert bounds == [0.01, 0.02, 0.03, 0.03]
+    assert stream.reconnects == 4 and not stream.running
+    outage, = stream.outages
+    assert outage["attempts"] == 4 and outage["restored_at"] is None
+
+
+def test_token_provider_errors_are_retried():
+    calls = []
+
+    def token_provider():
+        calls.append(time.time())
+        if len(calls) == 1:
+            raise Exception("Failed to obtain API quote token")
+        return "fresh-token", None
+
+    async def scenario():
+        async with mock_server() as server:
+            stream = MarketDataStream(server.dxlink_url, "stale-token", ["SPY"], echo=False,
+                                      token_provider=token_provider)
+            # As after DXLink rejected the token
+            stream._token_stale = True
+            async with running(stream):
+                await wait_until(lambda: stream.connected)
+                return stream
+
+    stream = run(scenario())
+    assert len(calls) == 2
+    assert stream.api_quote_token == "fresh-token" and stream.reconnects == 1
+
+
+def test_handler_errors_reconnect_instead_of_ending_the_stream():
+    calls = []
+
+    def handler(events, received_at):
+        calls.append(len(events))
+        if len(calls) == 1:
+            raise RuntimeError("handler bug")
+
+    async def scenario():
+        async with mock_server() as server:
+            stream = MarketDataStream(server.dxlink_url, "token", ["SPY"], echo=False)
+            stream.add_handler(handler)
+            async with running(stream) as task:
+                await wait_until(lambda: len(calls) > 2)
+                return stream, task.done()
+
+    stream, done = run(scenario())
+    assert not done
+    assert stream.reconnects == 1
+    assert stream.outages[0]["reason"] == "RuntimeError: handler bug"
+
+
+def test_cancelling_stream_market_data_propagates():
+    async def scenario():
+        async with mock_server() as server:
+            task = asyncio.create_task(stream_market_data(server.dxlink_url, "token", ["SPY"], echo=False))
+            await wait_until(lambda: market_stream.active_stream is not None and market_stream.active_stream.connected)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return task.cancelled()
+
+    assert run(scenario())
+
+
+def _pairs(frame, action):
+    return [(entry["symbol"], entry["type"]) for entry in frame.get(action, [])]
+
+
+def test_subscribe_and_unsubscribe_send_only_the_delta():
+    async def scenario():
+        async with mock_server() as server:
+            stream = MarketDataStream(server.dxlink_url, "token", ["SPY"], echo=False)
+            seen = set()
+            stream.add_handler(lambda events, received_at: seen.update(event.eventSymbol for event in events))
+            async with running(stream):
+                await wait_until(lambda: stream.connected)
+                initial, = server.subscriptions()
+                results = [await stream.subscribe(["SPY", "AAPL"], ["Quote", "Trade"])]
+                results.append(await stream.subscribe(["AAPL"], ["Quote"]))
+                await wait_until(lambda: "AAPL" in seen)
+                results.append(await stream.unsubscribe(["SPY"], ["Profile"]))
+                results.append(await stream.unsubscribe(["AAPL"]))
+                results.append(await stream.unsubscribe(["QQQ"]))
+                await wait_until(lambda: len(server.subscriptions()) == 4)
+                return initial, server.subscriptions()[1:], results, stream.subscriptions
+
+    initial, updates, results, subscriptions = run(scenario())
+    assert initial["reset"] is True
+    assert sorted(_pairs(initial, "add")) == [("SPY", event_type) for event_type in
+                                              sorted(market_stream.DEFAULT_EVENT_TYPES)]
+    assert results == [2, 0, 1, 2, 0]
+    # Removing every event type of a symbol sends them in set order
+    assert [sorted(_pairs(frame, "add") + _pairs(frame, "remove")) for frame in updates] == [
+        [("AAPL", "Quote"), ("AAPL", "Trade")],
+        [("SPY", "Profile")],
+        [("AAPL", "Quote"), ("AAPL", "Trade")]
+    ]
+    assert not any(frame.get("reset") for frame in updates)
+    assert subscriptions == {"SPY": {"Quote", "Trade", "Summary"}}
+
+
+def test_subscriptions_before_connecting_are_sent_with_the_handshake():
+    async def scenario():
+        async with mock_server() as server:
+            stream = MarketDataStream(server.dxlink_url, "token", [], echo=False)
+            assert await stream.subscribe(["SPY"], ["Quote"]) == 1
+            async with running(stream):
+                await wait_until(lambda: stream.connected)
+                return server.subscriptions()
+
+    frame, = run(scenario())
+    assert frame["reset"] is True and _pairs(frame, "add") == [("SPY", "Quote")]
+
+
+def test_feed_subscription_messages_are_batched(monkeypatch):
+    monkeypatch.setattr(market_stream, "FEED_SUBSCRIPTION_BATCH_SIZE", 3)
+    symbols = [f"SYM{i}" for i in range(7)]
+
+    async def scenario():
+        async with mock_server() as server:
+            stream = MarketDataStream(server.dxlink_url, "token", [], echo=False)
+            await stream.subscribe(symbols, ["Quote"])
+            async with running(stream):
+                await wait_until(lambda: stream.connected)
+                handshake = server.subscriptions()
+                await stream.subscribe(["NEW1", "NEW2", "NEW3", "NEW4"], ["Quote"])
+                await stream.unsubscribe(symbols)
+                await wait_until(lambda: len(server.subscriptions()) == len(handshake) + 5)
+                return handshake, server.subscriptions()[len(handshake):]
+
+    handshake, updates = run(scenario())
+    assert [len(frame["add"]) for frame in handshake] == [3, 3, 1]
+    # Only the first frame of a handshake resets the channel
+    assert [frame.get("reset", False) for frame in handshake] == [True, False, False]
+    assert sorted(symbol for frame in handshake for symbol, _ in _pairs(frame, "add")) == sorted(symbols)
+    assert [len(frame.get("add", [])) for frame in updates] == [3, 1, 0, 0, 0]
+    assert [len(frame.get("remove", [])) for frame in updates] == [0, 0, 3, 3, 1]
+
+
+def test_sharding_spreads_symbols_and_merges_events():
+    symbols = [f"SYM{i}" for i in range(8)]
+
+    async def scenario():
+        async with mock_server(batch=4) as server:
+            stream = ShardedMarketStream(server.dxlink_url, "token", symbols, echo=False,
+                                         connections=2, channels_per_connection=2)
+            seen = set()
+            stream.add_handler(lambda events, received_at: seen.update(event.eventSymbol for event in events))
+            async with running(stream):
+                await wait_until(lambda: stream.connected and seen == set(symbols))
+                added = await stream.subscribe(["NEW"], ["Quote"])
+                await wait_until(lambda: "NEW" in seen)
+                removed = await stream.unsubscribe(["NEW", "SYM0"])
+                return stream.stats(), added, removed, set(stream.subscriptions)
+
+    stats, added, removed, subscribed = run(scenario())
+    assert (added, removed) == (1, 1 + len(market_stream.DEFAULT_EVENT_TYPES))
+    assert subscribed == set(symbols[1:])
+    assert sorted(shard["symbols"] for shard in stats["shards"]) == [3, 4]
+    for shard in stats["shards"]:
+        assert [channel["channel"] for channel in shard["channels"]] == [3, 5]
+        assert all(channel["events"] > 0 for channel in shard["channels"])
+
+
+def test_a_failing_shard_stops_the_others():
+    async def scenario():
+        async with mock_server() as server:
+            stream = ShardedMarketStream(server.dxlink_url, "token", ["SPY", "QQQ"], echo=False, connections=2)
+            healthy, failing = stream.shards
+
+            async def fail():
+                raise RuntimeError("shard crashed")
+            failing.run = fail
+            with pytest.raises(RuntimeError):
+                await stream.run()
+            return healthy
+
+    healthy = run(scenario())
+    assert not healthy.running
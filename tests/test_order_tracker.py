@@ -0,0 +1,59 @@
+# tests/test_order_tracker.py
+import time
+import order_tracker
+from order_tracker import OrderTracker
+
+LIMIT_EQUITY = {"order-type": "Limit", "legs": [{"instrument-type": "Equity"}]}
+
+
+def _order(order_id, **fields):
+    return dict(LIMIT_EQUITY, id=order_id, **fields)
+
+
+def _update(order_id, status):
+    return {"type": "Order", "data": {"id": order_id, "status": status}}
+
+
+def test_lifecycle_and_latencies():
+    tracker = OrderTracker()
+    now = time.time()
+    tracked = tracker.register(_order(1), "A", now - 0.1, acked_at=now)
+    tracker.handle_message(_update(1, "Live"), now + 0.1)
+    tracker.handle_message(_update(1, "Filled"), now + 0.2)
+    assert tracked.wait(1) == "Filled"
+    assert [status for status, _ in tracked.history] == ["Received", "Live", "Filled"]
+    stats = tracker.stats()["Limit / Equity"]
+    assert stats["ack"]["count"] == stats["live"]["count"] == stats["fill"]["count"] == 1
+
+
+def test_early_updates_are_claimed_on_register():
+    tracker = OrderTracker()
+    now = time.time()
+    # The stream beats the POST response
+    tracker.handle_message(_update(7, "Live"), now)
+    tracker.handle_message(_update(7, "Filled"), now + 0.01)
+    assert tracker.get(7) is None
+    assert tracker.last_status(7) == "Filled"
+    tracked = tracker.register(_order(7), "A", now - 0.05, acked_at=now + 0.02)
+    assert tracked.done.done() and tracked.status == "Filled"
+
+
+def test_ids_match_across_types():
+    tracker = OrderTracker()
+    tracker.register(_order(42), "A", time.time())
+    tracker.handle_message(_update(42, "Cancelled"))
+    assert tracker.get("42").status == "Cancelled"
+    assert tracker.last_status(" 42 ") == "Cancelled"
+
+
+def test_finished_orders_and_samples_are_bounded(monkeypatch):
+    monkeypatch.setattr(order_tracker, "FINISHED_LIMIT", 5)
+    tracker = OrderTracker()
+    for order_id in range(20):
+        tracker.register(_order(order_id), "A", time.time())
+        tracker.handle_message(_update(order_id, "Filled"))
+    tracker.register(_order(99), "A", time.time())
+    assert sorted(order.order_id for order in tracker.orders()) == [15, 16, 17, 18, 19, 99]
+    histogram = tracker._histograms[("Limit", "Equity")]["ack"]
+    assert histogram.count == 21
+    assert histogram.samples.maxlen == order_tracker.LATENCY_SAMPLES
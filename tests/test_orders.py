@@ -0,0 +1,37 @@
+# tests/test_orders.py
+import pytest
+from orders import validate_quantity, validate_price
+
+
+@pytest.mark.parametrize("quantity, instrument_type, expected", [
+    ("3", "Equity", 3),
+    ("2.0", "Future", 2),
+    ("0.25", "Cryptocurrency", 0.25),
+])
+def test_validate_quantity_accepts(quantity, instrument_type, expected):
+    result = validate_quantity(quantity, instrument_type)
+    assert result == expected
+    assert type(result) is type(expected)
+
+
+@pytest.mark.parametrize("quantity, instrument_type", [
+    ("1.5", "Equity"),
+    ("0", "Equity"),
+    ("-1", "Cryptocurrency"),
+    ("abc", "Equity"),
+    (None, "Equity"),
+    ("inf", "Equity"),
+    ("1e400", "Equity"),
+    ("inf", "Cryptocurrency"),
+    ("nan", "Cryptocurrency"),
+])
+def test_validate_quantity_rejects(quantity, instrument_type):
+    with pytest.raises(ValueError):
+        validate_quantity(quantity, instrument_type)
+
+
+def test_validate_price():
+    assert validate_price("1.25") == 1.25
+    for price in ("0", "-2", "abc", None, "nan", "inf", "-inf", "1e400"):
+        with pytest.raises(ValueError):
+            validate_price(price)
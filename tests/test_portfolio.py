@@ -0,0 +1,51 @@
+# tests/test_portfolio.py
+import portfolio
+from portfolio import fetch_accounts_concurrently, consolidate
+from account_state import account_store
+
+
+def test_fetches_every_account_at_once(mock_rest):
+    mock_rest._server.delay = 0.2
+    snapshots, elapsed = fetch_accounts_concurrently("token", ["A1", "B2", "C3"])
+    assert list(snapshots) == ["A1", "B2", "C3"]
+    for account_number, snapshot in snapshots.items():
+        assert snapshot["errors"] == {}
+        assert snapshot["balances"]["account-number"] == account_number
+        assert len(snapshot["positions"]) == 2 and len(snapshot["live_orders"]) == 3
+        assert account_store.is_seeded(account_number)
+    # Nine requests of 0.2 s each take about one request latency, not nine
+    assert elapsed < 0.2 * 4
+
+
+def test_fetch_subset_and_errors(mock_rest, monkeypatch):
+    snapshots, _ = fetch_accounts_concurrently("token", ["A1"], fetch=("live_orders",))
+    assert snapshots["A1"]["balances"] is None and len(snapshots["A1"]["live_orders"]) == 3
+
+    def fail(session_token, account_number):
+        raise Exception("Failed to fetch account balances: 500")
+    monkeypatch.setitem(portfolio.FETCHERS, "balances", fail)
+    snapshots, _ = fetch_accounts_concurrently("token", ["A1", "B2"], fetch=("balances", "positions"))
+    assert all(snapshot["balances"] is None for snapshot in snapshots.values())
+    assert snapshots["B2"]["errors"] == {"balances": "Failed to fetch account balances: 500"}
+    assert len(snapshots["B2"]["positions"]) == 2
+
+
+def test_consolidate_nets_positions_across_accounts():
+    def position(symbol, quantity, direction):
+        return {"symbol": symbol, "instrument-type": "Equity", "quantity": quantity, "quantity-direction": direction}
+
+    snapshots = {
+        "A1": {"balances": {"cash-balance": "100.5", "net-liquidating-value": "1000"},
+               "positions": [position("SPY", "10", "Long"), position("QQQ", "2", "Short")],
+               "live_orders": [{}, {}], "errors": {}, "latency": 0.1},
+        "B2": {"balances": None, "positions": [position("SPY", "4", "Short")],
+               "live_orders": None, "errors": {"balances": "boom"}, "latency": 0.2}
+    }
+    combined = consolidate(snapshots)
+    assert combined["balances"]["cash-balance"] == 100.5
+    assert combined["balances"]["net-liquidating-value"] == 1000.0
+    assert combined["live_orders"] == 2
+    assert {key: entry["quantity"] for key, entry in combined["positions"].items()} == {
+        ("SPY", "Equity"): 6.0, ("QQQ", "Equity"): -2.0
+    }
+    assert combined["positions"][("SPY", "Equity")]["accounts"] == ["A1", "B2"]
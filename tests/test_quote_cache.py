@@ -0,0 +1,89 @@
+# tests/test_quote_cache.py
+import math
+import threading
+from quote_cache import QuoteCache
+from feed_decoder import Quote, Trade, Profile, Summary
+
+
+def test_latest_value_per_field():
+    cache = QuoteCache()
+    cache.update(Quote("Quote", "SPY", 1.0, 1.2, 10, 20), timestamp=100.0)
+    cache.update(Quote("Quote", "SPY", 1.1, None, 11, 21), timestamp=101.0)  # a missing field keeps its value
+    cache.update(Trade("Trade", "SPY", 1.15, 5000, 3), timestamp=102.0)
+    assert cache.get_quote("SPY") == (1.1, 1.2, 101.0)
+    assert cache.get_last("SPY") == (1.15, 102.0)
+    snapshot = cache.get("SPY")
+    assert snapshot["bidSize"] == 11 and snapshot["dayVolume"] == 5000
+    assert snapshot["quoteTime"] == 101.0 and snapshot["summaryTime"] is None
+    assert math.isnan(snapshot["openInterest"])
+    assert len(cache) == 1 and "SPY" in cache and "QQQ" not in cache
+
+
+def test_profile_text_and_summary():
+    cache = QuoteCache()
+    cache.update(Profile("Profile", "AAPL", "Apple Inc.", "INACTIVE", "ACTIVE", None, 0, 0, 250.0, 150.0))
+    cache.update(Summary("Summary", "AAPL", 0, 190.0, 195.0, 189.0, "NaN"))
+    snapshot = cache.get("AAPL")
+    assert snapshot["description"] == "Apple Inc." and snapshot["tradingStatus"] == "ACTIVE"
+    assert snapshot["highLimitPrice"] == 250.0 and snapshot["dayHighPrice"] == 195.0
+    assert math.isnan(snapshot["prevDayClosePrice"])
+
+
+def test_unknown_event_types_are_ignored():
+    cache = QuoteCache()
+    cache.update(Trade("TimeAndSale", "SPY", 1.0))
+    assert len(cache) == 0 and cache.get("SPY") is None
+
+
+def test_crypto_symbols_resolve_without_the_exchange_suffix():
+    cache = QuoteCache()
+    cache.update(Quote("Quote", "BTC/USD:CXTALP", 60000.0, 60010.0))
+    assert cache.resolve("BTC/USD") == "BTC/USD:CXTALP"
+    assert cache.get("BTC/USD")["symbol"] == "BTC/USD:CXTALP"
+    assert cache.get_mark("BTC/USD") == 60005.0
+
+
+def test_mark_falls_back_to_the_last_trade():
+    cache = QuoteCache()
+    assert cache.get_mark("SPY") is None
+    cache.update(Trade("Trade", "SPY", 500.0))
+    assert cache.get_quote("SPY") is None and cache.get_mark("SPY") == 500.0
+    cache.update(Quote("Quote", "SPY", "NaN", 501.0))
+    assert cache.get_mark("SPY") == 500.0
+    cache.update(Quote("Quote", "SPY", 499.0, 501.0))
+    assert cache.get_mark("SPY") == 500.0 and cache.get_quote("SPY")[:2] == (499.0, 501.0)
+
+
+def test_clear():
+    cache = QuoteCache()
+    cache.update_many([Quote("Quote", "SPY", 1.0, 1.1), Quote("Quote", "QQQ", 2.0, 2.1)])
+    assert cache.symbols() == ["SPY", "QQQ"]
+    cache.clear()
+    assert len(cache) == 0 and cache.get("SPY") is None
+    cache.update(Quote("Quote", "QQQ", 3.0, 3.1))
+    assert cache.get_quote("QQQ")[:2] == (3.0, 3.1)
+
+
+def test_concurrent_writers_and_readers():
+    cache = QuoteCache()
+    symbols = [f"SYM{i}" for i in range(200)]
+
+    def write():
+        for price in range(50):
+            cache.update_many([Quote("Quote", symbol, float(price), price + 1.0) for symbol in symbols])
+
+    errors = []
+
+    def read():
+        for _ in range(2000):
+            quote = cache.get_quote(symbols[-1])
+            if quote is not None and quote[1] - quote[0] != 1.0:
+                errors.append(quote)
+
+    threads = [threading.Thread(target=write), threading.Thread(target=read)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(cache) == 200 and cache.get_quote("SYM0")[:2] == (49.0, 50.0)
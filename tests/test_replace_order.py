@@ -0,0 +1,85 @@
+# tests/test_replace_order.py
+import pytest
+import requests
+import orders
+from orders import replace_order, chase_order
+from instruments import InstrumentCache
+from order_tracker import OrderTracker
+from quote_cache import quote_cache
+from feed_decoder import Quote
+
+ACCOUNT = "5WT00000"
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, mock_rest, monkeypatch):
+    monkeypatch.setattr(orders, "instrument_cache", InstrumentCache(cache_file=str(tmp_path / "instruments.json")))
+    monkeypatch.setattr(orders, "order_tracker", OrderTracker())
+    yield mock_rest
+    quote_cache.clear()
+
+
+def test_replace_snaps_the_price_and_registers_the_new_order():
+    replacement, notes = replace_order("token", ACCOUNT, 1000, price="1.234", quantity=5)
+    assert replacement["id"] == 10001 and replacement["status"] == "Received"
+    assert replacement["price"] == 1.23 and replacement["legs"][0]["quantity"] == 5
+    assert notes == ["Price 1.234 snapped to tick size: 1.23"]
+    assert orders.order_tracker.last_status(10001) == "Received"
+
+
+def test_replace_keeps_the_price_when_none_is_given():
+    replacement, notes = replace_order("token", ACCOUNT, 1000, quantity=2)
+    assert float(replacement["price"]) == 1.0 and notes == []
+
+
+def test_quantity_change_needs_a_single_leg():
+    order = orders.get_order("token", ACCOUNT, 1000)
+    order["legs"] = order["legs"] * 2
+    with pytest.raises(ValueError, match="single-leg"):
+        replace_order("token", ACCOUNT, 1000, quantity=2, order=order)
+
+
+def test_chase_replaces_when_the_quote_moves():
+    quote_cache.update(Quote("Quote", "MOCK0", 1.10, 1.20))
+    order_id, status = chase_order("token", ACCOUNT, 1000, interval=0.01, max_replaces=1, target="mid")
+    assert order_id == orders.order_key(10001) and status == "Received"
+
+
+def _failing_replace(*args, **kwargs):
+    raise requests.exceptions.HTTPError("422 Client Error: order is not working")
+
+
+def test_chase_stops_on_a_final_status_after_a_failed_replace(monkeypatch, capsys):
+    quote_cache.update(Quote("Quote", "MOCK0", 1.10, 1.20))
+    get_order = orders.get_order
+    lookups = []
+
+    def filled_on_recheck(session_token, account_number, order_id):
+        lookups.append(order_id)
+        order = get_order(session_token, account_number, order_id)
+        return order if len(lookups) == 1 else dict(order, status="Filled")
+
+    monkeypatch.setattr(orders, "get_order", filled_on_recheck)
+    monkeypatch.setattr(orders, "replace_order", _failing_replace)
+    assert chase_order("token", ACCOUNT, 1000, interval=0.01)[1] == "Filled"
+    assert "Replace failed" not in capsys.readouterr().out
+
+
+def test_chase_keeps_the_last_status_when_the_recheck_fails(monkeypatch, capsys):
+    quote_cache.update(Quote("Quote", "MOCK0", 1.10, 1.20))
+    get_order = orders.get_order
+    lookups = []
+
+    def unreachable_on_recheck(session_token, account_number, order_id):
+        lookups.append(order_id)
+        if len(lookups) > 1:
+            raise requests.exceptions.ConnectionError("connection reset")
+        return get_order(session_token, account_number, order_id)
+
+    monkeypatch.setattr(orders, "get_order", unreachable_on_recheck)
+    monkeypatch.setattr(orders, "replace_order", _failing_replace)
+    order_id, status = chase_order("token", ACCOUNT, 1000, interval=0.01)
+    out = capsys.readouterr().out
+    assert status == "Live"
+    assert "could not re-check the order either: connection reset" in out
+    assert "Order 1000: Live after 0 replacement(s)" in out
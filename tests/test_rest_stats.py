@@ -0,0 +1,55 @@
+# tests/test_rest_stats.py
+import json
+import pytest
+import requests
+from http_client import HttpClient
+from rest_stats import RestStats, endpoint_name
+
+
+@pytest.mark.parametrize("method, url, expected", [
+    ("GET", "https://api.example.com/accounts/5WW1/orders/42?x=1", "GET /accounts/{account}/orders/{id}"),
+    ("GET", "https://api.example.com/accounts/5WW1/balances", "GET /accounts/{account}/balances"),
+    ("GET", "/instruments/equities/SPY", "GET /instruments/equities/{symbol}"),
+    ("POST", "https://api.example.com/sessions", "POST /sessions"),
+])
+def test_endpoint_name(method, url, expected):
+    assert endpoint_name(method, url) == expected
+
+
+def test_latency_percentiles_and_buckets():
+    stats = RestStats()
+    for ms in range(1, 101):
+        stats.record("GET", "/accounts/A1/balances", 200, ms / 1000)
+    stats.record("GET", "/accounts/B2/balances", 503, 7.0, retry=True)
+    endpoint = stats.snapshot()["endpoints"]["GET /accounts/{account}/balances"]
+    assert endpoint["count"] == 101 and endpoint["errors"] == 1 and endpoint["retries"] == 1
+    assert endpoint["p50_ms"] == 51 and endpoint["max_ms"] == 7000
+    assert endpoint["statuses"] == {"200": 100, "503": 1}
+    assert endpoint["histogram"]["<=1ms"] == 1 and endpoint["histogram"][">5000ms"] == 1
+    assert sum(endpoint["histogram"].values()) == 101
+
+
+def test_client_records_every_request(mock_rest):
+    client = HttpClient(base_url=mock_rest.url, stats=RestStats())
+    try:
+        client.get("/accounts/A1/orders/live")
+        client.get("/accounts/A1/orders/live", attempt=2)
+        client.get("/nothing/here")
+        client.base_url = "http://127.0.0.1:1"
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.get("/accounts/A1/balances")
+    finally:
+        client.close()
+    endpoints = client.stats.snapshot()["endpoints"]
+    assert endpoints["GET /accounts/{account}/orders/live"]["retries"] == 1
+    assert endpoints["GET /nothing/here"]["statuses"] == {"404": 1}
+    assert endpoints["GET /accounts/{account}/balances"]["statuses"] == {"ConnectionError": 1}
+    assert endpoints["GET /accounts/{account}/balances"]["errors"] == 1
+
+
+def test_export_json(tmp_path):
+    stats = RestStats()
+    stats.record("DELETE", "/accounts/A1/orders/7", 200, 0.01)
+    path = tmp_path / "stats.json"
+    stats.export_json(str(path))
+    assert list(json.loads(path.read_text())["endpoints"]) == ["DELETE /accounts/{account}/orders/{id}"]
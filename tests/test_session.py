@@ -0,0 +1,136 @@
+# tests/test_session.py
+import os
+import json
+import stat
+import time
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import session
+from session import SessionManager, _parse_expiration
+
+
+class _SessionHandler(BaseHTTPRequestHandler):
+    """Logs in with a password or the last remember-token and hands out API quote tokens for the current session."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length"))))
+        server.logins.append("remember-token" if "remember-token" in payload else "password")
+        if payload.get("remember-token", server.remember_token) != server.remember_token or \
+                payload.get("password", "secret") != "secret":
+            self._reply(401, {"error": {"message": "invalid credentials"}})
+            return
+        server.session = f"session-{len(server.logins)}"
+        server.remember_token = f"remember-{len(server.logins)}"
+        self._reply(201, {"data": {"session-token": server.session, "remember-token": server.remember_token,
+                                   "session-expiration": server.expiration}})
+
+    def do_GET(self):
+        server = self.server
+        if self.headers.get("Authorization") != server.session:
+            self._reply(401, {"error": {"message": "session expired"}})
+            return
+        server.quote_tokens += 1
+        self._reply(200, {"data": {"token": f"quote-{server.quote_tokens}", "dxlink-url": "wss://dxlink.test"}})
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SessionHandler)
+    server.logins = []
+    server.session = None
+    server.remember_token = None
+    server.quote_tokens = 0
+    server.expiration = None
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(session, "SESSION_URL", f"{url}/sessions")
+    monkeypatch.setattr(session, "API_QUOTE_TOKEN_URL", f"{url}/api-quote-tokens")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _manager(cache_file, login="user"):
+    return SessionManager(login, "secret", cache_file=cache_file)
+
+
+def test_tokens_are_reused_and_cached_on_disk(server, tmp_path):
+    cache_file = str(tmp_path / "session.json")
+    manager = _manager(cache_file)
+    assert manager.get_session_token() == "session-1"
+    assert manager.get_session_token() == "session-1"
+    assert manager.get_quote_token() == ("quote-1", "wss://dxlink.test")
+    assert manager.get_quote_token() == ("quote-1", "wss://dxlink.test")
+    assert server.logins == ["password"]
+    assert stat.S_IMODE(os.stat(cache_file).st_mode) == 0o600
+
+    # A restart reuses both tokens without logging in
+    restarted = _manager(cache_file)
+    assert restarted.get_session_token() == "session-1"
+    assert restarted.get_quote_token() == ("quote-1", "wss://dxlink.test")
+    assert server.logins == ["password"] and server.quote_tokens == 1
+    assert restarted.get_quote_token(force_refresh=True)[0] == "quote-2"
+
+
+def test_cache_of_another_login_is_ignored(server, tmp_path):
+    cache_file = str(tmp_path / "session.json")
+    _manager(cache_file).get_session_token()
+    assert _manager(cache_file, login="someone-else").session_token is None
+
+
+def test_expired_session_logs_in_with_the_remember_token(server, tmp_path):
+    cache_file = str(tmp_path / "session.json")
+    _manager(cache_file).get_session_token()
+    with open(cache_file) as f:
+        cached = json.load(f)
+    cached["session-expires-at"] = time.time()
+    with open(cache_file, "w") as f:
+        json.dump(cached, f)
+    assert _manager(cache_file).get_session_token() == "session-2"
+    assert server.logins == ["password", "remember-token"]
+
+
+def test_rejected_remember_token_falls_back_to_the_password(server):
+    manager = _manager(None)
+    manager.remember_token = "revoked"
+    assert manager.get_session_token() == "session-2"
+    assert server.logins == ["remember-token", "password"]
+    assert manager.remember_token == "remember-2"
+
+
+def test_handle_unauthorized(server):
+    manager = _manager(None)
+    first = manager.get_session_token()
+    assert manager.handle_unauthorized(first) == "session-2"
+    # A caller still holding the first token gets the fresh one without another login
+    assert manager.handle_unauthorized(first) == "session-2"
+    assert len(server.logins) == 2
+
+
+def test_quote_token_401_logs_in_again(server):
+    manager = _manager(None)
+    manager.get_session_token()
+    server.session = "revoked"
+    assert manager.get_quote_token()[0] == "quote-1"
+    assert manager.session_token == "session-2"
+
+
+def test_parse_expiration():
+    assert _parse_expiration("2030-01-01T00:00:00Z", 60) == 1893456000.0
+    assert _parse_expiration("2030-01-01T00:00:00.000+00:00", 60) == 1893456000.0
+    assert _parse_expiration("not a date", 60) == pytest.approx(time.time() + 60, abs=5)
+    assert _parse_expiration(None, 60) == pytest.approx(time.time() + 60, abs=5)
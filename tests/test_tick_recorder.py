@@ -0,0 +1,51 @@
+# tests/test_tick_recorder.py
+import os
+import pytest
+
+pytest.importorskip("numpy")
+
+from tick_recorder import TickRecorder, TickReader, HEADER, RECORD_LAYOUTS
+from feed_decoder import Trade, Quote
+
+T0 = 1_700_000_000.0
+
+
+def _record(directory, events):
+    recorder = TickRecorder(str(directory))
+    recorder.record(events, T0)
+    recorder.close()
+
+
+def test_round_trip(tmp_path):
+    _record(tmp_path, [Trade("Trade", "SPY", 1.5, 100, 2), Quote("Quote", "AAPL", 1.0, 1.1, 3, 4)])
+    reader = TickReader(str(tmp_path))
+    day, = reader.days()
+    assert reader.symbols(day) == ["SPY", "AAPL"]
+    trades = reader.trades(day)
+    assert trades["price"].tolist() == [1.5] and trades["size"].tolist() == [2.0]
+    assert reader.quotes(day)["askPrice"].tolist() == [1.1]
+    assert reader.symbol_id(day, "AAPL") == 1
+
+
+def test_append_after_partial_record(tmp_path):
+    _record(tmp_path, [Trade("Trade", "SPY", 1.0, 10, 1)] * 2)
+    day, = TickReader(str(tmp_path)).days()
+    path = os.path.join(str(tmp_path), day, RECORD_LAYOUTS["Trade"]["file"])
+    with open(path, "ab") as f:
+        f.write(b"\x01" * 20)  # what a crash mid-write leaves behind
+
+    _record(tmp_path, [Trade("Trade", "SPY", 2.0, 11, 1)])
+    record_size = RECORD_LAYOUTS["Trade"]["struct"].size
+    assert (os.path.getsize(path) - HEADER.size) % record_size == 0
+    assert TickReader(str(tmp_path)).trades(day)["price"].tolist() == [1.0, 1.0, 2.0]
+
+
+def test_truncated_header_starts_over(tmp_path):
+    _record(tmp_path, [Trade("Trade", "SPY", 1.0, 10, 1)])
+    day, = TickReader(str(tmp_path)).days()
+    path = os.path.join(str(tmp_path), day, RECORD_LAYOUTS["Trade"]["file"])
+    with open(path, "r+b") as f:
+        f.truncate(HEADER.size - 4)
+
+    _record(tmp_path, [Trade("Trade", "SPY", 3.0, 12, 1)])
+    assert TickReader(str(tmp_path)).trades(day)["price"].tolist() == [3.0]
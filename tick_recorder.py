@@ -0,0 +1,250 @@
+# tick_recorder.py
+import os
+import struct
+import time
+from datetime import datetime, timezone, timedelta
+from config import TICK_RECORD_DIR
+
+# Every data file starts with a 16 byte header: 8 byte magic, uint32 record size, uint32 reserved.
+# Records are fixed size and little-endian: int64 receive time (ns since epoch), uint32 symbol id
+# (line number in the day's symbols.txt), then the event's numeric fields as float64.
+HEADER = struct.Struct("<8sII")
+
+RECORD_LAYOUTS = {
+    "Trade": {
+        "file": "trades.bin",
+        "magic": b"TTTRADE1",
+        "fields": ("price", "size", "dayVolume"),
+        "struct": struct.Struct("<qIddd")
+    },
+    "Quote": {
+        "file": "quotes.bin",
+        "magic": b"TTQUOTE1",
+        "fields": ("bidPrice", "askPrice", "bidSize", "askSize"),
+        "struct": struct.Struct("<qIdddd")
+    }
+}
+
+SYMBOLS_FILE = "symbols.txt"
+
+_NAN = float("nan")
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return _NAN
+
+
+class TickRecorder:
+    """
+    Appends decoded Trade/Quote events to fixed-record binary files, one directory per UTC day:
+
+        <directory>/<YYYYMMDD>/trades.bin, quotes.bin, symbols.txt
+
+    record(events, received_at) has the same signature as a market stream handler, so it can be
+    attached with MarketDataStream.add_handler(). Symbols are interned per day; the id is the
+    line number in symbols.txt, which is written before the first record that uses it.
+    """
+
+    def __init__(self, directory=TICK_RECORD_DIR, buffer_size=1 << 20):
+        self.directory = directory
+        self.buffer_size = buffer_size
+        self.records = 0
+        self._day = None
+        self._day_end = 0.0
+        self._files = {}
+        self._symbols_file = None
+        self._symbol_ids = {}
+
+    def record(self, events, received_at=None):
+        if received_at is None:
+            received_at = time.time()
+        if received_at >= self._day_end:
+            self._rotate(received_at)
+        timestamp = int(received_at * 1_000_000_000)
+        for event in events:
+            layout = RECORD_LAYOUTS.get(event.eventType)
+            if layout is None:
+                continue
+            symbol_id = self._symbol_ids.get(event.eventSymbol)
+            if symbol_id is None:
+                symbol_id = self._intern(event.eventSymbol)
+            values = [_float(getattr(event, name, None)) for name in layout["fields"]]
+            self._files[event.eventType].write(layout["struct"].pack(timestamp, symbol_id, *values))
+            self.records += 1
+
+    # Alias so a recorder can be passed anywhere a handler is expected
+    __call__ = record
+
+    def _intern(self, symbol):
+        symbol_id = len(self._symbol_ids)
+        self._symbol_ids[symbol] = symbol_id
+        self._symbols_file.write(symbol + "\n")
+        self._symbols_file.flush()
+        return symbol_id
+
+    def _rotate(self, received_at):
+        self.close()
+        moment = datetime.fromtimestamp(received_at, timezone.utc)
+        self._day = moment.strftime("%Y%m%d")
+        start_of_day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        self._day_end = (start_of_day + timedelta(days=1)).timestamp()
+
+        day_dir = os.path.join(self.directory, self._day)
+        os.makedirs(day_dir, exist_ok=True)
+
+        # Re-load the day's dictionary so restarting the recorder keeps ids stable
+        symbols_path = os.path.join(day_dir, SYMBOLS_FILE)
+        self._symbol_ids = {}
+        if os.path.exists(symbols_path):
+            with open(symbols_path, "r") as f:
+                for line in f:
+                    self._symbol_ids[line.rstrip("\n")] = len(self._symbol_ids)
+        self._symbols_file = open(symbols_path, "a")
+
+        for event_type, layout in RECORD_LAYOUTS.items():
+            path = os.path.join(day_dir, layout["file"])
+            if os.path.exists(path):
+                self._trim_partial_record(path, layout)
+            is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+            f = open(path, "ab", buffering=self.buffer_size)
+            if is_new:
+                f.write(HEADER.pack(layout["magic"], layout["struct"].size, 0))
+            self._files[event_type] = f
+
+    @staticmethod
+    def _trim_partial_record(path, layout):
+        """
+        Drop a record cut short by a crash (buffered writes aren't record-aligned), so that
+        records appended from now on stay aligned.
+        """
+        record_size = layout["struct"].size
+        size = os.path.getsize(path)
+        if size < HEADER.size:
+            # Not even a full header: start the file over
+            with open(path, "r+b") as f:
+                f.truncate(0)
+            return
+        aligned = HEADER.size + (size - HEADER.size) // record_size * record_size
+        if aligned != size:
+            with open(path, "r+b") as f:
+                f.truncate(aligned)
+
+    def flush(self):
+        for f in self._files.values():
+            f.flush()
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+        if self._symbols_file is not None:
+            self._symbols_file.close()
+            self._symbols_file = None
+        self._day_end = 0.0
+
+
+#-----------------------------------------------------------------------------
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise Exception("Reading recorded ticks requires numpy (pip install numpy).")
+    return numpy
+
+
+def record_dtype(event_type):
+    """NumPy structured dtype matching the on-disk record layout of event_type."""
+    np = _numpy()
+    fields = [("time", "<i8"), ("symbol_id", "<u4")]
+    fields += [(name, "<f8") for name in RECORD_LAYOUTS[event_type]["fields"]]
+    return np.dtype(fields)
+
+
+class TickReader:
+    """
+    Memory-maps recorded tick files. Arrays returned here are read-only NumPy views onto the
+    files themselves, so loading a day of ticks costs no parsing and no copy until you ask
+    for one (e.g. with a boolean symbol mask).
+    """
+
+    def __init__(self, directory=TICK_RECORD_DIR):
+        self.directory = directory
+
+    def days(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(d for d in os.listdir(self.directory) if d.isdigit() and len(d) == 8)
+
+    def symbols(self, day):
+        path = os.path.join(self.directory, day, SYMBOLS_FILE)
+        if not os.path.exists(path):
+            return []
+        with open(path, "r") as f:
+            return [line.rstrip("\n") for line in f]
+
+    def symbol_id(self, day, symbol):
+        symbols = self.symbols(day)
+        return symbols.index(symbol) if symbol in symbols else None
+
+    def load(self, day, event_type="Trade"):
+        """Zero-copy structured array of every record of event_type written on day (YYYYMMDD)."""
+        np = _numpy()
+        layout = RECORD_LAYOUTS[event_type]
+        path = os.path.join(self.directory, day, layout["file"])
+        dtype = record_dtype(event_type)
+        if not os.path.exists(path) or os.path.getsize(path) <= HEADER.size:
+            return np.empty(0, dtype=dtype)
+
+        with open(path, "rb") as f:
+            magic, record_size, _ = HEADER.unpack(f.read(HEADER.size))
+        if magic != layout["magic"] or record_size != dtype.itemsize:
+            raise Exception(f"{path} is not a {event_type} tick file.")
+
+        # Ignore a trailing partial record the recorder may still be writing
+        count = (os.path.getsize(path) - HEADER.size) // record_size
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", offset=HEADER.size, shape=(count,))
+
+    def trades(self, day):
+        return self.load(day, "Trade")
+
+    def quotes(self, day):
+        return self.load(day, "Quote")
+
+    @staticmethod
+    def time_slice(records, start=None, end=None):
+        """
+        View of records with start <= time < end (epoch seconds). Records are appended in
+        receive order, so this is a binary search and the result shares memory with the file.
+        """
+        np = _numpy()
+        times = records["time"]
+        lo = 0 if start is None else int(np.searchsorted(times, int(start * 1_000_000_000), side="left"))
+        hi = len(records) if end is None else int(np.searchsorted(times, int(end * 1_000_000_000), side="left"))
+        return records[lo:hi]
+
+    def between(self, start, end, event_type="Trade"):
+        """List of per-day views covering [start, end) in epoch seconds; one view per day file."""
+        first = datetime.fromtimestamp(start, timezone.utc).strftime("%Y%m%d")
+        last = datetime.fromtimestamp(end, timezone.utc).strftime("%Y%m%d")
+        views = []
+        for day in self.days():
+            if first <= day <= last:
+                records = self.time_slice(self.load(day, event_type), start, end)
+                if len(records):
+                    views.append((day, records))
+        return views
+
+    def for_symbol(self, day, symbol, event_type="Trade"):
+        """Records of one symbol on day (a copy, since the rows are not contiguous)."""
+        records = self.load(day, event_type)
+        symbol_id = self.symbol_id(day, symbol)
+        if symbol_id is None:
+            return records[:0]
+        return records[records["symbol_id"] == symbol_id]
@@ -0,0 +1,167 @@
+# ttctl.py
+"""
+Thin command-line client for daemon.py. It only imports what a command needs (no requests
+or websockets), so a call costs little more than interpreter startup plus one round trip
+over the Unix socket.
+
+    python ttctl.py quote SPY AAPL
+    python ttctl.py balances [ACCOUNT]
+    python ttctl.py positions [ACCOUNT]
+    python ttctl.py orders [ACCOUNT]
+    python ttctl.py cancel-all [ACCOUNT] [-y]
+    python ttctl.py replace ORDER_ID PRICE [QUANTITY [ACCOUNT]]   (PRICE "-" keeps the price)
+    python ttctl.py subscribe SYMBOL ... / unsubscribe SYMBOL ...
+    python ttctl.py bars SYMBOL [1s|1m|5m [COUNT]]
+    python ttctl.py status | rest-stats | order-stats | ping | shutdown
+
+Add --json to print the raw reply, --socket PATH to use another daemon.
+"""
+import sys
+
+
+def request(cmd, args=(), socket_path=None):
+    """Send one command to the daemon and return its result; raises on an error reply."""
+    import json
+    import socket
+    if socket_path is None:
+        from config import DAEMON_SOCKET
+        socket_path = DAEMON_SOCKET
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            raise Exception(f"No daemon listening on {socket_path}; start one with: python daemon.py")
+        sock.sendall(json.dumps({"cmd": cmd, "args": list(args)}).encode() + b"\n")
+        reply = b""
+        while not reply.endswith(b"\n"):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            reply += chunk
+    reply = json.loads(reply)
+    if not reply.get("ok"):
+        raise Exception(reply.get("error"))
+    return reply.get("result")
+
+
+def _fmt(value):
+    if value is None or value != value:
+        return "-"
+    return f"{value:,.2f}" if isinstance(value, float) else str(value)
+
+
+def print_quotes(result):
+    import time
+    now = time.time()
+    for symbol, quote in result.items():
+        if quote is None:
+            print(f"{symbol}: no data")
+            continue
+        updated = max(quote.get("quoteTime") or 0, quote.get("tradeTime") or 0)
+        age = f" ({now - updated:.1f}s ago)" if updated else ""
+        print(f"{quote['symbol']}: bid {_fmt(quote.get('bidPrice'))} / ask {_fmt(quote.get('askPrice'))}, "
+              f"last {_fmt(quote.get('price'))}, volume {_fmt(quote.get('dayVolume'))}{age}")
+
+
+def print_balances(result):
+    if not result:
+        print("No balances.")
+        return
+    for key, value in result.items():
+        print(f"{key}: {value}")
+
+
+def print_positions(result):
+    if not result:
+        print("No positions.")
+        return
+    for position in result:
+        mark = position.get("mark")
+        print(f"{position.get('symbol')} ({position.get('instrument-type')}): {position.get('quantity')} "
+              f"{position.get('quantity-direction')}, avg open {position.get('average-open-price')}"
+              + (f", mark {_fmt(mark)}" if mark is not None else ""))
+
+
+def print_orders(result):
+    if not result:
+        print("No active orders.")
+        return
+    for order in result:
+        legs = ", ".join(f"{leg.get('action')} {leg.get('quantity')} {leg.get('symbol')}" for leg in order.get("legs", []))
+        print(f"{order.get('id')}: {order.get('order-type')} {order.get('status')} @ {order.get('price')} - {legs}")
+
+
+def print_replace(result):
+    for note in result["notes"]:
+        print(note)
+    order = result["order"]
+    print(f"Replaced by order {order.get('id')} @ {order.get('price')} ({order.get('status')})")
+
+
+def print_bars(result):
+    import time
+    rows = result["bars"] + ([result["current"]] if result.get("current") else [])
+    if not rows:
+        print(f"No {result['timeframe']} bars for {result['symbol']} yet.")
+        return
+    for index, bar in enumerate(rows):
+        marker = "*" if result.get("current") and index == len(rows) - 1 else " "
+        print(f"{time.strftime('%H:%M:%S', time.localtime(bar['time']))}{marker} O {_fmt(bar['open'])} "
+              f"H {_fmt(bar['high'])} L {_fmt(bar['low'])} C {_fmt(bar['close'])} V {_fmt(bar['volume'])} "
+              f"VWAP {_fmt(bar['vwap'])} ({int(bar['trades'])} trades)")
+
+
+def print_cancel_all(result):
+    results = result["results"]
+    for item in results:
+        state = "cancelled" if item["ok"] else f"failed: {item['error']}"
+        print(f"{item['order_id']}: {state}")
+    ok = sum(1 for item in results if item["ok"])
+    print(f"{ok}/{len(results)} cancelled in {result['elapsed']:.2f} s")
+
+
+PRINTERS = {
+    "quote": print_quotes,
+    "balances": print_balances,
+    "positions": print_positions,
+    "orders": print_orders,
+    "cancel-all": print_cancel_all,
+    "replace": print_replace,
+    "bars": print_bars
+}
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    raw = "--json" in argv
+    confirmed = "-y" in argv or "--yes" in argv
+    argv = [arg for arg in argv if arg not in ("--json", "-y", "--yes")]
+    socket_path = None
+    if "--socket" in argv:
+        index = argv.index("--socket")
+        socket_path = argv[index + 1]
+        del argv[index:index + 2]
+    if not argv:
+        print(__doc__.strip())
+        return 2
+
+    cmd, args = argv[0], argv[1:]
+    if cmd == "cancel-all" and not confirmed:
+        if input("Cancel all active orders? (y/n): ").lower() != "y":
+            print("Bulk cancellation aborted.")
+            return 1
+    try:
+        result = request(cmd, args, socket_path)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if raw or cmd not in PRINTERS:
+        import json
+        print(json.dumps(result, indent=2))
+    else:
+        PRINTERS[cmd](result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())